@@ -0,0 +1,251 @@
+"""
+Pooled, reusable LLM client instances for MCP Project.
+Clients are keyed by provider, model, temperature, API key and constructor
+options and share one keep-alive HTTP transport, so repeated calls skip connection setup.
+The async transport keeps one connection pool per event loop.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.logging import LogManager
+
+log_manager = LogManager()
+logger = log_manager.get_logger("CLIENT POOL")
+
+# (provider, model, temperature, API key digest, constructor options)
+ClientKey = Tuple[str, str, float, str, Tuple[Tuple[str, str], ...]]
+
+
+def _client_key(provider: str, model: str, temperature: float, api_key: str, kwargs: Dict[str, Any]) -> ClientKey:
+    # Only a digest of the key is held, so it does not show up in stats or logs
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    options = tuple(sorted((name, repr(value)) for name, value in kwargs.items()))
+    return provider, model, float(temperature), key_digest, options
+
+
+def _create_openai_client(model: str, temperature: float, api_key: str, pool: "LLMClientPool", **kwargs) -> Any:
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        temperature=temperature,
+        http_client=pool.http_client,
+        http_async_client=pool.http_async_client,
+        **kwargs
+    )
+
+
+def _create_gemini_client(model: str, temperature: float, api_key: str, pool: "LLMClientPool", **kwargs) -> Any:
+    # The Google client manages its own transport; pooling the instance keeps its channel alive
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key,
+        temperature=temperature,
+        **kwargs
+    )
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport with one connection pool per event loop: asyncio connections belong
+    to the loop that opened them, and the worker servers, tool threads and asyncio.run()
+    wrappers each run their own loop
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _current(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._current().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the pool of every loop: in this loop directly, in another running loop through it"""
+        with self._lock:
+            transports = list(self._transports.items())
+            self._transports.clear()
+        current = asyncio.get_running_loop()
+        for loop, transport in transports:
+            if loop is current:
+                await transport.aclose()
+            elif loop.is_running():
+                try:
+                    await asyncio.wait_for(
+                        asyncio.wrap_future(asyncio.run_coroutine_threadsafe(transport.aclose(), loop)), 5.0
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to close a connection pool of another event loop: {e!r}")
+            # The connections of a stopped loop cannot be closed through it; they are dropped with it
+
+
+PROVIDER_FACTORIES: Dict[str, Callable[..., Any]] = {
+    "openai": _create_openai_client,
+    "google": _create_gemini_client,
+}
+
+
+class LLMClientPool:
+    """
+    Pool of LLM client instances keyed by (provider, model, temperature, API key, options).
+    Clients and the shared HTTP transport are created lazily on first use.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 60.0):
+        """
+        Initialize the client pool
+
+        Args:
+            max_connections: Maximum concurrent connections of the shared transport
+            max_keepalive_connections: Maximum idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Default request timeout in seconds
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+
+        self._clients: Dict[ClientKey, Any] = {}
+        self._usage: Dict[ClientKey, int] = {}
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.creation_seconds = 0.0
+        self._closed = False
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Shared synchronous keep-alive HTTP client"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self.limits, timeout=self.timeout)
+        return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        """Shared asynchronous keep-alive HTTP client (with a connection pool per event loop)"""
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(
+                timeout=self.timeout, transport=_PerLoopTransport(self.limits)
+            )
+        return self._http_async_client
+
+    def get(self, provider: str, model: str, temperature: float, api_key: str, **kwargs) -> Any:
+        """
+        Get a pooled client, creating it on first use
+
+        Args:
+            provider: Provider name ("openai" or "google")
+            model: Model name
+            temperature: Sampling temperature
+            api_key: API key for the provider
+            **kwargs: Extra constructor arguments (clients with different arguments are pooled separately)
+
+        Returns:
+            The LangChain chat model instance
+        """
+        key = _client_key(provider, model, temperature, api_key, kwargs)
+        client = self._clients.get(key)
+        if client is not None:
+            with self._lock:
+                self.hits += 1
+                self._usage[key] = self._usage.get(key, 0) + 1
+            return client
+
+        factory = PROVIDER_FACTORIES.get(provider)
+        if factory is None:
+            raise ValueError(f"Unknown LLM provider '{provider}'")
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if self._closed:
+                    raise RuntimeError("LLM client pool has been closed")
+                started = time.perf_counter()
+                client = factory(model, temperature, api_key, self, **kwargs)
+                self.creation_seconds += time.perf_counter() - started
+                self._clients[key] = client
+                self._usage[key] = 0
+                self.misses += 1
+                logger.info(f"Created {provider} client for {model} (temperature={temperature})")
+            else:
+                self.hits += 1
+            self._usage[key] += 1
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns pool statistics"""
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "creation_seconds": round(self.creation_seconds, 6),
+                "usage": {f"{provider}:{model}:{temperature}:{key_digest[:8]}"
+                          + (f":{dict(options)}" if options else ""): count
+                          for (provider, model, temperature, key_digest, options), count in self._usage.items()},
+                "http_client_open": self._http_client is not None,
+                "http_async_client_open": self._http_async_client is not None,
+            }
+
+    def close(self) -> None:
+        """
+        Drop all clients and close the shared HTTP transports.
+        Inside a running event loop the async transport cannot be closed
+        without blocking the loop, so it is left for aclose() to await.
+        """
+        try:
+            asyncio.get_running_loop()
+            in_loop = True
+        except RuntimeError:
+            in_loop = False
+
+        with self._lock:
+            self._closed = True
+            self._clients.clear()
+            self._usage.clear()
+            http_client, self._http_client = self._http_client, None
+            http_async_client = None
+            if not in_loop:
+                http_async_client, self._http_async_client = self._http_async_client, None
+
+        if http_client is not None:
+            http_client.close()
+        if in_loop and self._http_async_client is not None:
+            logger.warning("close() called inside an event loop; await aclose() to close the async HTTP client")
+        if http_async_client is not None:
+            try:
+                asyncio.run(http_async_client.aclose())
+            except Exception as e:
+                logger.warning(f"Failed to close async HTTP client: {e}")
+
+    async def aclose(self) -> None:
+        """Async variant of close() for use inside a running event loop"""
+        with self._lock:
+            http_async_client, self._http_async_client = self._http_async_client, None
+        if http_async_client is not None:
+            await http_async_client.aclose()
+        self.close()
@@ -3,6 +3,8 @@ Centralized configuration management for MCP Project.
 Handles environment variables and server settings.
 """
 import os
+import atexit
+import tempfile
 from typing import Dict, Any, Optional
 from venv import logger
 from dotenv import load_dotenv
@@ -27,6 +29,66 @@ class Settings:
         self.SOCIAL_PORT: int = os.environ.get("SOCIAL_PORT", 8000)
         self.GITHUB_PORT: int = os.environ.get("WEATHER_PORT", 8002)
         
+        # MCP transport of the social server: "sse" or "streamable-http"
+        self.SOCIAL_TRANSPORT: str = os.environ.get("SOCIAL_TRANSPORT", "sse")
+        
+        # Streamable HTTP: stateless mode (no session state, so any worker can serve any
+        # request), plain JSON responses instead of an SSE stream per POST, and how long
+        # idle keep-alive connections stay open (seconds)
+        self.MCP_STATELESS_HTTP: bool = os.environ.get("MCP_STATELESS_HTTP", "false").lower() in ("1", "true", "yes")
+        self.MCP_JSON_RESPONSE: bool = os.environ.get("MCP_JSON_RESPONSE", "false").lower() in ("1", "true", "yes")
+        self.MCP_KEEPALIVE_TIMEOUT: float = float(os.environ.get("MCP_KEEPALIVE_TIMEOUT", 30))
+        
+        # Social server worker processes sharing SOCIAL_PORT (SO_REUSEPORT); workers
+        # forward requests for each other's sessions over unix sockets in WORKER_SOCKET_DIR
+        self.SOCIAL_WORKERS: int = int(os.environ.get("SOCIAL_WORKERS", 1))
+        self.WORKER_SOCKET_DIR: str = os.environ.get("WORKER_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "mcp-tool"))
+        
+        # Tool execution: synchronous tools run on a pool of TOOL_THREAD_WORKERS threads (or
+        # TOOL_PROCESS_WORKERS processes); default per-tool concurrency cap and timeout (0 = none)
+        self.TOOL_THREAD_WORKERS: int = int(os.environ.get("TOOL_THREAD_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+        self.TOOL_PROCESS_WORKERS: int = int(os.environ.get("TOOL_PROCESS_WORKERS", os.cpu_count() or 1))
+        self.TOOL_MAX_CONCURRENCY: int = int(os.environ.get("TOOL_MAX_CONCURRENCY", 0))
+        self.TOOL_TIMEOUT: float = float(os.environ.get("TOOL_TIMEOUT", 0))
+        # Prometheus metrics: path served by every MCP server, and port of the endpoint
+        # combining the supervised servers (app/main.py; 0 disables it)
+        self.METRICS_PATH: str = os.environ.get("METRICS_PATH", "/metrics")
+        self.METRICS_PORT: int = int(os.environ.get("METRICS_PORT", 9400))
+        self.METRICS_SCRAPE_TIMEOUT: float = float(os.environ.get("METRICS_SCRAPE_TIMEOUT", 2))
+        # Largest list of argument sets accepted by a "<tool>_batch" tool
+        self.TOOL_BATCH_MAX_ITEMS: int = int(os.environ.get("TOOL_BATCH_MAX_ITEMS", 100))
+        
+        # Tool result cache (tools opt in at registration); TOOL_CACHE_ENABLED=false turns it off everywhere.
+        # TTLs in seconds of the social tools' results
+        self.TOOL_CACHE_ENABLED: bool = os.environ.get("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.TOOL_CACHE_MAX_ENTRIES: int = int(os.environ.get("TOOL_CACHE_MAX_ENTRIES", 1024))
+        self.IDOL_CACHE_TTL: float = float(os.environ.get("IDOL_CACHE_TTL", 3600))
+        
+        # Weather provider (empty URL = in-process stub); reports stay fresh WEATHER_CACHE_TTL seconds,
+        # requests time out after WEATHER_TIMEOUT seconds and at most WEATHER_MAX_CONCURRENCY run at once
+        self.WEATHER_API_URL: str = os.environ.get("WEATHER_API_URL", "")
+        self.WEATHER_API_KEY: str = os.environ.get("WEATHER_API_KEY", "")
+        self.WEATHER_CACHE_TTL: float = float(os.environ.get("WEATHER_CACHE_TTL", 300))
+        self.WEATHER_TIMEOUT: float = float(os.environ.get("WEATHER_TIMEOUT", 5))
+        self.WEATHER_MAX_CONCURRENCY: int = int(os.environ.get("WEATHER_MAX_CONCURRENCY", 50))
+        self.WEATHER_MAX_CONNECTIONS: int = int(os.environ.get("WEATHER_MAX_CONNECTIONS", 100))
+        
+        # Idol catalogue of the social server (JSON list of idols; empty = bundled app/data/database/idols.json)
+        self.IDOL_DATA_PATH: str = os.environ.get("IDOL_DATA_PATH", "")
+        
+        # "native" serves the github stdio server through the in-process bridge,
+        # "just-aii-guess" through the external Node bridge
+        self.GITHUB_BRIDGE: str = os.environ.get("GITHUB_BRIDGE", "native")
+        
+        # Worker pool of the native bridge: GITHUB_WORKERS children are kept running and the
+        # pool grows up to GITHUB_MAX_WORKERS while the average queue depth per worker is at
+        # least WORKER_POOL_SCALE_UP_DEPTH, then shrinks after WORKER_POOL_SCALE_DOWN_IDLE seconds idle.
+        # GITHUB_MAX_WORKERS defaults to GITHUB_WORKERS: no scaling (and no pool for one worker) unless set
+        self.GITHUB_WORKERS: int = int(os.environ.get("GITHUB_WORKERS", 1))
+        self.GITHUB_MAX_WORKERS: int = int(os.environ.get("GITHUB_MAX_WORKERS", self.GITHUB_WORKERS))
+        self.GITHUB_PIN_SESSIONS: bool = os.environ.get("GITHUB_PIN_SESSIONS", "false").lower() in ("1", "true", "yes")
+        self.WORKER_POOL_SCALE_UP_DEPTH: float = float(os.environ.get("WORKER_POOL_SCALE_UP_DEPTH", 4))
+        self.WORKER_POOL_SCALE_DOWN_IDLE: float = float(os.environ.get("WORKER_POOL_SCALE_DOWN_IDLE", 60))
         
         # Web search
         self.NAVER_CLIENT_ID: int = os.environ.get("MATH_PORT", 8001)
@@ -34,8 +96,28 @@ class Settings:
         
         
         
+        # Process supervisor
+        self.SUPERVISOR_BACKOFF_INITIAL: float = float(os.environ.get("SUPERVISOR_BACKOFF_INITIAL", 0.1))
+        self.SUPERVISOR_BACKOFF_MAX: float = float(os.environ.get("SUPERVISOR_BACKOFF_MAX", 30))
+        self.SUPERVISOR_CRASH_LOOP_RESTARTS: int = int(os.environ.get("SUPERVISOR_CRASH_LOOP_RESTARTS", 5))
+        self.SUPERVISOR_CRASH_LOOP_WINDOW: float = float(os.environ.get("SUPERVISOR_CRASH_LOOP_WINDOW", 60))
+        self.SUPERVISOR_READY_TIMEOUT: float = float(os.environ.get("SUPERVISOR_READY_TIMEOUT", 60))
+        
+        # Child process registry
+        self.PROCESS_SAMPLE_INTERVAL: float = float(os.environ.get("PROCESS_SAMPLE_INTERVAL", 5))
+        self.PROCESS_MAX_FINISHED: int = int(os.environ.get("PROCESS_MAX_FINISHED", 100))
+        
+        # npx packages are installed here once and then started directly
+        self.NPX_CACHE_DIR: str = os.environ.get("NPX_CACHE_DIR", os.path.join("~", ".cache", "mcp-tool", "npx"))
+        
+        # LLM client pool
+        self.LLM_POOL_MAX_CONNECTIONS: int = int(os.environ.get("LLM_POOL_MAX_CONNECTIONS", 100))
+        self.LLM_POOL_MAX_KEEPALIVE: int = int(os.environ.get("LLM_POOL_MAX_KEEPALIVE", 20))
+        self.LLM_POOL_KEEPALIVE_EXPIRY: float = float(os.environ.get("LLM_POOL_KEEPALIVE_EXPIRY", 30))
+        
         # Server configurations for clients
         self._server_config = None
+        self._client_pool = None
     
     @property
     def server_config(self) -> Dict[str, Dict[str, Any]]:
@@ -43,6 +125,9 @@ class Settings:
         if self._server_config is None:
             self._server_config = {
                 "social": {
+                    "url": f"http://{self.IP_HOST}:{self.SOCIAL_PORT}/mcp",
+                    "transport": "streamable_http",
+                } if self.SOCIAL_TRANSPORT == "streamable-http" else {
                     "url": f"http://{self.IP_HOST}:{self.SOCIAL_PORT}/sse",
                     "transport": "sse",
                 },
@@ -72,21 +157,38 @@ class Settings:
             
         return True
     
-    def get_model_instance(self):
-        """Get the appropriate language model instance based on configuration"""
+    @property
+    def client_pool(self):
+        """Get the shared LLM client pool (created lazily, closed at interpreter exit)"""
+        if self._client_pool is None:
+            from app.core.client_pool import LLMClientPool
+            self._client_pool = LLMClientPool(
+                max_connections=self.LLM_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=self.LLM_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=self.LLM_POOL_KEEPALIVE_EXPIRY,
+            )
+            atexit.register(self._client_pool.close)
+        return self._client_pool
+    
+    def get_model_instance(self, model: Optional[str] = None, temperature: float = 0.3):
+        """
+        Get the appropriate language model instance based on configuration.
+        Instances are pooled by provider, model and temperature and reuse a shared
+        keep-alive HTTP transport.
+        """
         if self.USE_GEMINI:
-            from langchain_google_genai import ChatGoogleGenerativeAI
-            return ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                google_api_key=self.GOOGLE_API_KEY,
-                temperature=0.3,
+            return self.client_pool.get(
+                "google",
+                model or "gemini-2.0-flash",
+                temperature,
+                self.GOOGLE_API_KEY,
             )
-        else:            
-            from langchain_openai import ChatOpenAI
-            return ChatOpenAI(
-                model="gpt-4.1-nano", 
-                api_key=self.OPENAI_API_KEY,
-                temperature=0.3
+        else:
+            return self.client_pool.get(
+                "openai",
+                model or "gpt-4.1-nano",
+                temperature,
+                self.OPENAI_API_KEY,
             )
 
 # Create a global settings instance
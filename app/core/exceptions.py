@@ -24,4 +24,12 @@ class ToolError(MCPError):
     def __init__(self, tool_name: str, message: str):
         self.tool_name = tool_name
         self.message = message
-        super().__init__(f"Error in tool '{tool_name}': {message}")
\ No newline at end of file
+        super().__init__(f"Error in tool '{tool_name}': {message}")
+
+    def __reduce__(self):
+        # Rebuilt from tool_name and message when unpickled (e.g. raised in a process pool worker)
+        return type(self), (self.tool_name, self.message)
+
+class NotFoundError(ToolError):
+    """Raised when a tool finds nothing for its arguments"""
+    pass
@@ -4,7 +4,7 @@ Provides a LogManager class to handle logger creation and configuration.
 """
 import logging
 import sys
-from typing import Dict, Optional
+from typing import Dict, Optional, TextIO
 
 
 class LogManager:
@@ -19,6 +19,9 @@ class LogManager:
     # Class variable to store logger instances
     _loggers: Dict[str, logging.Logger] = {}
     
+    # Stream of the console handlers (None means sys.stdout)
+    _console_stream: Optional[TextIO] = None
+    
     def __init__(self, default_level: int = logging.INFO):
         """
         Initialize the logging manager with default settings.
@@ -71,7 +74,7 @@ class LogManager:
         
         # Create console handler and set level if no handlers exist
         if not logger.handlers:
-            handler = logging.StreamHandler(sys.stdout)
+            handler = logging.StreamHandler(self._console_stream or sys.stdout)
             handler.setLevel(level)
             
             # Create formatter
@@ -127,6 +130,20 @@ class LogManager:
                 for handler in logger.handlers:
                     handler.setFormatter(formatter)
     
+    def redirect_console(self, stream: TextIO) -> None:
+        """
+        Send console output of all loggers, existing and new, to another stream.
+        Used by the stdio transport, where stdout carries the protocol.
+        
+        Args:
+            stream: The new console stream (e.g. sys.stderr)
+        """
+        LogManager._console_stream = stream
+        for logger in self._loggers.values():
+            for handler in logger.handlers:
+                if type(handler) is logging.StreamHandler and handler.stream is sys.stdout:
+                    handler.setStream(stream)
+    
     def add_file_handler(self, logger_name: str, file_path: str, level: Optional[int] = None) -> None:
         """
         Add a file handler to the specified logger.
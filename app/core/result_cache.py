@@ -0,0 +1,189 @@
+"""
+Result cache for MCP Project.
+Results are kept for a TTL, bounded by entry count and size, and keyed by the
+normalised call arguments. Concurrent identical calls are merged
+(single-flight): the first one computes, the others await its result.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.core.exceptions import NotFoundError, ToolError
+
+
+def normalize_value(value: Any, case_sensitive: bool = True) -> Any:
+    """Unicode NFC, trimmed and single-spaced strings (recursively), optionally case-folded"""
+    if isinstance(value, str):
+        value = " ".join(unicodedata.normalize("NFC", value).split())
+        return value if case_sensitive else value.casefold()
+    if isinstance(value, dict):
+        return {key: normalize_value(item, case_sensitive) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item, case_sensitive) for item in value]
+    return value
+
+
+def _result_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json().encode("utf-8"))
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+class ResultCache:
+    """TTL + LRU cache of one function's results, with single-flight computation"""
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 256, max_bytes: Optional[int] = None,
+                 error_ttl: float = 0.0, case_sensitive: bool = True,
+                 key_builder: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            name: The cache name (the tool or data source it serves)
+            ttl: Seconds a result stays valid
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum total (estimated) size of the cached results
+            error_ttl: Seconds a NotFoundError is cached (0 = not cached); other errors are never cached
+            case_sensitive: Whether string arguments differing only in case are different calls
+            key_builder: Builds the cache key from the bound arguments (replaces the normalisation)
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.error_ttl = error_ttl
+        self.case_sensitive = case_sensitive
+        self.key_builder = key_builder
+
+        # key -> (expires_at, is_error, value, size)
+        self._entries: "OrderedDict[str, Tuple[float, bool, Any, int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, arguments: Dict[str, Any]) -> str:
+        """Fixed-size key of the normalised arguments"""
+        if self.key_builder is not None:
+            material = self.key_builder(arguments)
+        else:
+            material = normalize_value(arguments, self.case_sensitive)
+        data = json.dumps(material, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[Tuple[bool, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, is_error, value, size = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.current_bytes -= size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return is_error, value
+
+    def _store(self, key: str, value: Any, is_error: bool = False) -> None:
+        ttl = self.error_ttl if is_error else self.ttl
+        if ttl <= 0:
+            return
+        size = _result_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[3]
+        self._entries[key] = (time.monotonic() + ttl, is_error, value, size)
+        self.current_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted[3]
+            self.evictions += 1
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+        except NotFoundError as e:
+            self._store(key, e, is_error=True)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._store(key, value)
+        return value
+
+    async def get_or_compute(self, arguments: Dict[str, Any], compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached result for these arguments, or compute it once
+
+        Args:
+            arguments: The call arguments (used for the key)
+            compute: Produces the result on a miss
+
+        Returns:
+            The result
+        """
+        key = self.make_key(arguments)
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            is_error, value = cached
+            if is_error:
+                # A new instance per caller: a shared one would collect every caller's traceback
+                raise type(value)(value.tool_name, value.message)
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            # A separate task, so a cancelled caller does not cancel the others waiting on it
+            task = asyncio.ensure_future(self._compute(key, compute))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        try:
+            return await asyncio.shield(task)
+        except ToolError as e:
+            raise type(e)(e.tool_name, e.message) from None
+
+    def clear(self) -> None:
+        """Drop every cached result (in-flight computations are kept)"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/coalesced counters, hit rate and size of the cache"""
+        calls = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / calls, 4) if calls else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "in_flight": len(self._inflight),
+            "ttl": self.ttl,
+        }
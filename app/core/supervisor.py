@@ -0,0 +1,325 @@
+"""
+Event-driven process supervisor for MCP Project.
+Child exits are detected through process sentinels (no polling), servers are
+considered ready once their HTTP endpoint answers, and failed children
+are restarted with exponential backoff and crash-loop detection.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+# httpx imports httpcore lazily, when a client is created. Load it here, before any
+# probe thread runs: a child forked while a probe thread holds its import lock
+# would deadlock on its own first httpx client.
+import httpcore  # noqa: F401
+
+from app.core.logging import LogManager
+
+log_manager = LogManager()
+logger = log_manager.get_logger("SUPERVISOR")
+
+# Service states
+STARTING = "starting"
+READY = "ready"
+BACKOFF = "backoff"
+CRASH_LOOP = "crash-loop"
+STOPPED = "stopped"
+
+# Readiness probe retry delays (seconds)
+PROBE_DELAY_INITIAL = 0.02
+PROBE_DELAY_MAX = 0.25
+
+# Answers of a streamable HTTP endpoint (/mcp) to a bare GET: no session ID or
+# no text/event-stream in Accept. The MCP app sent them, so the server is up
+STREAMABLE_READY_STATUSES = (400, 406)
+
+
+def probe_url(url: str) -> str:
+    """Bind-all addresses cannot be connected to; probe the loopback address instead"""
+    parts = urlsplit(url)
+    if parts.hostname in ("0.0.0.0", "::", ""):
+        netloc = f"127.0.0.1:{parts.port}" if parts.port else "127.0.0.1"
+        return urlunsplit(parts._replace(netloc=netloc))
+    return url
+
+
+def is_ready_response(url: str, status_code: int) -> bool:
+    """Whether a GET answer means the server is up: 2xx, or the bare-GET rejection of a streamable /mcp endpoint"""
+    if 200 <= status_code < 300:
+        return True
+    return urlsplit(url).path.rstrip("/").endswith("/mcp") and status_code in STREAMABLE_READY_STATUSES
+
+
+def _run_service(target: Callable[[], Any]) -> None:
+    """Child entry point: restore default signal handling inherited from the supervisor"""
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    target()
+
+
+@dataclass
+class ServiceSpec:
+    """A supervised server: how to start it and where to probe it"""
+    name: str
+    target: Callable[[], Any]
+    ready_url: Optional[str] = None
+    # Probe ready_url through this unix socket (workers sharing a port are probed individually)
+    ready_uds: Optional[str] = None
+
+
+@dataclass
+class _Service:
+    spec: ServiceSpec
+    process: Optional[multiprocessing.Process] = None
+    state: str = STOPPED
+    generation: int = 0
+    started_at: float = 0.0
+    ready_at: Optional[float] = None
+    time_to_ready: Optional[float] = None
+    restarts: int = 0
+    consecutive_failures: int = 0
+    last_exit_code: Optional[int] = None
+    restart_at: Optional[float] = None
+    crashes: Deque[float] = field(default_factory=deque)
+
+
+class ProcessSupervisor:
+    """
+    Supervises server processes.
+
+    The main loop blocks in multiprocessing.connection.wait() on the process
+    sentinels and a wake-up pipe, so it reacts to a child exit, a readiness
+    change or a shutdown request as soon as it happens.
+    """
+
+    def __init__(self, backoff_initial: float = 0.1, backoff_max: float = 30.0,
+                 crash_loop_restarts: int = 5, crash_loop_window: float = 60.0,
+                 ready_timeout: float = 60.0, stable_after: float = 10.0):
+        """
+        Initialize the supervisor
+
+        Args:
+            backoff_initial: Delay before the first restart of a failed child (seconds)
+            backoff_max: Maximum restart delay (seconds)
+            crash_loop_restarts: Crashes within crash_loop_window that mark a crash loop
+            crash_loop_window: Window for crash-loop detection (seconds)
+            ready_timeout: Time a server may take to answer its readiness probe (seconds)
+            stable_after: Uptime after which the backoff is reset (seconds)
+        """
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.crash_loop_restarts = crash_loop_restarts
+        self.crash_loop_window = crash_loop_window
+        self.ready_timeout = ready_timeout
+        self.stable_after = stable_after
+
+        self._services: Dict[str, _Service] = {}
+        self._lock = threading.Lock()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_write, False)
+        self._stopping = False
+        self._announced = False
+
+    def add(self, spec: ServiceSpec) -> None:
+        """Register a service (started by start())"""
+        self._services[spec.name] = _Service(spec)
+
+    def wakeup(self) -> None:
+        """Wake the supervisor loop (safe from signal handlers and other threads)"""
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def request_stop(self) -> None:
+        """Ask run() to return; children are terminated by stop()"""
+        self._stopping = True
+        self.wakeup()
+
+    def _spawn(self, service: _Service) -> None:
+        spec = service.spec
+        process = multiprocessing.Process(target=_run_service, args=(spec.target,), name=spec.name)
+        process.daemon = True
+        with self._lock:
+            service.generation += 1
+            service.process = process
+            service.state = STARTING
+            service.started_at = time.monotonic()
+            service.ready_at = None
+            service.time_to_ready = None
+            service.restart_at = None
+        process.start()
+        logger.info(f"Started {spec.name} (PID: {process.pid})")
+
+        if spec.ready_url:
+            threading.Thread(
+                target=self._probe,
+                args=(service, service.generation, probe_url(spec.ready_url)),
+                name=f"probe-{spec.name}",
+                daemon=True,
+            ).start()
+        else:
+            self._mark_ready(service, service.generation)
+
+    def _probe(self, service: _Service, generation: int, url: str) -> None:
+        """Probe the server URL until it answers or the process exits; kill it if the timeout passes"""
+        delay = PROBE_DELAY_INITIAL
+        deadline = service.started_at + self.ready_timeout
+        transport = httpx.HTTPTransport(uds=service.spec.ready_uds) if service.spec.ready_uds else None
+        with httpx.Client(timeout=1.0, transport=transport) as client:
+            while not self._stopping and service.generation == generation:
+                process = service.process
+                if process is None or process.exitcode is not None:
+                    return
+                try:
+                    # /sse is a never-ending stream: the status line is enough
+                    with client.stream("GET", url) as response:
+                        if is_ready_response(url, response.status_code):
+                            self._mark_ready(service, generation)
+                            return
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() >= deadline:
+                    logger.error(
+                        f"{service.spec.name} did not become ready within {self.ready_timeout:.0f}s; "
+                        f"killing it (PID: {process.pid})"
+                    )
+                    # The exit is picked up through the process sentinel and goes through
+                    # the usual backoff and crash-loop handling
+                    process.kill()
+                    return
+                time.sleep(delay)
+                delay = min(delay * 1.5, PROBE_DELAY_MAX)
+
+    def _mark_ready(self, service: _Service, generation: int) -> None:
+        with self._lock:
+            if service.generation != generation or service.state != STARTING:
+                return
+            service.state = READY
+            service.ready_at = time.monotonic()
+            service.time_to_ready = service.ready_at - service.started_at
+        logger.info(f"{service.spec.name} ready in {service.time_to_ready * 1000:.0f} ms")
+        self.wakeup()
+
+    def _handle_exit(self, service: _Service) -> None:
+        process = service.process
+        process.join()
+        now = time.monotonic()
+        uptime = now - service.started_at
+        with self._lock:
+            service.last_exit_code = process.exitcode
+            if uptime >= self.stable_after:
+                service.consecutive_failures = 0
+            service.consecutive_failures += 1
+            service.crashes.append(now)
+            while service.crashes and now - service.crashes[0] > self.crash_loop_window:
+                service.crashes.popleft()
+
+            if len(service.crashes) >= self.crash_loop_restarts:
+                service.state = CRASH_LOOP
+                service.restart_at = None
+            else:
+                delay = min(self.backoff_initial * 2 ** (service.consecutive_failures - 1), self.backoff_max)
+                service.state = BACKOFF
+                service.restart_at = now + delay
+
+        if service.state == CRASH_LOOP:
+            logger.error(
+                f"{service.spec.name} crashed {len(service.crashes)} times in {self.crash_loop_window:.0f}s "
+                f"(last exit code {process.exitcode}); not restarting"
+            )
+        else:
+            logger.warning(
+                f"{service.spec.name} exited with code {process.exitcode} after {uptime:.1f}s; "
+                f"restarting in {(service.restart_at - now) * 1000:.0f} ms"
+            )
+
+    def start(self) -> None:
+        """Start all registered services"""
+        self._stopping = False
+        for service in self._services.values():
+            self._spawn(service)
+
+    def run(self, on_ready: Optional[Callable[[Dict[str, Dict[str, Any]]], None]] = None) -> None:
+        """
+        Supervise until request_stop() is called or every service is in a crash loop
+
+        Args:
+            on_ready: Called once with status() when all services first become ready
+        """
+        while not self._stopping:
+            now = time.monotonic()
+            sentinels = {}
+            next_restart = None
+            for service in self._services.values():
+                if service.state in (STARTING, READY) and service.process is not None:
+                    sentinels[service.process.sentinel] = service
+                elif service.state == BACKOFF:
+                    if service.restart_at <= now:
+                        service.restarts += 1
+                        self._spawn(service)
+                        sentinels[service.process.sentinel] = service
+                    elif next_restart is None or service.restart_at < next_restart:
+                        next_restart = service.restart_at
+
+            if not sentinels and next_restart is None:
+                logger.error("No services left to supervise")
+                return
+
+            if on_ready and not self._announced and all(s.state == READY for s in self._services.values()):
+                self._announced = True
+                on_ready(self.status())
+
+            timeout = None if next_restart is None else max(0.0, next_restart - time.monotonic())
+            for ready in wait([*sentinels, self._wakeup_read], timeout):
+                if ready == self._wakeup_read:
+                    os.read(self._wakeup_read, 4096)
+                else:
+                    self._handle_exit(sentinels[ready])
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Terminate all children, killing those that do not exit within timeout"""
+        self._stopping = True
+        processes = [s.process for s in self._services.values() if s.process is not None]
+        for process in processes:
+            if process.is_alive():
+                logger.info(f"Terminating {process.name} (PID: {process.pid})...")
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"{process.name} (PID: {process.pid}) did not terminate gracefully, killing...")
+                process.kill()
+                process.join()
+        for service in self._services.values():
+            service.state = STOPPED
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the state, PID, restarts and time-to-ready of every service"""
+        with self._lock:
+            return {
+                name: {
+                    "state": service.state,
+                    "pid": service.process.pid if service.process is not None else None,
+                    "restarts": service.restarts,
+                    "last_exit_code": service.last_exit_code,
+                    "time_to_ready_seconds": service.time_to_ready,
+                    "url": service.spec.ready_url,
+                    "uds": service.spec.ready_uds,
+                }
+                for name, service in self._services.items()
+            }
+
+    @property
+    def processes(self) -> List[multiprocessing.Process]:
+        """Current process of every service"""
+        return [s.process for s in self._services.values() if s.process is not None]
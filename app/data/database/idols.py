@@ -0,0 +1,315 @@
+"""
+K-Pop idol data store.
+Records are loaded once from a JSON file into compact tuples and indexed for
+lookups by exact name, romanised name ("jimin"), Hangul initial consonants
+(choseong, "ㅈㅁ") and, when nothing matches, fuzzy suggestions from a trigram
+index over jamo-decomposed and romanised names, re-ranked by edit distance.
+"""
+import json
+import os
+import re
+import sys
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "idols.json")
+
+HANGUL_FIRST = 0xAC00
+HANGUL_LAST = 0xD7A3
+INITIALS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+MEDIALS = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+FINALS = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+          "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+INITIAL_SET = frozenset(INITIALS)
+
+# Revised Romanization, syllable by syllable (sound changes between syllables are ignored)
+RR_INITIALS = ("g", "kk", "n", "d", "tt", "r", "m", "b", "pp", "s", "ss", "", "j", "jj", "ch", "k", "t", "p", "h")
+RR_MEDIALS = ("a", "ae", "ya", "yae", "eo", "e", "yeo", "ye", "o", "wa", "wae", "oe", "yo", "u", "wo", "we",
+              "wi", "yu", "eu", "ui", "i")
+RR_FINALS = ("", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l", "p", "l", "m", "p", "p", "t",
+             "t", "ng", "t", "t", "k", "t", "p", "t")
+
+# Fuzzy suggestions: the keys sharing the most trigrams with the query are re-ranked by
+# edit distance; FUZZY_MIN_SIMILARITY is the smallest trigram (Dice) similarity kept
+FUZZY_CANDIDATES = 16
+FUZZY_MIN_SIMILARITY = 0.3
+
+# str.translate tables from Hangul syllables to romanisation, jamo and initial consonant
+ROMANIZATION_TABLE: Dict[int, str] = {}
+JAMO_TABLE: Dict[int, str] = {}
+CHOSEONG_TABLE: Dict[int, str] = {}
+for _code in range(HANGUL_LAST - HANGUL_FIRST + 1):
+    _initial, _medial, _final = _code // 588, (_code % 588) // 28, _code % 28
+    ROMANIZATION_TABLE[HANGUL_FIRST + _code] = RR_INITIALS[_initial] + RR_MEDIALS[_medial] + RR_FINALS[_final]
+    JAMO_TABLE[HANGUL_FIRST + _code] = INITIALS[_initial] + MEDIALS[_medial] + FINALS[_final]
+    CHOSEONG_TABLE[HANGUL_FIRST + _code] = INITIALS[_initial]
+
+HANGUL_SYLLABLE = re.compile("[\uac00-\ud7a3]")
+NOT_ROMANIZED = re.compile("[^a-z0-9]")
+NOT_CHOSEONG = re.compile(f"[^{INITIALS}]")
+
+# Index values: one record id, or a tuple of ids for names shared by several idols
+RecordIds = Union[int, Tuple[int, ...]]
+
+
+def has_hangul(text: str) -> bool:
+    return HANGUL_SYLLABLE.search(text) is not None
+
+
+def normalize_name(text: str) -> str:
+    """NFC, case-folded, without whitespace"""
+    return "".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def romanize(text: str) -> str:
+    """Revised Romanization of the Hangul syllables in text (other characters are kept)"""
+    return text.translate(ROMANIZATION_TABLE)
+
+
+def romanized_key(text: str) -> str:
+    """Lower-case ASCII letters and digits of the romanised text: "Ji-min", "JIMIN" and "지민" give "jimin" """
+    return NOT_ROMANIZED.sub("", romanize(normalize_name(text)))
+
+
+def choseong(text: str) -> str:
+    """Initial consonants of the Hangul syllables in text ("지민" -> "ㅈㅁ")"""
+    return NOT_CHOSEONG.sub("", normalize_name(text).translate(CHOSEONG_TABLE))
+
+
+def is_choseong(text: str) -> bool:
+    text = normalize_name(text)
+    return bool(text) and all(char in INITIAL_SET for char in text)
+
+
+def decompose(text: str) -> str:
+    """Hangul syllables split into compatibility jamo ("지민" -> "ㅈㅣㅁㅣㄴ")"""
+    return text.translate(JAMO_TABLE)
+
+
+def fuzzy_key(text: str) -> str:
+    """Key compared by fuzzy search: jamo for Hangul names, romanised key for the others"""
+    name = normalize_name(text)
+    return decompose(name) if has_hangul(name) else romanized_key(name)
+
+
+def trigrams(key: str) -> List[str]:
+    padded = f"^{key}$"
+    return list({padded[i:i + 3] for i in range(max(1, len(padded) - 2))})
+
+
+def edit_distance(left: str, right: str) -> int:
+    """Levenshtein distance"""
+    # A typo leaves most of a name intact: only the differing middle goes through the table
+    start = 0
+    while start < len(left) and start < len(right) and left[start] == right[start]:
+        start += 1
+    end = 0
+    while end < len(left) - start and end < len(right) - start and left[-1 - end] == right[-1 - end]:
+        end += 1
+    left, right = left[start:len(left) - end], right[start:len(right) - end]
+    if len(left) < len(right):
+        left, right = right, left
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, 1):
+        current = [i]
+        for j, right_char in enumerate(right, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (left_char != right_char)))
+        previous = current
+    return previous[-1]
+
+
+class IdolRecord(NamedTuple):
+    """One idol"""
+    name: str
+    full_name: str
+    full_name_romanized: str
+    group: str
+    positions: Tuple[str, ...]
+    birth_date: str
+    agency: str
+    debut_date: str
+    blood_type: str
+    instagram: str
+    aliases: Tuple[str, ...]
+
+
+class IdolMatch(NamedTuple):
+    """Result of a lookup: how the query matched ("exact", "romanized" or "choseong") and the idols"""
+    kind: str
+    records: Tuple[IdolRecord, ...]
+
+
+class IdolStore:
+    """Indexed, read-only collection of idols"""
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        """
+        Build the store and its indexes
+
+        Args:
+            items: Idol dictionaries (the JSON data file format)
+        """
+        self.records: List[IdolRecord] = []
+        # Repeated values (agencies, groups, positions, dates) are stored once
+        shared: Dict[Any, Any] = {}
+
+        def intern(value):
+            return shared.setdefault(value, value)
+
+        for item in items:
+            self.records.append(IdolRecord(
+                name=item["name"],
+                full_name=item.get("full_name", ""),
+                full_name_romanized=item.get("full_name_romanized", ""),
+                group=intern(item.get("group", "")),
+                positions=intern(tuple(intern(position) for position in item.get("position", ()))),
+                birth_date=intern(item.get("birth_date", "")),
+                agency=intern(item.get("agency", "")),
+                debut_date=intern(item.get("debut_date", "")),
+                blood_type=intern(item.get("blood_type", "")),
+                instagram=item.get("instagram", ""),
+                aliases=tuple(item.get("aliases", ())),
+            ))
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "IdolStore":
+        """
+        Load a store from a JSON file (a list of idol objects)
+
+        Args:
+            path: The data file (defaults to the bundled idols.json)
+        """
+        with open(path or DEFAULT_DATA_PATH, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _build_indexes(self) -> None:
+        exact: Dict[str, List[int]] = defaultdict(list)
+        romanized: Dict[str, List[int]] = defaultdict(list)
+        initials: Dict[str, List[int]] = defaultdict(list)
+        fuzzy: Dict[str, List[int]] = defaultdict(list)
+
+        def add(index: Dict[str, List[int]], key: str, record_id: int) -> None:
+            if key and record_id not in index[key]:
+                index[key].append(record_id)
+
+        for record_id, record in enumerate(self.records):
+            names = [record.name, record.full_name]
+            latin_names = [*names, *record.aliases, record.full_name_romanized]
+            for name in names:
+                add(exact, normalize_name(name), record_id)
+                add(initials, choseong(name), record_id)
+                add(fuzzy, fuzzy_key(name), record_id)
+            for name in latin_names:
+                key = romanized_key(name)
+                add(romanized, key, record_id)
+                add(fuzzy, key, record_id)
+
+        self._exact = self._freeze(exact)
+        self._romanized = self._freeze(romanized)
+        self._choseong = self._freeze(initials)
+
+        # Fuzzy index: key strings, their records, trigram counts, and the key ids of each
+        # trigram as one array (CSR layout: trigram i owns postings[offsets[i]:offsets[i + 1]])
+        self._fuzzy_keys: List[str] = list(fuzzy)
+        self._fuzzy_records: List[RecordIds] = [self._compact(fuzzy[key]) for key in self._fuzzy_keys]
+        gram_counts = array("H")
+        gram_postings: Dict[str, array] = {}
+        for key_id, key in enumerate(self._fuzzy_keys):
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                posting = gram_postings.get(gram)
+                if posting is None:
+                    posting = gram_postings[gram] = array("I")
+                posting.append(key_id)
+        self._gram_ids: Dict[str, int] = {gram: gram_id for gram_id, gram in enumerate(gram_postings)}
+        self._gram_counts = np.frombuffer(gram_counts, dtype=np.uint16)
+        self._offsets = np.zeros(len(gram_postings) + 1, dtype=np.int64)
+        np.cumsum([len(posting) for posting in gram_postings.values()], out=self._offsets[1:])
+        self._postings = np.concatenate(
+            [np.frombuffer(posting, dtype=np.uint32) for posting in gram_postings.values()]
+        ) if gram_postings else np.zeros(0, dtype=np.uint32)
+
+    @staticmethod
+    def _compact(ids: List[int]) -> RecordIds:
+        return ids[0] if len(ids) == 1 else tuple(ids)
+
+    @classmethod
+    def _freeze(cls, index: Dict[str, List[int]]) -> Dict[str, RecordIds]:
+        return {sys.intern(key): cls._compact(ids) for key, ids in index.items()}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _records(self, ids: RecordIds) -> Tuple[IdolRecord, ...]:
+        if isinstance(ids, int):
+            return (self.records[ids],)
+        return tuple(self.records[record_id] for record_id in ids)
+
+    def _match(self, kind: str, ids: Optional[RecordIds]) -> Optional[IdolMatch]:
+        if ids is None:
+            return None
+        return IdolMatch(kind, self._records(ids))
+
+    def lookup(self, query: str) -> Optional[IdolMatch]:
+        """
+        Find idols by exact name, romanised name or choseong, in that order
+
+        Args:
+            query: Stage name, full name, romanisation ("Jimin") or initial consonants ("ㅈㅁ")
+
+        Returns:
+            The matching idols, or None (see suggest for close names)
+        """
+        if is_choseong(query):
+            return self._match("choseong", self._choseong.get(normalize_name(query)))
+        return (self._match("exact", self._exact.get(normalize_name(query)))
+                or self._match("romanized", self._romanized.get(romanized_key(query))))
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        """
+        Names close to the query (typos, partial names, other romanisations)
+
+        Args:
+            query: The name that was not found
+            limit: Maximum number of suggestions
+
+        Returns:
+            Stage names, closest first
+        """
+        key = fuzzy_key(query)
+        grams = trigrams(key) if key else []
+        gram_ids = [gram_id for gram_id in map(self._gram_ids.get, grams) if gram_id is not None]
+        if not gram_ids:
+            return []
+        offsets = self._offsets
+        key_ids, shared = np.unique(
+            np.concatenate([self._postings[offsets[gram_id]:offsets[gram_id + 1]] for gram_id in gram_ids]),
+            return_counts=True,
+        )
+        similarity = 2 * shared / (len(grams) + self._gram_counts[key_ids])
+        if len(similarity) > FUZZY_CANDIDATES:
+            best = np.argpartition(similarity, -FUZZY_CANDIDATES)[-FUZZY_CANDIDATES:]
+            key_ids, similarity = key_ids[best], similarity[best]
+
+        scored = []
+        for key_id, score in zip(key_ids.tolist(), similarity.tolist()):
+            candidate = self._fuzzy_keys[key_id]
+            # Partial names ("지" for "지민") are kept like the close spellings
+            if score >= FUZZY_MIN_SIMILARITY or candidate.startswith(key):
+                scored.append((edit_distance(key, candidate), -score, key_id))
+        scored.sort()
+        names: List[str] = []
+        for _, _, key_id in scored:
+            for record in self._records(self._fuzzy_records[key_id]):
+                name = record.name
+                if name not in names:
+                    names.append(name)
+                    if len(names) == limit:
+                        return names
+        return names
@@ -0,0 +1,180 @@
+"""
+Async client of the weather provider.
+Every call shares one pool of keep-alive connections. Concurrent requests for
+the same city are merged into a single provider request, results stay fresh
+for a configurable window, and provider requests are limited in number and
+duration.
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+from pydantic import BaseModel, ConfigDict
+
+from app.core.exceptions import ClientError
+from app.core.logging import LogManager
+from app.core.result_cache import ResultCache, normalize_value
+
+log_manager = LogManager()
+logger = log_manager.get_logger("WEATHER CLIENT")
+
+STUB_BASE_URL = "http://weather-stub"
+
+
+class WeatherReport(BaseModel):
+    """Current weather of a city"""
+    model_config = ConfigDict(frozen=True)
+
+    city: str
+    country: Optional[str]
+    temperature: float
+    condition: str
+    humidity: float
+    wind_speed: float
+    timestamp: str
+
+
+class WeatherClient:
+    """
+    Client of a provider answering GET /weather?city=...&country=... with a
+    JSON WeatherReport. Without a base URL the local stub provider is served
+    in-process.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 fresh_for: float = 300.0, timeout: float = 5.0, max_concurrency: int = 50,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, max_entries: int = 1024, cache: bool = True,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the client
+
+        Args:
+            base_url: The provider URL (the in-process stub if empty)
+            api_key: Sent to the provider as the "key" query parameter
+            fresh_for: Seconds a city's report is served from the cache
+            timeout: Seconds a provider request may take, waiting for a free slot included
+            max_concurrency: Maximum provider requests in flight
+            max_connections: Maximum connections of the pool
+            max_keepalive_connections: Maximum idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept open
+            max_entries: Maximum cities in the cache
+            cache: Cache and merge requests per city (every call asks the provider otherwise)
+            transport: Custom httpx transport (e.g. httpx.ASGITransport of a test provider)
+        """
+        if not base_url and transport is None:
+            from app.data.weather.stub import create_stub_app
+
+            transport = httpx.ASGITransport(app=create_stub_app())
+        self.base_url = base_url or STUB_BASE_URL
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.transport = transport
+
+        # Reports are keyed by city and country, ignoring case and spacing
+        self.cache: Optional[ResultCache] = None
+        if cache:
+            self.cache = ResultCache("weather", ttl=fresh_for, max_entries=max_entries, case_sensitive=False)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client (created on first use, in the running event loop)"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout),
+                transport=self.transport,
+            )
+        return self._http_client
+
+    async def get(self, city: str, country: Optional[str] = None) -> WeatherReport:
+        """
+        Current weather of a city, from the cache while fresh
+
+        Args:
+            city: The city name
+            country: The country name (optional)
+
+        Returns:
+            The weather report
+
+        Raises:
+            ClientError: The provider failed or did not answer in time
+        """
+        if self.cache is None:
+            return await self._fetch(city, country)
+        report = await self.cache.get_or_compute(
+            {"city": city, "country": country}, lambda: self._fetch(city, country)
+        )
+        # The cached report may carry the spelling of the caller that fetched it ("Seoul" for "seoul")
+        spelling = {field: value for field, value in (("city", city), ("country", country))
+                    if value and getattr(report, field) != value
+                    and normalize_value(getattr(report, field), False) == normalize_value(value, False)}
+        return report.model_copy(update=spelling) if spelling else report
+
+    async def _fetch(self, city: str, country: Optional[str]) -> WeatherReport:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            return await asyncio.wait_for(self._request(city, country), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ClientError(f"Weather provider did not answer within {self.timeout}s")
+
+    async def _request(self, city: str, country: Optional[str]) -> WeatherReport:
+        params = {"city": city}
+        if country:
+            params["country"] = country
+        if self.api_key:
+            params["key"] = self.api_key
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                response = await self.http_client.get("/weather", params=params)
+                response.raise_for_status()
+                return self.parse(response.json())
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                self.errors += 1
+                logger.warning(f"Weather provider request for {city} failed: {e!r}")
+                raise ClientError(f"Weather provider request failed: {e}") from e
+
+    @staticmethod
+    def parse(data: Dict[str, Any]) -> WeatherReport:
+        """Provider JSON to WeatherReport"""
+        return WeatherReport(
+            city=data["city"],
+            country=data.get("country"),
+            temperature=data["temperature"],
+            condition=data["condition"],
+            humidity=data["humidity"],
+            wind_speed=data["wind_speed"],
+            timestamp=data["timestamp"],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns provider request counters and cache statistics"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
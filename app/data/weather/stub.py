@@ -0,0 +1,64 @@
+"""
+Local stand-in for the weather provider.
+Serves GET /weather?city=...&country=... with sample data in the provider's
+JSON format, optionally after an artificial latency. Used by the weather
+client when no provider URL is configured, and by the benchmark.
+
+Usage:
+    python -m app.data.weather.stub [--port 8010] [--latency 0.05]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def create_stub_app(latency: float = 0.0) -> Starlette:
+    """
+    Build the stub provider
+
+    Args:
+        latency: Seconds each response is delayed, like a remote provider
+
+    Returns:
+        The ASGI app; app.state.requests counts the requests served
+    """
+    async def weather(request: Request) -> JSONResponse:
+        request.app.state.requests += 1
+        city = request.query_params.get("city")
+        if not city:
+            return JSONResponse({"error": "city is required"}, status_code=400)
+        if latency:
+            await asyncio.sleep(latency)
+        return JSONResponse({
+            "city": city,
+            "country": request.query_params.get("country"),
+            "temperature": 22,
+            "condition": "맑음",
+            "humidity": 65,
+            "wind_speed": 10,
+            "timestamp": datetime.now().replace(microsecond=0).isoformat(),
+        })
+
+    app = Starlette(routes=[Route("/weather", weather)])
+    app.state.requests = 0
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind")
+    parser.add_argument("--port", type=int, default=8010, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each response is delayed")
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,23 @@
 """
 Main entry point for MCP Project.
-Runs all available servers concurrently.
+Runs all available servers concurrently under the process supervisor, and
+serves their metrics combined on one Prometheus endpoint.
 """
 import os
 import sys
-import time
 import signal
-import multiprocessing
-import subprocess
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+import httpx
 from app.core.config import settings
 from app.core.logging import LogManager
+from app.core.supervisor import READY, ProcessSupervisor, ServiceSpec, probe_url
+from app.servers.mcp.sse import tool_metrics
+from app.servers.mcp.sse.tool_metrics import MetricFamily
+from app.servers.mcp.sse.workers import worker_socket_path
 from app.servers.mcp.tools.github import run_github_server_wrapper
 from app.servers.mcp.tools.social import run_social_server
 
@@ -22,120 +30,139 @@ logger = log_manager.get_logger("STD TOOLS")
 # Configure logging
 log = logger.getChild("main")
 
-# Global flag to track if servers should be running
-running = True
-# Global storage for processes that aren't managed by multiprocessing
-subprocess_processes = []
-
-def sigint_handler(signum, frame):
-    """Handle CTRL+C signal to gracefully shut down"""
-    global running
-    log.info("Received shutdown signal, stopping servers...")
-    running = False
-
-def display_startup_message(processes, github_process=None):
-     # Check if processes are alive
-    alive_processes = [p for p in processes if p.is_alive()]
-    if len(alive_processes) < len(processes):
-        log.error("Some servers failed to start. Check logs for details.")
-        for p in processes:
-            if not p.is_alive():
-                log.error(f"{p.name} failed to start.")
-                
+
+def display_startup_message(status):
     """Display a startup message with server information"""
     print("\n" + "=" * 60)
     print("MCP SERVERS RUNNING".center(60))
     print("=" * 60)
     print(f"Social Server: http://{settings.IP_HOST}:{settings.SOCIAL_PORT}")
     print(f"Github Server:  http://{settings.IP_HOST}:{settings.GITHUB_PORT}")
-    
+    if int(settings.METRICS_PORT):
+        print(f"Metrics:        http://{settings.IP_HOST}:{settings.METRICS_PORT}{settings.METRICS_PATH}")
+
     print("-" * 60)
     print("Running Processes:")
-    for i, p in enumerate(processes, 1):
-        print(f"  {i}. {p.name} (PID: {p.pid})")
-    
-    # Add GitHub process if it exists
-    if github_process and github_process.pid:
-        print(f"  {len(processes)+1}. Github Server (PID: {github_process.pid})")
-        
+    for i, (name, info) in enumerate(status.items(), 1):
+        ready = info["time_to_ready_seconds"]
+        ready_text = f"ready in {ready * 1000:.0f} ms" if ready is not None else info["state"]
+        print(f"  {i}. {name} (PID: {info['pid']}, {ready_text})")
+
     print("-" * 60)
     print("Press Ctrl+C to stop all servers")
     print("=" * 60)
 
+def create_supervisor() -> ProcessSupervisor:
+    """Create the supervisor with every server registered"""
+    supervisor = ProcessSupervisor(
+        backoff_initial=settings.SUPERVISOR_BACKOFF_INITIAL,
+        backoff_max=settings.SUPERVISOR_BACKOFF_MAX,
+        crash_loop_restarts=settings.SUPERVISOR_CRASH_LOOP_RESTARTS,
+        crash_loop_window=settings.SUPERVISOR_CRASH_LOOP_WINDOW,
+        ready_timeout=settings.SUPERVISOR_READY_TIMEOUT,
+    )
+    social_url = settings.server_config["social"]["url"]
+    if settings.SOCIAL_WORKERS > 1:
+        # Each worker is supervised (and restarted) on its own
+        for index in range(settings.SOCIAL_WORKERS):
+            supervisor.add(ServiceSpec(
+                f"Social Server #{index + 1}",
+                partial(run_social_server, index),
+                social_url,
+                ready_uds=worker_socket_path("Social", int(settings.SOCIAL_PORT), index),
+            ))
+    else:
+        supervisor.add(ServiceSpec("Social Server", run_social_server, social_url))
+    supervisor.add(ServiceSpec("Github Server", run_github_server_wrapper, settings.server_config["github"]["url"]))
+    return supervisor
+
+def scrape_metrics(supervisor: ProcessSupervisor) -> str:
+    """
+    Metrics of every ready server (each worker scraped through its own socket), labelled
+    with the service name as "worker", followed by the state of the services.
+    Workers restart independently, so their counters are kept apart: add them up in
+    PromQL, e.g. sum without (worker) (rate(mcp_tool_calls_total[5m]))
+    """
+    scrapes = []
+    up = MetricFamily("mcp_service_up", "gauge", "Whether the service answered the metrics scrape")
+    restarts = MetricFamily("mcp_service_restarts_total", "counter", "Restarts of the service")
+    for name, info in supervisor.status().items():
+        restarts.add(info["restarts"], service=name)
+        answered = 0
+        if info["state"] == READY and info["url"]:
+            url = urlunsplit(urlsplit(probe_url(info["url"]))._replace(path=settings.METRICS_PATH, query=""))
+            transport = httpx.HTTPTransport(uds=info["uds"]) if info["uds"] else None
+            try:
+                with httpx.Client(timeout=settings.METRICS_SCRAPE_TIMEOUT, transport=transport) as client:
+                    response = client.get(url)
+                if response.status_code == 200:
+                    scrapes.append(tool_metrics.relabel(response.text, worker=name))
+                    answered = 1
+            except httpx.HTTPError as e:
+                log.debug(f"Metrics scrape of {name} failed: {e!r}")
+        up.add(answered, service=name)
+    return tool_metrics.combine(scrapes) + tool_metrics.render([up, restarts])
+
+def start_metrics_server(supervisor: ProcessSupervisor) -> Optional[ThreadingHTTPServer]:
+    """Serve the combined metrics on settings.METRICS_PORT (in a background thread)"""
+    if not int(settings.METRICS_PORT):
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if urlsplit(self.path).path != settings.METRICS_PATH:
+                self.send_error(404)
+                return
+            body = scrape_metrics(supervisor).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", tool_metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((settings.IP_HOST, int(settings.METRICS_PORT)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
 def run_all_servers():
     """Run all available MCP servers concurrently"""
-    global running, subprocess_processes
-    
-    # Set up signal handler for graceful shutdown
-    signal.signal(signal.SIGINT, sigint_handler)
-    signal.signal(signal.SIGTERM, sigint_handler)
-    
     # Check environment
     if not settings.validate():
         log.error("Environment validation failed. Please check your .env file.")
         return 1
-    
-    # Start all servers in separate processes
-    processes = []
-    
-    # Start Social Server
-    weather_process = multiprocessing.Process(target=run_social_server, name="Socail Server")
-    weather_process.daemon = True
-    weather_process.start()
-    processes.append(weather_process)
-    
-    # Start Github Server (using subprocess instead of multiprocessing)
-    github_process = multiprocessing.Process(target=run_github_server_wrapper, name="Github Server")
-    github_process.daemon = True
-    github_process.start()
-    processes.append(github_process)
-    
-    # Wait a moment for servers to start
-    time.sleep(2)
-    # Display startup message
-    display_startup_message(processes)
-    
-    # Keep the main process running until interrupted
+
+    supervisor = create_supervisor()
+
+    def shutdown_handler(signum, frame):
+        """Handle CTRL+C / SIGTERM to gracefully shut down"""
+        log.info("Received shutdown signal, stopping servers...")
+        supervisor.request_stop()
+
+    # Set up signal handler for graceful shutdown
+    signal.signal(signal.SIGINT, shutdown_handler)
+    signal.signal(signal.SIGTERM, shutdown_handler)
+
+    metrics_server = None
     try:
-        while running and any(p.is_alive() for p in processes):
-            time.sleep(1)
+        supervisor.start()
+        metrics_server = start_metrics_server(supervisor)
+        # Returns on shutdown, or when every server is in a crash loop
+        supervisor.run(on_ready=display_startup_message)
     except KeyboardInterrupt:
         log.info("Keyboard interrupt received, shutting down...")
     finally:
-        # Clean up multiprocessing processes
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
         log.info("Stopping all server processes...")
-        for p in processes:
-            if p.is_alive():
-                log.info(f"Terminating {p.name} (PID: {p.pid})...")
-                p.terminate()
-        
-        # Clean up subprocess processes
-        for p in subprocess_processes:
-            if p.poll() is None:  # If process is still running
-                log.info(f"Terminating subprocess (PID: {p.pid})...")
-                p.terminate()
-        
-        # Wait for processes to terminate
-        for p in processes:
-            p.join(timeout=5)
-        
-        # Wait for subprocess processes to terminate
-        for p in subprocess_processes:
-            try:
-                p.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                log.warning(f"Subprocess (PID: {p.pid}) did not terminate gracefully, killing...")
-                p.kill()
-        
-        # Check if any multiprocessing process is still alive
-        for p in processes:
-            if p.is_alive():
-                log.warning(f"{p.name} (PID: {p.pid}) did not terminate gracefully, killing...")
-                p.kill()
-        
+        supervisor.stop()
         log.info("All servers stopped.")
-    
+
     return 0
 
 if __name__ == "__main__":
-    sys.exit(run_all_servers())
\ No newline at end of file
+    sys.exit(run_all_servers())
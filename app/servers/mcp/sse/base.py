@@ -1,18 +1,65 @@
 """
 Base server classes for MCP Project.
 """
-from typing import Optional
+import asyncio
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional
+import pydantic_core
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.utilities.context_injection import find_context_parameter
+from mcp.server.fastmcp.utilities.func_metadata import func_metadata
+from mcp.types import CallToolResult, TextContent
+from pydantic import BaseModel, Field
 from app.core import settings
-from app.core.exceptions import ServerError
+from app.core.exceptions import ConfigurationError, ServerError, ToolError
 from app.core.logging import LogManager
+from app.core.result_cache import ResultCache
+from app.servers.mcp.sse import tool_metrics
+from app.servers.mcp.sse.tool_cache import ToolResultCache
+from app.servers.mcp.sse.tool_metrics import MetricFamily, ToolMetrics
+from app.servers.mcp.sse.tool_runner import ToolRunner
 log_manager = LogManager()
 logger = log_manager.get_logger("BASE SSE TOOLS")
 
+# The "format" argument added to tools returning structured results
+TextFormat = Annotated[
+    Literal["json", "text"],
+    Field(description='"json" (default): the result as compact JSON; "text": the result rendered for reading'),
+]
+
+
+def structured_result(data: Any, text: Optional[str] = None) -> CallToolResult:
+    """
+    Tool result carrying data as structured content, with compact JSON (or the given
+    text) as its text content
+    
+    Args:
+        data: The result (pydantic models, lists, dicts, ...)
+        text: The text content (defaults to the data as compact JSON)
+        
+    Returns:
+        The tool result
+    """
+    structured = pydantic_core.to_jsonable_python(data)
+    if text is None:
+        text = json.dumps(structured, ensure_ascii=False, separators=(",", ":"))
+    if not isinstance(structured, dict):
+        # Structured content is an object: other values are wrapped, as FastMCP does
+        structured = {"result": structured}
+    return CallToolResult(content=[TextContent(type="text", text=text)], structuredContent=structured)
+
+
 class BaseMCPServer:
     """Base class for MCP servers"""
     
-    def __init__(self, name: str, port: Optional[int] = None, host: Optional[str] = None):
+    def __init__(self, name: str, port: Optional[int] = None, host: Optional[str] = None,
+                 stateless_http: Optional[bool] = None, json_response: Optional[bool] = None):
         """
         Initialize a base MCP server
         
@@ -20,6 +67,8 @@ class BaseMCPServer:
             name: The server name
             port: The port to use (optional)
             host: The host to bind to (optional)
+            stateless_http: Streamable HTTP without sessions (defaults to settings.MCP_STATELESS_HTTP)
+            json_response: Streamable HTTP answers with plain JSON (defaults to settings.MCP_JSON_RESPONSE)
         """
         self.name = name
         self.host = host or settings.IP_HOST
@@ -29,19 +78,358 @@ class BaseMCPServer:
         self.mcp.settings.host = self.host
         if self.port:
             self.mcp.settings.port = int(self.port)
+        self.mcp.settings.stateless_http = settings.MCP_STATELESS_HTTP if stateless_http is None else stateless_http
+        self.mcp.settings.json_response = settings.MCP_JSON_RESPONSE if json_response is None else json_response
         
         self.logger = logger.getChild(f"server.{name.lower()}")
+        self.tool_runners: Dict[str, ToolRunner] = {}
+        self.tool_caches: Dict[str, ResultCache] = {}
+        self._pools: Dict[str, Executor] = {}
+        # Calls, errors and latency of every tool registered through self.tool(), on GET /metrics
+        self.metrics = ToolMetrics()
+        self.mcp.custom_route(settings.METRICS_PATH, methods=["GET"])(self.metrics_endpoint)
+    
+    def tool(self, name: Optional[str] = None, executor: Optional[str] = None,
+             max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+             cache_ttl: Optional[float] = None,
+             cache_max_entries: Optional[int] = None, cache_max_bytes: Optional[int] = None,
+             cache_error_ttl: float = 0.0, cache_case_sensitive: bool = True,
+             cache_key: Optional[Callable[[Dict[str, Any]], Any]] = None, batch: bool = False,
+             text: Optional[Callable[[Any], str]] = None, **tool_kwargs):
+        """
+        Decorator registering a tool, like self.mcp.tool(). Async tools run in the event
+        loop and synchronous ones on the server's thread pool (or process pool), with an
+        optional concurrency cap, timeout and result cache. Calls are recorded in self.metrics.
+        
+        Args:
+            name: The tool name (defaults to the function name)
+            executor: "inline", "thread" or "process" (a module-level function for CPU-heavy
+                work); defaults to "inline" for async tools and "thread" for the others
+            max_concurrency: Maximum calls running at once (defaults to settings.TOOL_MAX_CONCURRENCY)
+            timeout: Seconds a call may take, queueing included (defaults to settings.TOOL_TIMEOUT)
+            cache_ttl: Seconds results are cached; None registers the tool without cache
+            cache_max_entries: Maximum cached results (defaults to settings.TOOL_CACHE_MAX_ENTRIES)
+            cache_max_bytes: Maximum total size of the cached results
+            cache_error_ttl: Seconds a NotFoundError result is cached (0 = not cached)
+            cache_case_sensitive: Whether string arguments differing only in case are different calls
+            cache_key: Builds the cache key from the call arguments
+            batch: Also register "<name>_batch", taking a list of argument sets (see _register_batch_tool)
+            text: Renders the result for clients calling with format="text"; the tool must return
+                a pydantic model, published as the tool's output schema (see _structured_tool)
+            **tool_kwargs: Passed on to FastMCP.tool (description, annotations, ...)
+        """
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            tool_name = name or fn.__name__
+            runner = ToolRunner(
+                tool_name, fn, executor=executor,
+                max_concurrency=max_concurrency or settings.TOOL_MAX_CONCURRENCY or None,
+                timeout=timeout or settings.TOOL_TIMEOUT or None,
+                pools=self._executor_pool,
+            )
+            if not self.tool_runners:
+                self._add_stats_route("/tools/stats", self.tool_stats)
+            self.tool_runners[tool_name] = runner
+            handler = runner.wrap()
+            
+            if cache_ttl is not None and settings.TOOL_CACHE_ENABLED:
+                # Cache hits are answered before taking a slot of the tool
+                cache = ToolResultCache(
+                    tool_name, cache_ttl,
+                    max_entries=cache_max_entries or settings.TOOL_CACHE_MAX_ENTRIES,
+                    max_bytes=cache_max_bytes, error_ttl=cache_error_ttl,
+                    case_sensitive=cache_case_sensitive, key_builder=cache_key,
+                )
+                self.register_cache(tool_name, cache)
+                handler = cache.wrap(handler)
+            
+            # Cache hits are recorded too; the calls of a batch count as calls of the tool
+            handler = self.metrics.wrap(tool_name, handler)
+            if text is not None:
+                self.mcp.tool(name=tool_name, **tool_kwargs)(self._structured_tool(tool_name, fn, handler, text))
+            else:
+                self.mcp.tool(name=tool_name, **tool_kwargs)(handler)
+            if batch:
+                self._register_batch_tool(tool_name, handler, tool_kwargs.get("description") or fn.__doc__)
+            return fn
+        
+        return decorator
+    
+    @staticmethod
+    def _structured_tool(tool_name: str, fn: Callable[..., Any], handler: Callable[..., Any],
+                         render: Callable[[Any], str]) -> Callable[..., Any]:
+        """
+        Tool function returning the result of handler as structured content, and as text
+        (compact JSON, or render(result) when called with format="text")
+        
+        Args:
+            tool_name: The tool name
+            fn: The tool function, annotated with the pydantic model it returns
+            handler: The tool function wrapped by its runner and cache
+            render: Renders the result as text
+            
+        Returns:
+            The function to register, taking the arguments of fn and "format"
+        """
+        output_type = typing.get_type_hints(fn).get("return")
+        if not (inspect.isclass(output_type) and issubclass(output_type, BaseModel)):
+            raise ConfigurationError(f"Tool '{tool_name}': text rendering needs a pydantic model return type")
+        signature = inspect.signature(handler)
+        if "format" in signature.parameters:
+            raise ConfigurationError(f"Tool '{tool_name}': the 'format' argument is reserved for the text rendering")
+        
+        async def structured_tool(*args, format: str = "json", **kwargs):
+            result = await handler(*args, **kwargs)
+            return structured_result(result, render(result) if format == "text" else None)
+        
+        structured_tool.__name__ = fn.__name__
+        structured_tool.__doc__ = fn.__doc__
+        structured_tool.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("format", inspect.Parameter.KEYWORD_ONLY, default="json", annotation=TextFormat),
+            ],
+            # Validated against (and published as) the output schema of the tool
+            return_annotation=Annotated[CallToolResult, output_type],
+        )
+        return structured_tool
+    
+    def _register_batch_tool(self, tool_name: str, handler: Callable[..., Any], description: Optional[str]) -> None:
+        """
+        Register "<tool_name>_batch": one call with a list of argument sets, run concurrently
+        through the tool's cache and limits, returning one result per item in order
+        
+        Args:
+            tool_name: The tool name
+            handler: The registered tool function
+            description: The tool description
+        """
+        if find_context_parameter(handler) is not None:
+            raise ConfigurationError(f"Tool '{tool_name}': batch calls cannot pass the MCP Context")
+        arg_model = func_metadata(handler).arg_model
+        
+        async def run_batch(items):
+            async def run_item(index: int, item) -> Dict[str, Any]:
+                try:
+                    return {"index": index, "ok": True, "result": await handler(**item.model_dump_one_level())}
+                except Exception as e:
+                    return {"index": index, "ok": False, "error": e.message if isinstance(e, ToolError) else str(e)}
+            
+            return structured_result(
+                list(await asyncio.gather(*[run_item(index, item) for index, item in enumerate(items)]))
+            )
+        
+        # The items are typed with the tool's own argument model, so they are validated one by one;
+        # the size limit is part of the schema and checked with them
+        run_batch.__annotations__ = {
+            "items": Annotated[List[arg_model], Field(max_length=settings.TOOL_BATCH_MAX_ITEMS)],
+            "return": Annotated[CallToolResult, List[Dict[str, Any]]],
+        }
+        self.mcp.tool(
+            name=f"{tool_name}_batch",
+            description=(
+                f"Batch variant of {tool_name}: calls it once per element of `items` (its arguments), "
+                f"concurrently, and returns one {{index, ok, result | error}} per element, in order.\n\n"
+                f"{description or ''}"
+            ).strip(),
+        )(self.metrics.wrap(f"{tool_name}_batch", run_batch))
+    
+    def _executor_pool(self, kind: str) -> Executor:
+        """The thread or process pool running synchronous tools (created on first use, replaced when broken)"""
+        pool = self._pools.get(kind)
+        if pool is not None and getattr(pool, "_broken", False):
+            # A worker died or its result could not be unpickled; the pool refuses new calls
+            self.logger.warning(f"{kind} pool of {self.name} is broken ({pool._broken}); replacing it")
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        if pool is None:
+            if kind == "process":
+                # Forking the threaded server process is unsafe; workers start from a clean interpreter
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                pool = ProcessPoolExecutor(max_workers=settings.TOOL_PROCESS_WORKERS,
+                                           mp_context=multiprocessing.get_context(method))
+            else:
+                pool = ThreadPoolExecutor(max_workers=settings.TOOL_THREAD_WORKERS,
+                                          thread_name_prefix=f"{self.name.lower()}-tool")
+            self._pools[kind] = pool
+        return pool
+    
+    def shutdown_executors(self) -> None:
+        """Stop the tool pools (calls still queued are cancelled)"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+    
+    def tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns calls, errors, timeouts, in-flight gauges, queue wait and run time of every tool"""
+        return {tool_name: runner.stats() for tool_name, runner in self.tool_runners.items()}
+    
+    def metrics_families(self) -> List[MetricFamily]:
+        """Tool call metrics, runner queue and timeout counters, and cache counters of the server"""
+        families = self.metrics.families(server=self.name)
+        waiting = MetricFamily("mcp_tool_waiting", "gauge", "Tool calls waiting for a concurrency slot")
+        timeouts = MetricFamily("mcp_tool_timeouts_total", "counter", "Tool calls that timed out")
+        for tool_name, runner in self.tool_runners.items():
+            waiting.add(runner.waiting, server=self.name, tool=tool_name)
+            timeouts.add(runner.timeouts, server=self.name, tool=tool_name)
+        families += [waiting, timeouts]
+        for counter in ("hits", "misses", "coalesced"):
+            family = MetricFamily(f"mcp_tool_cache_{counter}_total", "counter", f"Result cache {counter}")
+            for tool_name, cache in self.tool_caches.items():
+                family.add(getattr(cache, counter), server=self.name, tool=tool_name)
+            families.append(family)
+        return families
+    
+    async def metrics_endpoint(self, request):
+        """GET /metrics: the metrics in the Prometheus text format"""
+        from starlette.responses import Response
+        
+        return Response(tool_metrics.render(self.metrics_families()), media_type=tool_metrics.CONTENT_TYPE)
+    
+    def register_cache(self, tool_name: str, cache: ResultCache) -> None:
+        """
+        Report a cache serving a tool in cache_stats() and GET /cache/stats
+        
+        Args:
+            tool_name: The tool name
+            cache: The cache
+        """
+        if not self.tool_caches:
+            self._add_stats_route("/cache/stats", self.cache_stats)
+        self.tool_caches[tool_name] = cache
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the result cache statistics (hits, misses, hit rate, ...) of every cached tool"""
+        return {tool_name: cache.stats() for tool_name, cache in self.tool_caches.items()}
+    
+    def _add_stats_route(self, path: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        from starlette.responses import JSONResponse
+        
+        @self.mcp.custom_route(path, methods=["GET"])
+        async def stats_endpoint(request):
+            return JSONResponse(stats())
+    
+    def http_app(self, transport: str = "sse"):
+        """
+        ASGI app serving the given HTTP transport
+        
+        Args:
+            transport: "sse" (GET /sse + POST /messages/) or "streamable-http" (/mcp)
+        """
+        if transport == "sse":
+            return self.mcp.sse_app()
+        if transport == "streamable-http":
+            from app.servers.mcp.sse.streamable import BatchingMiddleware
+            
+            return BatchingMiddleware(self.mcp.streamable_http_app(), self.mcp.settings.streamable_http_path)
+        raise ConfigurationError(f"Unknown HTTP transport '{transport}', expected 'sse' or 'streamable-http'")
+    
+    def _uvicorn_config(self, app, **kwargs):
+        import uvicorn
+        
+        return uvicorn.Config(
+            app,
+            log_level=self.mcp.settings.log_level.lower(),
+            timeout_keep_alive=int(settings.MCP_KEEPALIVE_TIMEOUT),
+            **kwargs,
+        )
+    
+    async def run_http_async(self, transport: str = "sse") -> None:
+        """
+        Serve an HTTP transport with keep-alive connections
+        
+        Args:
+            transport: "sse" or "streamable-http"
+        """
+        import uvicorn
+        
+        mcp_settings = self.mcp.settings
+        server = uvicorn.Server(self._uvicorn_config(
+            self.http_app(transport), host=mcp_settings.host, port=mcp_settings.port
+        ))
+        await server.serve()
+    
+    async def run_worker_async(self, worker_index: int, workers: int, transport: str = "sse") -> None:
+        """
+        Serve an HTTP transport as one of several worker processes sharing the port
+        
+        Args:
+            worker_index: Index of this worker (0 .. workers - 1)
+            workers: Total number of workers
+            transport: "sse", or "streamable-http" in stateless mode
+        """
+        import anyio
+        import uvicorn
+        from app.servers.mcp.sse.workers import (SessionRouter, reuseport_socket, unix_listen_socket,
+                                                 worker_message_path, worker_socket_path)
+        
+        mcp_settings = self.mcp.settings
+        if transport == "streamable-http" and not mcp_settings.stateless_http:
+            # Streamable HTTP sessions cannot be routed to the worker that holds them
+            raise ConfigurationError("Streamable HTTP with several workers requires stateless mode "
+                                     "(MCP_STATELESS_HTTP=true)")
+        message_path = mcp_settings.message_path
+        socket_paths = [worker_socket_path(self.name, mcp_settings.port, index) for index in range(workers)]
+        
+        # SSE sessions of this worker post to /messages/<worker_index>/
+        mcp_settings.message_path = worker_message_path(message_path, worker_index)
+        app = SessionRouter(self.http_app(transport), message_path, worker_index, socket_paths)
+        sockets = [
+            reuseport_socket(mcp_settings.host, mcp_settings.port),
+            unix_listen_socket(socket_paths[worker_index]),
+        ]
+        server = uvicorn.Server(self._uvicorn_config(app))
+
+        async def exit_with_parent():
+            # An orphaned worker would keep taking connections on the shared port
+            parent = os.getppid()
+            while not server.should_exit:
+                if os.getppid() != parent:
+                    self.logger.warning(f"{self.name} worker {worker_index}: parent exited, stopping")
+                    server.should_exit = True
+                await anyio.sleep(1.0)
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(exit_with_parent)
+                await server.serve(sockets=sockets)
+                task_group.cancel_scope.cancel()
+        finally:
+            await app.aclose()
+            for sock in sockets:
+                sock.close()
+            try:
+                os.unlink(socket_paths[worker_index])
+            except FileNotFoundError:
+                pass
     
-    def run(self, transport: str = "sse") -> None:
+    def run(self, transport: str = "sse", workers: int = 1, worker_index: int = 0) -> None:
         """
         Run the MCP server
         
         Args:
-            transport: The transport type to use ("sse" or "stdio")
+            transport: The transport type to use ("sse", "streamable-http" or "stdio")
+            workers: Number of worker processes sharing the HTTP port; each
+                process runs one worker (see run_worker_async)
+            worker_index: Index of the worker run by this process
         """
         try:
-            self.logger.info(f"Starting {self.name} MCP Server on port {self.mcp.settings.port}...")
-            self.mcp.run(transport=transport)
+            if transport == "stdio":
+                # stdout carries the protocol
+                log_manager.redirect_console(sys.stderr)
+                self.mcp.run(transport="stdio")
+                return
+            
+            import anyio
+            
+            if workers > 1:
+                self.logger.info(f"Starting {self.name} MCP Server worker {worker_index + 1}/{workers} "
+                                 f"({transport}) on port {self.mcp.settings.port}...")
+                anyio.run(self.run_worker_async, worker_index, workers, transport)
+                return
+            self.logger.info(f"Starting {self.name} MCP Server ({transport}) on port {self.mcp.settings.port}...")
+            anyio.run(self.run_http_async, transport)
         except Exception as e:
             self.logger.error(f"Failed to start {self.name} server: {e}")
-            raise ServerError(f"Failed to start {self.name} server") from e
\ No newline at end of file
+            raise ServerError(f"Failed to start {self.name} server") from e
+        finally:
+            self.shutdown_executors()
\ No newline at end of file
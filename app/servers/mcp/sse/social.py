@@ -1,13 +1,76 @@
 """
 Social MCP Server implementation.
 Provides basic social operations, weather information, and Kpop idol details.
-Returns all data as formatted strings.
+Returns the data as structured content (JSON), rendered as formatted strings
+for clients calling with format="text".
 """
-from typing import Optional
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 from app.core.config import settings
-from app.core.exceptions import ToolError
+from app.core.exceptions import NotFoundError, ToolError
+from app.data.database.idols import IdolStore
+from app.data.weather.client import WeatherClient, WeatherReport
 from app.servers.mcp.sse.base import BaseMCPServer
 
+# Names proposed when an idol is not found
+MAX_SUGGESTIONS = 5
+
+
+class IdolProfile(BaseModel):
+    """아이돌 정보"""
+    name: str
+    full_name: str
+    full_name_romanized: str
+    group: str
+    positions: List[str]
+    birth_date: str
+    agency: str
+    debut_date: str
+    blood_type: str
+    instagram: str
+    aliases: List[str]
+
+
+class IdolInfo(BaseModel):
+    """get_kpop_idol_info 결과"""
+    matched_by: Literal["exact", "romanized", "choseong"] = Field(
+        description="검색 방식: 이름(exact), 로마자 표기(romanized) 또는 초성(choseong)"
+    )
+    idols: List[IdolProfile]
+
+
+def format_weather(report: WeatherReport) -> str:
+    """날씨 정보를 문자열로 형식화합니다 (format="text")"""
+    return (
+        f"도시: {report.city}\n"
+        f"국가: {report.country or '정보 없음'}\n"
+        f"온도: {report.temperature}°C\n"
+        f"상태: {report.condition}\n"
+        f"습도: {report.humidity}%\n"
+        f"풍속: {report.wind_speed} km/h\n"
+        f"측정 시간: {report.timestamp}"
+    )
+
+
+def format_idol(idol: IdolProfile) -> str:
+    """아이돌 정보를 문자열로 형식화합니다"""
+    full_name = f"{idol.full_name} ({idol.full_name_romanized})" if idol.full_name_romanized else idol.full_name
+    return (
+        f"이름: {full_name}\n"
+        f"그룹: {idol.group}\n"
+        f"포지션: {', '.join(idol.positions)}\n"
+        f"생년월일: {idol.birth_date}\n"
+        f"소속사: {idol.agency}\n"
+        f"데뷔일: {idol.debut_date}\n"
+        f"혈액형: {idol.blood_type}\n"
+        f"인스타그램: {idol.instagram}"
+    )
+
+
+def format_idol_info(info: IdolInfo) -> str:
+    """검색된 아이돌 정보를 문자열로 형식화합니다 (format="text")"""
+    return "\n\n".join(format_idol(idol) for idol in info.idols)
+
 class SocialServer(BaseMCPServer):
     """MCP server for social operations"""
     
@@ -16,143 +79,93 @@ class SocialServer(BaseMCPServer):
         # Utilisez super().__init__ pour appeler le constructeur de la classe parente
         # et passez le port en tant que paramètre
         super().__init__("Social", port=settings.SOCIAL_PORT)
+        # Loaded once and indexed; the tools only read it
+        self.idols = IdolStore.load(settings.IDOL_DATA_PATH or None)
+        # Weather reports are cached and coalesced per city by the client
+        self.weather = WeatherClient(
+            base_url=settings.WEATHER_API_URL or None,
+            api_key=settings.WEATHER_API_KEY or None,
+            fresh_for=settings.WEATHER_CACHE_TTL,
+            timeout=settings.WEATHER_TIMEOUT,
+            max_concurrency=settings.WEATHER_MAX_CONCURRENCY,
+            max_connections=settings.WEATHER_MAX_CONNECTIONS,
+            cache=settings.TOOL_CACHE_ENABLED,
+        )
+        if self.weather.cache is not None:
+            self.register_cache("get_weather", self.weather.cache)
         self._register_tools()
     
     def _register_tools(self) -> None:
         """Register all social tools with the MCP server"""
         
-        @self.mcp.tool()
-        def get_weather(city: str, country: Optional[str] = None) -> str:
+        @self.tool(batch=True, text=format_weather)
+        async def get_weather(city: str, country: Optional[str] = None) -> WeatherReport:
             """
             날씨 정보를 가져옵니다.
             특정 도시의 현재 날씨 상태, 온도, 습도 및 기타 관련 정보를 제공합니다.
             
-            사용 예시: get_weather("서울", "한국")은 서울의 날씨 정보를 문자열로 반환합니다.
+            사용 예시: get_weather("서울", "한국")은 서울의 날씨 정보를 반환합니다.
             
             Parameters:
                 city (str): 날씨 정보를 가져올 도시 이름
                 country (str, optional): 국가 이름 (선택 사항)
+                format (str, optional): "json"(기본값) 또는 형식화된 문자열을 받으려면 "text"
                 
             Returns:
-                str: 날씨 정보를 포함하는 형식화된 문자열
+                WeatherReport: 날씨 정보 (구조화된 JSON)
             """
             try:
                 self.logger.info(f"Getting weather for {city}, {country if country else 'N/A'}")
                 
-                # 여기에 실제 날씨 API 호출 코드가 들어갑니다
-                # 지금은 예시 데이터를 반환합니다
-                
-                weather_data = {
-                    "city": city,
-                    "country": country if country else "정보 없음",
-                    "temperature": 22,  # 섭씨
-                    "condition": "맑음",
-                    "humidity": 65,  # 퍼센트
-                    "wind_speed": 10,  # km/h
-                    "timestamp": "2025-04-26T14:30:00"
-                }
-                
-                # 데이터를 문자열로 형식화
-                weather_str = (
-                    f"도시: {weather_data['city']}\n"
-                    f"국가: {weather_data['country']}\n"
-                    f"온도: {weather_data['temperature']}°C\n"
-                    f"상태: {weather_data['condition']}\n"
-                    f"습도: {weather_data['humidity']}%\n"
-                    f"풍속: {weather_data['wind_speed']} km/h\n"
-                    f"측정 시간: {weather_data['timestamp']}"
-                )
-                
-                return weather_str
+                # 날씨 제공자에 비동기로 요청합니다 (같은 도시의 동시 요청은 하나로 합쳐지고 결과는 캐시됩니다)
+                # 문자열 형식화는 format="text"로 요청한 경우에만 수행됩니다
+                return await self.weather.get(city, country)
                 
             except Exception as e:
                 self.logger.error(f"Error fetching weather data: {str(e)}")
                 raise ToolError("weather", f"날씨 정보를 가져오는 중 오류가 발생했습니다: {str(e)}")
         
-        @self.mcp.tool()
-        def get_kpop_idol_info(idol_name: str) -> str:
+        @self.tool(cache_ttl=settings.IDOL_CACHE_TTL, cache_error_ttl=settings.IDOL_CACHE_TTL, batch=True,
+                   text=format_idol_info)
+        def get_kpop_idol_info(idol_name: str) -> IdolInfo:
             """
             K-Pop 아이돌에 대한 정보를 제공합니다.
             아이돌의 이름, 그룹, 데뷔일, 소속사 및 기타 관련 정보를 포함합니다.
             
-            사용 예시: get_kpop_idol_info("지민")은 BTS의 지민에 대한 정보를 문자열로 반환합니다.
+            사용 예시: get_kpop_idol_info("지민")은 BTS의 지민에 대한 정보를 반환합니다.
+            로마자 표기("Jimin")나 초성("ㅈㅁ")으로도 검색할 수 있습니다.
             
             Parameters:
-                idol_name (str): 정보를 검색할 아이돌의 이름
+                idol_name (str): 정보를 검색할 아이돌의 이름 (예명, 본명, 로마자 표기 또는 초성)
+                format (str, optional): "json"(기본값) 또는 형식화된 문자열을 받으려면 "text"
                 
             Returns:
-                str: 아이돌 정보를 포함하는 형식화된 문자열
+                IdolInfo: 검색 방식과 아이돌 정보 (구조화된 JSON)
             """
             try:
                 self.logger.info(f"Getting information for Kpop idol: {idol_name}")
                 
-                # 여기에 실제 아이돌 정보 데이터베이스 또는 API 호출 코드가 들어갑니다
-                # 지금은 몇 가지 인기 아이돌에 대한 예시 데이터를 반환합니다
+                # 이름, 로마자 표기 또는 초성으로 인덱스에서 검색합니다
+                match = self.idols.lookup(idol_name)
+                if match is not None and (match.kind != "choseong" or len(match.records) == 1):
+                    return IdolInfo(
+                        matched_by=match.kind,
+                        idols=[IdolProfile(**record._asdict()) for record in match.records],
+                    )
                 
-                idol_database = {
-                    "지민": {
-                        "full_name": "박지민 (Park Jimin)",
-                        "group": "BTS",
-                        "position": ["주보컬", "리드댄서"],
-                        "birth_date": "1995-10-13",
-                        "agency": "HYBE (Big Hit Music)",
-                        "debut_date": "2013-06-13",
-                        "blood_type": "A",
-                        "instagram": "@j.m"
-                    },
-                    "아이유": {
-                        "full_name": "이지은 (Lee Ji-eun)",
-                        "group": "솔로",
-                        "position": ["보컬"],
-                        "birth_date": "1993-05-16",
-                        "agency": "EDAM 엔터테인먼트",
-                        "debut_date": "2008-09-18",
-                        "blood_type": "A",
-                        "instagram": "@dlwlrma"
-                    },
-                    "윈터": {
-                        "full_name": "김민정 (Kim Minjeong)",
-                        "group": "aespa",
-                        "position": ["리드보컬", "리드댄서"],
-                        "birth_date": "2001-01-01",
-                        "agency": "SM 엔터테인먼트",
-                        "debut_date": "2020-11-17",
-                        "blood_type": "O",
-                        "instagram": "@aespa_official"
-                    }
-                }
+                if match is not None:
+                    similar_idols = [record.name for record in match.records[:MAX_SUGGESTIONS]]
+                else:
+                    similar_idols = self.idols.suggest(idol_name, limit=MAX_SUGGESTIONS)
                 
-                if idol_name in idol_database:
-                    idol_info = idol_database[idol_name]
-                    
-                    # 포지션 리스트를 문자열로 변환
-                    positions = ", ".join(idol_info["position"])
-                    
-                    # 데이터를 문자열로 형식화
-                    idol_str = (
-                        f"이름: {idol_info['full_name']}\n"
-                        f"그룹: {idol_info['group']}\n"
-                        f"포지션: {positions}\n"
-                        f"생년월일: {idol_info['birth_date']}\n"
-                        f"소속사: {idol_info['agency']}\n"
-                        f"데뷔일: {idol_info['debut_date']}\n"
-                        f"혈액형: {idol_info['blood_type']}\n"
-                        f"인스타그램: {idol_info['instagram']}"
-                    )
-                    
-                    return idol_str
+                if similar_idols:
+                    suggestion_msg = f"'{idol_name}'을(를) 찾을 수 없습니다. 혹시 다음 중 하나를 찾으시나요? {', '.join(similar_idols)}"
+                    raise NotFoundError("get_kpop_idol_info", suggestion_msg)
                 else:
-                    similar_idols = [name for name in idol_database.keys() 
-                                    if idol_name.lower() in name.lower()]
-                    
-                    if similar_idols:
-                        suggestion_msg = f"'{idol_name}'을(를) 찾을 수 없습니다. 혹시 다음 중 하나를 찾으시나요? {', '.join(similar_idols)}"
-                        raise ToolError("idol_info", suggestion_msg)
-                    else:
-                        raise ToolError("idol_info", f"'{idol_name}'에 대한 정보를 찾을 수 없습니다.")
+                    raise NotFoundError("get_kpop_idol_info", f"'{idol_name}'에 대한 정보를 찾을 수 없습니다.")
                 
             except Exception as e:
                 if isinstance(e, ToolError):
                     raise e
                 self.logger.error(f"Error fetching idol information: {str(e)}")
-                raise ToolError("idol_info", f"아이돌 정보를 가져오는 중 오류가 발생했습니다: {str(e)}")
\ No newline at end of file
+                raise ToolError("get_kpop_idol_info", f"아이돌 정보를 가져오는 중 오류가 발생했습니다: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+JSON-RPC batching for the streamable HTTP transport.
+A POST whose body is a JSON array is split into its messages, which are sent
+to the MCP app concurrently as individual requests; their responses come back
+together as one JSON array, so a client pays one round trip for many calls.
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_INTERNAL_ERROR = -32603
+
+Message = Dict[str, Any]
+
+
+def _error(message_id: Any, code: int, text: str) -> Message:
+    return {"jsonrpc": "2.0", "id": message_id, "error": {"code": code, "message": text}}
+
+
+def _parse_event_stream(body: bytes) -> List[Message]:
+    """JSON-RPC messages carried in the data lines of an SSE response"""
+    messages = []
+    for event in body.split(b"\n\n"):
+        data = b"\n".join(line[5:].lstrip() for line in event.splitlines() if line.startswith(b"data:"))
+        if data:
+            try:
+                messages.append(json.loads(data))
+            except ValueError:
+                continue
+    return messages
+
+
+class BatchingMiddleware:
+    """
+    ASGI wrapper of a streamable HTTP app that accepts JSON-RPC batches on its
+    endpoint. Single messages are passed through unchanged.
+    """
+
+    def __init__(self, app, path: str, max_batch_size: int = 100):
+        """
+        Initialize the middleware
+
+        Args:
+            app: The streamable HTTP app
+            path: The streamable HTTP endpoint (e.g. /mcp)
+            max_batch_size: Largest accepted batch
+        """
+        self.app = app
+        self.path = path.rstrip("/") or "/"
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.batched_messages = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or (scope["path"].rstrip("/") or "/") != self.path):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+
+        batch = None
+        if body.lstrip().startswith(b"["):
+            try:
+                batch = json.loads(body)
+            except ValueError:
+                pass
+        if not isinstance(batch, list):
+            # Not a batch: replay the body to the app
+            await self.app(scope, self._replay(body), send)
+            return
+
+        if not batch or len(batch) > self.max_batch_size:
+            text = "Empty batch" if not batch else f"Batch larger than {self.max_batch_size} messages"
+            await self._send_json(send, 400, _error(None, JSONRPC_INVALID_REQUEST, text))
+            return
+
+        results = await asyncio.gather(*[self._dispatch(scope, item) for item in batch])
+        self.batches += 1
+        self.batched_messages += len(batch)
+
+        responses = [response for response, _ in results if response is not None]
+        session_headers = next((headers for _, headers in results if headers), [])
+        if not responses:
+            # Only notifications and responses
+            await send({"type": "http.response.start", "status": 202, "headers": session_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_json(send, 200, responses, session_headers)
+
+    @staticmethod
+    def _replay(body: bytes):
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Wait like a real client connection until the app is done
+            await asyncio.Event().wait()
+
+        return receive
+
+    async def _dispatch(self, scope, item: Any) -> Tuple[Optional[Message], List[Tuple[bytes, bytes]]]:
+        """
+        Send one batch element to the app
+
+        Returns:
+            The JSON-RPC response (None for notifications) and the session header to pass on
+        """
+        if not isinstance(item, dict):
+            return _error(None, JSONRPC_INVALID_REQUEST, "Batch elements must be objects"), []
+        data = json.dumps(item, separators=(",", ":")).encode("utf-8")
+        headers = [(key, value) for key, value in scope["headers"] if key.lower() != b"content-length"]
+        headers.append((b"content-length", str(len(data)).encode()))
+
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks = []
+
+        async def capture(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app({**scope, "headers": headers}, self._replay(data), capture)
+
+        body = b"".join(chunks)
+        session_headers = [(key, value) for key, value in response_headers if key.lower() == b"mcp-session-id"]
+        message_id = item.get("id")
+        if "id" not in item or "method" not in item:
+            return None, session_headers
+
+        content_type = next((value for key, value in response_headers if key.lower() == b"content-type"), b"")
+        if content_type.startswith(b"text/event-stream"):
+            candidates = _parse_event_stream(body)
+        else:
+            try:
+                candidates = [json.loads(body)] if body else []
+            except ValueError:
+                candidates = []
+        for candidate in candidates:
+            if isinstance(candidate, dict) and candidate.get("id") == message_id and "method" not in candidate:
+                return candidate, session_headers
+        text = body.decode("utf-8", "replace").strip() or f"HTTP {status}"
+        return _error(message_id, JSONRPC_INTERNAL_ERROR, text), session_headers
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(data)).encode()),
+            *(headers or []),
+        ]})
+        await send({"type": "http.response.body", "body": data})
@@ -0,0 +1,42 @@
+"""
+Result cache for MCP tools.
+Results are kept per tool for a TTL, bounded by entry count and size, and
+keyed by the normalised call arguments. Concurrent identical calls are merged
+(single-flight): the first one computes, the others await its result.
+"""
+import functools
+import inspect
+from typing import Any, Awaitable, Callable
+
+import anyio
+from mcp.server.fastmcp import Context
+
+from app.core.result_cache import ResultCache
+
+
+class ToolResultCache(ResultCache):
+    """TTL + LRU cache of one tool's results, with single-flight computation"""
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+        """
+        Async tool function serving fn through the cache.
+        A synchronous fn runs in a worker thread, so concurrent identical calls can be merged.
+        """
+        signature = inspect.signature(fn)
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def cached_tool(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_arguments = {name: value for name, value in bound.arguments.items()
+                             if not isinstance(value, Context)}
+
+            async def compute():
+                if is_async:
+                    return await fn(*bound.args, **bound.kwargs)
+                return await anyio.to_thread.run_sync(functools.partial(fn, *bound.args, **bound.kwargs))
+
+            return await self.get_or_compute(key_arguments, compute)
+
+        return cached_tool
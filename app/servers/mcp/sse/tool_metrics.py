@@ -0,0 +1,220 @@
+"""
+Metrics of MCP tool calls in the Prometheus text format.
+Every call is counted, failed calls are counted by the tool_name of their
+ToolError (or the exception type), calls in progress are gauged and durations
+go into fixed-bucket histograms (one bisect and two increments per call).
+Scrapes of several processes can be combined into one exposition, each
+labelled with the process it came from.
+"""
+import bisect
+import functools
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.core.exceptions import ToolError
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def error_source(error: Union[BaseException, str]) -> str:
+    """The "error" label of a failed call: the ToolError's tool_name, or the exception type"""
+    if isinstance(error, str):
+        return error
+    if isinstance(error, ToolError):
+        return error.tool_name
+    return type(error).__name__
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram of durations"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # Per-bucket counts (not cumulative); the last one is +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def samples(self, name: str, labels: Dict[str, Any]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': format_value(bound)})} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(self.sum)}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricFamily:
+    """Samples of one metric, rendered with its HELP and TYPE lines"""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.lines: List[str] = []
+
+    def add(self, value: float, **labels: Any) -> None:
+        self.lines.append(f"{self.name}{format_labels(labels)} {format_value(value)}")
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.lines]
+
+
+class ToolMetrics:
+    """Calls, errors, calls in progress and latency histograms of a server's tools"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.calls: Dict[str, int] = defaultdict(int)
+        # (tool, error source) -> count
+        self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.durations: Dict[str, LatencyHistogram] = {}
+
+    def start(self, tool: str) -> float:
+        """Count a call of the tool; returns its start time for finish()"""
+        self.calls[tool] += 1
+        self.in_flight[tool] += 1
+        return time.perf_counter()
+
+    def finish(self, tool: str, started: float, error: Optional[Union[BaseException, str]] = None) -> None:
+        """Record the duration of a call, and its error if it failed"""
+        self.in_flight[tool] -= 1
+        histogram = self.durations.get(tool)
+        if histogram is None:
+            histogram = self.durations[tool] = LatencyHistogram(self.buckets)
+        histogram.observe(time.perf_counter() - started)
+        if error is not None:
+            self.errors[(tool, error_source(error))] += 1
+
+    def wrap(self, tool: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Async tool function recording the calls of fn (same signature as fn)"""
+        @functools.wraps(fn)
+        async def instrumented(*args, **kwargs):
+            started = self.start(tool)
+            error = None
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self.finish(tool, started, error)
+
+        return instrumented
+
+    def families(self, **labels: Any) -> List[MetricFamily]:
+        """The metrics, with the given labels (e.g. server) on every sample"""
+        calls = MetricFamily("mcp_tool_calls_total", "counter", "Tool calls started")
+        errors = MetricFamily("mcp_tool_errors_total", "counter",
+                              "Failed tool calls, by ToolError tool_name or exception type")
+        in_flight = MetricFamily("mcp_tool_in_flight", "gauge", "Tool calls in progress")
+        durations = MetricFamily("mcp_tool_duration_seconds", "histogram", "Duration of tool calls")
+        for tool, count in self.calls.items():
+            calls.add(count, **labels, tool=tool)
+            in_flight.add(self.in_flight[tool], **labels, tool=tool)
+        for (tool, source), count in self.errors.items():
+            errors.add(count, **labels, tool=tool, error=source)
+        for tool, histogram in self.durations.items():
+            durations.lines.extend(histogram.samples(durations.name, {**labels, "tool": tool}))
+        return [calls, errors, in_flight, durations]
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """Prometheus text exposition of the metric families"""
+    return "\n".join(line for family in families for line in family.render()) + "\n"
+
+
+def relabel(scrape: str, **labels: Any) -> str:
+    """
+    Add labels to every sample of a scrape
+
+    Args:
+        scrape: A Prometheus text exposition
+        **labels: The labels to add (put before the sample's own labels)
+
+    Returns:
+        The exposition with the labels on every sample
+    """
+    extra = format_labels(labels)[1:-1]
+    if not extra:
+        return scrape
+    lines = []
+    for line in scrape.splitlines():
+        if line.strip() and not line.startswith("#"):
+            name, brace, rest = line.partition("{")
+            if brace:
+                line = f"{name}{{{extra},{rest}"
+            else:
+                name, _, value = line.partition(" ")
+                line = f"{name}{{{extra}}} {value}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def combine(scrapes: Iterable[str]) -> str:
+    """
+    Combine scrapes of several processes: every metric family is written once,
+    with the samples of all the scrapes. Samples with the same name and labels
+    are added up, so scrapes of processes that restart independently should be
+    told apart with relabel() (a counter summed over processes would go
+    backwards when one of them restarts)
+
+    Args:
+        scrapes: Prometheus text expositions
+
+    Returns:
+        One exposition holding every metric family once
+    """
+    # family -> ({"HELP": line, "TYPE": line}, sample -> value)
+    families: Dict[str, Tuple[Dict[str, str], Dict[str, float]]] = {}
+    for scrape in scrapes:
+        family = None
+        for line in scrape.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith("#"):
+                parts = line.split(None, 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    header, _ = families.setdefault(family, ({}, {}))
+                    header.setdefault(parts[1], line)
+                continue
+            sample, _, value = line.rpartition(" ")
+            _, values = families.setdefault(family or sample.partition("{")[0], ({}, {}))
+            try:
+                values[sample] = values.get(sample, 0.0) + float(value)
+            except ValueError:
+                continue
+    lines = []
+    for header, values in families.values():
+        lines.extend(header[kind] for kind in ("HELP", "TYPE") if kind in header)
+        lines.extend(f"{sample} {format_value(value)}" for sample, value in values.items())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,211 @@
+"""
+Execution of MCP tool calls.
+Async tools run in the server's event loop; synchronous tools run on a
+bounded thread pool, or on a process pool for CPU-heavy work, so a slow tool
+no longer stalls the other sessions. Each tool can be given a concurrency cap
+and a timeout, and the time calls wait for a slot or a worker is measured
+apart from the time they run.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from mcp.server.fastmcp import Context
+
+from app.core.exceptions import ConfigurationError, ToolError
+
+EXECUTORS = ("inline", "thread", "process")
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...],
+                kwargs: Dict[str, Any]) -> Tuple[float, Optional[BaseException], Any]:
+    """
+    Runs fn in a worker. Returns when it started (perf_counter is system-wide, so this
+    holds for worker processes too), and its exception or result.
+    """
+    started = time.perf_counter()
+    try:
+        return started, None, fn(*args, **kwargs)
+    except Exception as e:
+        return started, e, None
+
+
+class DurationWindow:
+    """Count, total and max of durations, with percentiles over the most recent ones"""
+
+    def __init__(self, size: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def stats(self) -> Dict[str, float]:
+        ordered = sorted(self.recent)
+
+        def percentile(fraction: float) -> float:
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000 if ordered else 0.0
+
+        return {
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max * 1000,
+        }
+
+
+class ToolRunner:
+    """Runs the calls of one tool with its executor, concurrency cap and timeout"""
+
+    def __init__(self, name: str, fn: Callable[..., Any], executor: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 pools: Optional[Callable[[str], Executor]] = None):
+        """
+        Initialize the runner
+
+        Args:
+            name: The tool name
+            fn: The tool function
+            executor: "inline" (in the event loop), "thread" or "process"; defaults to
+                "inline" for async functions and "thread" for the others
+            max_concurrency: Maximum calls running at once (None = unlimited)
+            timeout: Seconds a call may take, waiting included (None = no limit)
+            pools: Returns the server's executor for "thread" or "process"
+        """
+        is_async = inspect.iscoroutinefunction(fn)
+        executor = executor or ("inline" if is_async else "thread")
+        if executor not in EXECUTORS:
+            raise ConfigurationError(f"Tool '{name}': unknown executor '{executor}', expected one of {EXECUTORS}")
+        if is_async and executor != "inline":
+            raise ConfigurationError(f"Tool '{name}': async tools run in the event loop (executor='inline')")
+        if not is_async and executor == "inline":
+            raise ConfigurationError(f"Tool '{name}': synchronous tools run on the 'thread' or 'process' executor")
+        if executor != "inline" and pools is None:
+            raise ConfigurationError(f"Tool '{name}': no executor pools given")
+        if executor == "process":
+            # The function and its arguments are pickled to the worker process
+            if "<locals>" in fn.__qualname__:
+                raise ConfigurationError(f"Tool '{name}': executor='process' needs a module-level function")
+            if any(parameter.annotation is Context for parameter in inspect.signature(fn).parameters.values()):
+                raise ConfigurationError(f"Tool '{name}': executor='process' cannot receive the MCP Context")
+
+        self.name = name
+        self.fn = fn
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._pools = pools
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.queue_wait = DurationWindow()
+        self.run_time = DurationWindow()
+
+    def wrap(self) -> Callable[..., Any]:
+        """Async tool function running fn through this runner (same signature as fn)"""
+        @functools.wraps(self.fn)
+        async def run_tool(*args, **kwargs):
+            return await self(*args, **kwargs)
+
+        return run_tool
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        self.calls += 1
+        try:
+            if self.timeout:
+                return await asyncio.wait_for(self._run(args, kwargs), self.timeout)
+            return await self._run(args, kwargs)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ToolError(self.name, f"Timed out after {self.timeout}s")
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def _run(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        submitted = time.perf_counter()
+        if self.max_concurrency:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        if self.executor == "inline":
+            return await self._run_inline(args, kwargs, submitted)
+        return await self._run_in_pool(args, kwargs, submitted)
+
+    def _release(self) -> None:
+        if self.max_concurrency:
+            self._semaphore.release()
+
+    async def _run_inline(self, args: Tuple[Any, ...], kwargs: Dict[str, Any], submitted: float) -> Any:
+        started = time.perf_counter()
+        self.queue_wait.add(started - submitted)
+        self.in_flight += 1
+        try:
+            return await self.fn(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+            self.run_time.add(time.perf_counter() - started)
+            self._release()
+
+    async def _run_in_pool(self, args: Tuple[Any, ...], kwargs: Dict[str, Any], submitted: float) -> Any:
+        call = functools.partial(_timed_call, self.fn, args, kwargs)
+        if self.executor == "thread":
+            # Keep the caller's context (e.g. the MCP request context) in the worker thread
+            call = functools.partial(contextvars.copy_context().run, call)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pools(self.executor), call)
+        except BaseException:
+            self._release()
+            raise
+        self.in_flight += 1
+
+        def finished(done: asyncio.Future) -> None:
+            # A timed-out call keeps its slot until the worker is done with it
+            self.in_flight -= 1
+            self._release()
+            if not done.cancelled() and done.exception() is None:
+                started = done.result()[0]
+                self.queue_wait.add(started - submitted)
+                self.run_time.add(time.perf_counter() - started)
+
+        future.add_done_callback(finished)
+        _, error, result = await asyncio.shield(future)
+        if error is not None:
+            raise error
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns call counters, gauges (calls waiting for a slot, calls in the event loop or a
+        pool) and the queue wait (until a worker starts the call) and run time of the tool
+        """
+        return {
+            "executor": self.executor,
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "queue_wait": self.queue_wait.stats(),
+            "run_time": self.run_time.stats(),
+        }
@@ -0,0 +1,146 @@
+"""
+Multi-process SSE serving for MCP servers.
+Every worker process listens on the same TCP port (SO_REUSEPORT), so the
+kernel spreads connections over the workers. An SSE session lives in the
+worker that accepted its GET /sse, so each worker advertises its own message
+endpoint (/messages/<worker>/) and forwards POSTs for another worker's
+sessions to that worker over its private unix socket.
+"""
+import os
+import socket
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import LogManager
+
+log_manager = LogManager()
+logger = log_manager.get_logger("SSE WORKERS")
+
+HOP_BY_HOP_HEADERS = frozenset({b"connection", b"keep-alive", b"transfer-encoding", b"content-length"})
+
+
+def worker_message_path(message_path: str, worker_index: int) -> str:
+    """Message endpoint advertised by a worker, e.g. /messages/2/"""
+    return f"{message_path.rstrip('/')}/{worker_index}/"
+
+
+def worker_socket_path(name: str, port: int, worker_index: int) -> str:
+    """Unix socket a worker listens on for forwarded requests"""
+    return os.path.join(settings.WORKER_SOCKET_DIR, f"{name.lower()}-{port}-{worker_index}.sock")
+
+
+def reuseport_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening TCP socket that other workers can bind to as well"""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("SO_REUSEPORT is not supported on this platform")
+    family, kind, proto, _, address = socket.getaddrinfo(
+        host or None, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    sock = socket.socket(family, kind, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(address)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def unix_listen_socket(path: str, backlog: int = 2048) -> socket.socket:
+    """Listening unix socket at path, replacing a stale one left by a previous run"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class SessionRouter:
+    """
+    ASGI wrapper of a worker's app that sends message POSTs to the worker
+    owning the session (given by the worker index in the message path)
+    """
+
+    def __init__(self, app, message_path: str, worker_index: int, socket_paths: List[str]):
+        """
+        Initialize the router
+
+        Args:
+            app: The worker's own ASGI app
+            message_path: Shared message path prefix (e.g. /messages/)
+            worker_index: Index of this worker
+            socket_paths: Unix socket of every worker, by index
+        """
+        self.app = app
+        self.prefix = message_path.rstrip("/") + "/"
+        self.worker_index = worker_index
+        self.socket_paths = socket_paths
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+        self.forwarded = 0
+
+    def _owner(self, path: str) -> Optional[int]:
+        if not path.startswith(self.prefix):
+            return None
+        segment = path[len(self.prefix):].split("/", 1)[0]
+        if not segment.isdigit():
+            return None
+        owner = int(segment)
+        if owner == self.worker_index or owner >= len(self.socket_paths):
+            return None
+        return owner
+
+    def _client(self, owner: int) -> httpx.AsyncClient:
+        client = self._clients.get(owner)
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=self.socket_paths[owner]),
+                base_url="http://worker", timeout=30.0,
+            )
+            self._clients[owner] = client
+        return client
+
+    async def __call__(self, scope, receive, send) -> None:
+        owner = self._owner(scope["path"]) if scope["type"] == "http" else None
+        if owner is None:
+            await self.app(scope, receive, send)
+            return
+        await self._forward(owner, scope, receive, send)
+
+    async def _forward(self, owner: int, scope, receive, send) -> None:
+        body = []
+        while True:
+            message = await receive()
+            body.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        headers = [(key, value) for key, value in scope["headers"] if key.lower() not in HOP_BY_HOP_HEADERS]
+        url = scope.get("raw_path") or scope["path"].encode()
+        if scope.get("query_string"):
+            url += b"?" + scope["query_string"]
+        try:
+            response = await self._client(owner).request(
+                scope["method"], url.decode("latin-1"), headers=headers, content=b"".join(body)
+            )
+            status, content = response.status_code, response.content
+            response_headers = [(key, value) for key, value in response.headers.raw
+                                if key.lower() not in HOP_BY_HOP_HEADERS]
+        except httpx.TransportError as e:
+            # The owning worker is gone, and its sessions with it
+            logger.warning(f"Worker {self.worker_index}: worker {owner} unreachable: {e!r}")
+            status, content, response_headers = 404, b"Could not find session", [(b"content-type", b"text/plain")]
+        self.forwarded += 1
+        response_headers.append((b"content-length", str(len(content)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": content})
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
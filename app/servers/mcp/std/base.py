@@ -1,95 +1,110 @@
 import uuid
-from datetime import datetime
+from typing import Dict, List, Optional
 from app.core.logging import LogManager  # Correction de l'import
 from app.utils.cmd.npx import NPXCommandRequest, NPXRunner, ProcessInfo  # Import complet
+from app.utils.cmd.process_registry import ProcessRecord
 from fastapi import HTTPException, status
 
 class StdServer:
     def __init__(self):
-        self.processes = {}
         log_manager = LogManager()
         self.logger = log_manager.get_logger("STD TOOLS")
         self.npx_runner = NPXRunner()
-    
+
+    @property
+    def registry(self):
+        """Registry of every process started by this server"""
+        return self.npx_runner.registry
+
+    @property
+    def processes(self) -> Dict[str, object]:
+        """Processes that are still running, by process ID"""
+        return self.registry.running()
+
+    def _get_record(self, process_id: str) -> ProcessRecord:
+        record = self.registry.get(process_id)
+        if record is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Process with ID {process_id} not found"
+            )
+        return record
+
     async def run_npx_command(self, request: NPXCommandRequest):
         """Run an NPX command and return the process ID"""
         # Generate a unique ID for this process
         process_id = str(uuid.uuid4())
-        
+
         try:
-            # Run the command
-            process = await self.npx_runner.run_command(
+            # Run the command; the runner registers it with its launch metadata
+            await self.npx_runner.run_command(
                 request.command,
                 request.args,
                 request.env_vars,
                 request.working_dir,
-                process_id
+                process_id,
+                stream_output=request.stream_output
             )
-            
-            # Store the process in our processes dictionary
-            self.processes[process_id] = process
-            
+
             # Return process info
-            return ProcessInfo(
-                process_id=process_id,
-                command=request.command,
-                args=request.args,
-                status="running",
-                start_time=datetime.now().isoformat(),
-                pid=process.pid
-            )
+            return ProcessInfo.from_record(self.registry.get(process_id))
         except Exception as e:
             self.logger.error(f"Failed to run NPX command: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to run NPX command: {str(e)}"
             )
-    
+
     async def get_process_info(self, process_id: str) -> ProcessInfo:
-        """Get information about a running process"""
-        if process_id not in self.processes:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Process with ID {process_id} not found"
-            )
-        
-        process = self.processes[process_id]
-        
-        # Check if the process is still running
-        if process.returncode is None:
-            process_status = "running"
-        else:
-            process_status = "completed" if process.returncode == 0 else "failed"
-        
-        # Return the process information
-        # Note: We don't have the original command and args here,
-        # so you might want to store this information elsewhere
-        return ProcessInfo(
-            process_id=process_id,
-            command="", # Would need to be stored separately
-            args="",    # Would need to be stored separately
-            status=process_status,
-            start_time="", # Would need to be stored separately
-            pid=process.pid
-        )
-    
+        """Get information about a process, including its latest resource sample"""
+        return ProcessInfo.from_record(self._get_record(process_id))
+
+    async def list_processes(self, status_filter: Optional[str] = None, command: Optional[str] = None,
+                             sort_by: Optional[str] = None, descending: bool = True,
+                             limit: Optional[int] = None) -> List[ProcessInfo]:
+        """
+        List processes, optionally filtered and sorted
+
+        Args:
+            status_filter: Only processes with this status ("running", "completed", "failed", "killed")
+            command: Only processes whose command contains this text
+            sort_by: Sort field (e.g. "rss_bytes", "cpu_percent", "num_fds", "start_time")
+            descending: Sort order
+            limit: Maximum number of processes
+        """
+        try:
+            records = self.registry.query(status=status_filter, command=command, sort_by=sort_by,
+                                          descending=descending, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return [ProcessInfo.from_record(record) for record in records]
+
+    async def top_processes(self, count: int = 5, by: str = "rss_bytes") -> List[ProcessInfo]:
+        """Get the running processes using the most CPU, memory, fds or threads"""
+        try:
+            records = self.registry.top(count, by)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return [ProcessInfo.from_record(record) for record in records]
+
     async def kill_process(self, process_id: str) -> None:
-        """Kill a running process"""
-        if process_id not in self.processes:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Process with ID {process_id} not found"
-            )
-        
-        process = self.processes[process_id]
-        
+        """Kill a running process; its record stays queryable as "killed" until it is pruned"""
+        record = self._get_record(process_id)
+        process = record.process
+
         # Check if the process is still running
-        if process.returncode is None:
+        if process is not None and process.returncode is None:
+            record.status = "killed"
             # Kill the process
             process.kill()
-            
+
             # Wait for the process to be killed
             await process.wait()
-        
-        # Remove the process from the dictionary
-        del self.processes[process_id]
\ No newline at end of file
+
+    async def get_process_output(self, process_id: str, count: int = 100):
+        """Get the most recent output lines and output counters of a process"""
+        self._get_record(process_id)
+        return {
+            "lines": self.npx_runner.get_output(process_id, count),
+            "stats": self.npx_runner.output_stats(process_id),
+        }
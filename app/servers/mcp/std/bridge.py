@@ -0,0 +1,508 @@
+"""
+Native stdio-to-SSE bridge for MCP servers.
+A single stdio MCP child is started once and multiplexed across any number of
+SSE sessions: request ids (and progress tokens) are rewritten to bridge-unique
+values on the way in and restored on the way out, so responses reach the
+session that asked for them.
+"""
+import asyncio
+import itertools
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import anyio
+from mcp.server.sse import SseServerTransport
+from mcp.shared.message import SessionMessage
+from mcp.types import LATEST_PROTOCOL_VERSION, JSONRPCMessage
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app.core.config import settings
+from app.core.exceptions import ServerError
+from app.servers.mcp.sse.base import BaseMCPServer
+from app.servers.mcp.sse.tool_metrics import ToolMetrics
+from app.utils.cmd.npx import NPXRunner
+
+JSONRPC_METHOD_NOT_FOUND = -32601
+JSONRPC_INTERNAL_ERROR = -32603
+
+BRIDGE_CLIENT_INFO = {"name": "mcp-tool-bridge", "version": "0.1.0"}
+
+Message = Dict[str, Any]
+
+
+class BridgeSession:
+    """One client session attached to the shared stdio connection"""
+
+    def __init__(self, session_id: str, queue: Optional["asyncio.Queue[Message]"] = None):
+        self.session_id = session_id
+        self.queue: "asyncio.Queue[Message]" = queue if queue is not None else asyncio.Queue()
+        # original request id -> bridge request id
+        self.pending: Dict[Any, int] = {}
+
+
+class StdioMCPConnection:
+    """
+    A stdio MCP server process shared by many client sessions.
+
+    Messages from the child are framed by newline directly on the StreamReader
+    buffer and parsed from bytes (no text decoding step); messages to the child
+    are written as one compact JSON line each.
+    """
+
+    def __init__(self, runner: NPXRunner, command: Optional[str] = None, args: Union[str, List[str]] = "",
+                 argv: Optional[List[str]] = None, env_vars: Optional[Dict[str, str]] = None,
+                 working_dir: Optional[str] = None, metrics: Optional[ToolMetrics] = None):
+        """
+        Initialize the connection (the child is started by start())
+
+        Args:
+            runner: Runner used to start and track the child
+            command: npm package spec of the stdio server (resolved by the runner)
+            args: Arguments for the package command
+            argv: Full argv to execute instead of a package command
+            env_vars: Extra environment variables for the child
+            working_dir: Working directory for the child
+            metrics: Records the tools/call requests forwarded to the child
+        """
+        if command is None and not argv:
+            raise ValueError("Either command or argv is required")
+        self.runner = runner
+        self.command = command
+        self.args = args
+        self.argv = argv
+        self.env_vars = env_vars or {}
+        self.working_dir = working_dir
+        self.metrics = metrics
+
+        self.process_id = str(uuid.uuid4())
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.initialize_result: Optional[Message] = None
+        self.closed = asyncio.Event()
+
+        self._ids = itertools.count(1)
+        # bridge id -> (session, original id) or a future for the bridge's own requests
+        self._pending: Dict[int, Union[Tuple[BridgeSession, Any], asyncio.Future]] = {}
+        # bridge progress token -> (session, original token)
+        self._progress: Dict[int, Tuple[BridgeSession, Any]] = {}
+        self._sessions: Dict[str, BridgeSession] = {}
+        # bridge id -> (tool name, start time) of the tools/call requests in flight
+        self._tool_calls: Dict[int, Tuple[str, float]] = {}
+        self._write_lock = asyncio.Lock()
+        self._reader_task: Optional[asyncio.Task] = None
+
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def start(self, timeout: float = 60.0) -> Message:
+        """
+        Start the child and perform the MCP initialize handshake once
+
+        Returns:
+            The child's initialize result, replayed to every session
+        """
+        if self.argv:
+            self.process = await self.runner.run_argv(
+                self.argv, self.env_vars, self.working_dir, self.process_id, stdio=True
+            )
+        else:
+            self.process = await self.runner.run_command(
+                self.command, self.args, self.env_vars, self.working_dir, self.process_id, stdio=True
+            )
+        self._reader_task = asyncio.create_task(self._read_loop(), name=f"bridge-reader-{self.process_id[:8]}")
+
+        self.initialize_result = await asyncio.wait_for(self.request("initialize", {
+            "protocolVersion": LATEST_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": BRIDGE_CLIENT_INFO,
+        }), timeout)
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        return self.initialize_result
+
+    async def request(self, method: str, params: Optional[Message] = None) -> Message:
+        """Send a request on the bridge's own behalf and wait for its result"""
+        bridge_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[bridge_id] = future
+        message: Message = {"jsonrpc": "2.0", "id": bridge_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+        response = await future
+        if "error" in response:
+            raise ServerError(f"{method} failed: {response['error'].get('message')}")
+        return response["result"]
+
+    async def _send(self, message: Message) -> None:
+        if self.process is None or self.process.stdin is None or self.closed.is_set():
+            raise ServerError("MCP server process is not running")
+        data = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        async with self._write_lock:
+            self.process.stdin.writelines((data, b"\n"))
+            await self.process.stdin.drain()
+        self.messages_out += 1
+        self.bytes_out += len(data) + 1
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> bytes:
+        parts = []
+        while True:
+            try:
+                parts.append(await reader.readuntil(b"\n"))
+                break
+            except asyncio.LimitOverrunError as e:
+                # Longer than the reader limit: take what is buffered and keep reading
+                parts.append(await reader.readexactly(e.consumed))
+            except asyncio.IncompleteReadError as e:
+                parts.append(e.partial)
+                break
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    async def _read_loop(self) -> None:
+        reader = self.process.stdout
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if not line:
+                    break
+                self.bytes_in += len(line)
+                if line.isspace():
+                    continue
+                try:
+                    payload = json.loads(line)
+                except ValueError:
+                    self.runner.logger.debug(f"Ignoring non JSON-RPC output: {line[:200]!r}")
+                    continue
+                for message in payload if isinstance(payload, list) else (payload,):
+                    self.messages_in += 1
+                    await self._dispatch(message)
+        except ConnectionError:
+            pass
+        finally:
+            self._fail_pending("MCP server process exited")
+            self.closed.set()
+
+    async def _dispatch(self, message: Message) -> None:
+        """Route one message from the child"""
+        if "method" not in message:
+            # Response to a request
+            if self._tool_calls:
+                result = message.get("result")
+                if "error" in message:
+                    self._finish_tool_call(message.get("id"), "JSONRPCError")
+                else:
+                    self._finish_tool_call(message.get("id"), isinstance(result, dict) and result.get("isError"))
+            target = self._pending.pop(message.get("id"), None)
+            if isinstance(target, asyncio.Future):
+                if not target.done():
+                    target.set_result(message)
+            elif target is not None:
+                session, original_id = target
+                session.pending.pop(original_id, None)
+                session.queue.put_nowait({**message, "id": original_id})
+            return
+
+        if "id" in message:
+            # Request from the server to the client: answer pings, refuse the rest
+            if message["method"] == "ping":
+                await self._send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            else:
+                await self._send({"jsonrpc": "2.0", "id": message["id"], "error": {
+                    "code": JSONRPC_METHOD_NOT_FOUND,
+                    "message": f"{message['method']} is not supported through the bridge",
+                }})
+            return
+
+        if message["method"] == "notifications/progress":
+            params = message.get("params") or {}
+            target = self._progress.get(params.get("progressToken"))
+            if target is not None:
+                session, token = target
+                session.queue.put_nowait({**message, "params": {**params, "progressToken": token}})
+            return
+
+        # Other notifications (logging, list_changed, ...) go to every session
+        for session in list(self._sessions.values()):
+            session.queue.put_nowait(message)
+
+    def _start_tool_call(self, bridge_id: int, message: Message) -> None:
+        if self.metrics is not None and message.get("method") == "tools/call":
+            params = message.get("params")
+            tool = str(params.get("name", "")) if isinstance(params, dict) else ""
+            self._tool_calls[bridge_id] = (tool, self.metrics.start(tool))
+
+    def _finish_tool_call(self, bridge_id: Any, error: Union[str, bool, None]) -> None:
+        """Record the end of a tools/call; error is an error label, or True if the tool reported one"""
+        call = self._tool_calls.pop(bridge_id, None)
+        if call is not None:
+            tool, started = call
+            self.metrics.finish(tool, started, tool if error is True else error or None)
+
+    def _fail_pending(self, reason: str) -> None:
+        for bridge_id, target in list(self._pending.items()):
+            if isinstance(target, asyncio.Future):
+                if not target.done():
+                    target.set_result({"error": {"code": JSONRPC_INTERNAL_ERROR, "message": reason}})
+            else:
+                session, original_id = target
+                session.queue.put_nowait({"jsonrpc": "2.0", "id": original_id, "error": {
+                    "code": JSONRPC_INTERNAL_ERROR, "message": reason,
+                }})
+        for bridge_id in list(self._tool_calls):
+            self._finish_tool_call(bridge_id, "ServerError")
+        self._pending.clear()
+        self._progress.clear()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests sent to the child that have not been answered yet"""
+        return len(self._pending)
+
+    @property
+    def pids(self) -> List[int]:
+        return [self.process.pid] if self.process is not None else []
+
+    async def wait(self) -> Optional[int]:
+        """Wait for the child to exit and return its exit code"""
+        return await self.process.wait() if self.process is not None else None
+
+    def open_session(self, queue: Optional["asyncio.Queue[Message]"] = None) -> BridgeSession:
+        """
+        Attach a new client session
+
+        Args:
+            queue: Queue receiving the session's messages (a new one if not given)
+        """
+        session = BridgeSession(uuid.uuid4().hex, queue)
+        self._sessions[session.session_id] = session
+        return session
+
+    async def close_session(self, session: BridgeSession) -> None:
+        """Detach a session and cancel its in-flight requests in the child"""
+        self._sessions.pop(session.session_id, None)
+        for bridge_id in session.pending.values():
+            self._pending.pop(bridge_id, None)
+            self._finish_tool_call(bridge_id, "CancelledError")
+            if not self.closed.is_set():
+                try:
+                    await self._send({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                                      "params": {"requestId": bridge_id, "reason": "Client disconnected"}})
+                except (ServerError, ConnectionError):
+                    pass
+        session.pending.clear()
+        for token, (owner, _) in list(self._progress.items()):
+            if owner is session:
+                del self._progress[token]
+
+    async def forward(self, session: BridgeSession, message: Message) -> None:
+        """Forward one message from a client session to the child"""
+        method = message.get("method")
+        if method is None:
+            # Responses to server requests: the bridge answers those itself
+            return
+
+        if "id" not in message:
+            if method == "notifications/initialized":
+                return
+            if method == "notifications/cancelled":
+                params = message.get("params") or {}
+                bridge_id = session.pending.get(params.get("requestId"))
+                if bridge_id is None:
+                    return
+                message = {**message, "params": {**params, "requestId": bridge_id}}
+            await self._send(message)
+            return
+
+        original_id = message["id"]
+        if method == "initialize":
+            # The child is initialized once; every session gets the same answer
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": original_id, "result": self.initialize_result})
+            return
+        if method == "ping":
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": original_id, "result": {}})
+            return
+
+        bridge_id = next(self._ids)
+        self._pending[bridge_id] = (session, original_id)
+        session.pending[original_id] = bridge_id
+        self._start_tool_call(bridge_id, message)
+        outgoing = {**message, "id": bridge_id}
+
+        params = message.get("params")
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        if isinstance(meta, dict) and meta.get("progressToken") is not None:
+            self._progress[bridge_id] = (session, meta["progressToken"])
+            outgoing["params"] = {**params, "_meta": {**meta, "progressToken": bridge_id}}
+
+        try:
+            await self._send(outgoing)
+        except ServerError as e:
+            self._pending.pop(bridge_id, None)
+            session.pending.pop(original_id, None)
+            self._finish_tool_call(bridge_id, "ServerError")
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": original_id, "error": {
+                "code": JSONRPC_INTERNAL_ERROR, "message": str(e),
+            }})
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop the child process"""
+        process = self.process
+        if process is not None and process.returncode is None:
+            if process.stdin is not None:
+                process.stdin.close()
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns session, in-flight and traffic counters"""
+        return {
+            "pid": self.process.pid if self.process is not None else None,
+            "in_flight": self.in_flight,
+            "sessions": len(self._sessions),
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+class StdioBridgeServer(BaseMCPServer):
+    """
+    Serves a stdio MCP server over SSE from this process, replacing an external
+    bridge (e.g. just-aii-guess) and its extra Node runtime. With more than one
+    worker the requests are spread over a StdioWorkerPool of identical children.
+    """
+
+    def __init__(self, name: str, command: Optional[str] = None, args: Union[str, List[str]] = "",
+                 argv: Optional[List[str]] = None, env_vars: Optional[Dict[str, str]] = None,
+                 port: Optional[int] = None, host: Optional[str] = None, working_dir: Optional[str] = None,
+                 runner: Optional[NPXRunner] = None, workers: int = 1, max_workers: Optional[int] = None,
+                 pin_sessions: bool = False, **pool_options: Any):
+        """
+        Initialize the bridge server
+
+        Args:
+            name: The server name
+            command: npm package spec of the stdio server
+            args: Arguments for the package command
+            argv: Full argv of the stdio server instead of a package command
+            env_vars: Extra environment variables for the child
+            port: The port to use (optional)
+            host: The host to bind to (optional)
+            working_dir: Working directory for the child
+            runner: Runner used to start the child (optional)
+            workers: Number of children started up front
+            max_workers: Upper bound when the pool grows under load (defaults to workers)
+            pin_sessions: Send every request of a session to the same child
+            pool_options: Extra StdioWorkerPool options (scale_up_depth, scale_down_idle, ...)
+        """
+        super().__init__(name, port=port, host=host)
+        self.runner = runner or NPXRunner()
+        max_workers = max(workers, max_workers or workers)
+        if max_workers > 1 or pin_sessions or pool_options:
+            from app.servers.mcp.std.pool import StdioWorkerPool
+
+            self.connection = StdioWorkerPool(
+                self.runner, command, args, argv, env_vars, working_dir,
+                min_workers=workers, max_workers=max_workers, pin_sessions=pin_sessions,
+                metrics=self.metrics, **pool_options
+            )
+        else:
+            self.connection = StdioMCPConnection(self.runner, command, args, argv, env_vars, working_dir,
+                                                 metrics=self.metrics)
+
+    async def _handle_session(self, sse: SseServerTransport, request: Request) -> Response:
+        session = self.connection.open_session()
+        try:
+            async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+                async def client_to_child():
+                    async for item in read_stream:
+                        if isinstance(item, Exception):
+                            self.logger.warning(f"Invalid message from client: {item}")
+                            continue
+                        await self.connection.forward(
+                            session, item.message.model_dump(by_alias=True, mode="json", exclude_none=True)
+                        )
+                    task_group.cancel_scope.cancel()
+
+                async def child_to_client():
+                    while True:
+                        message = await session.queue.get()
+                        await write_stream.send(SessionMessage(JSONRPCMessage.model_validate(message)))
+
+                async with anyio.create_task_group() as task_group:
+                    task_group.start_soon(client_to_child)
+                    task_group.start_soon(child_to_client)
+        finally:
+            await self.connection.close_session(session)
+        return Response()
+
+    def sse_app(self) -> Starlette:
+        """Starlette app exposing the bridged server on the usual /sse and /messages/ paths"""
+        mcp_settings = self.mcp.settings
+        sse = SseServerTransport(mcp_settings.message_path,
+                                 security_settings=getattr(mcp_settings, "transport_security", None))
+
+        async def sse_endpoint(request: Request) -> Response:
+            return await self._handle_session(sse, request)
+
+        return Starlette(routes=[
+            Route(mcp_settings.sse_path, endpoint=sse_endpoint, methods=["GET"]),
+            Route(settings.METRICS_PATH, endpoint=self.metrics_endpoint, methods=["GET"]),
+            Mount(mcp_settings.message_path, app=sse.handle_post_message),
+        ])
+
+    async def run_async(self) -> int:
+        """
+        Start the child, serve SSE until shutdown or until the child exits
+
+        Returns:
+            0 on a clean shutdown, 1 if the child exited
+        """
+        import uvicorn
+
+        await self.connection.start()
+        pids = ", ".join(str(pid) for pid in self.connection.pids)
+        self.logger.info(f"Bridging {self.name} (PID: {pids}) on port {self.mcp.settings.port}")
+        server = uvicorn.Server(uvicorn.Config(
+            self.sse_app(), host=self.mcp.settings.host, port=self.mcp.settings.port,
+            log_level=self.mcp.settings.log_level.lower(),
+        ))
+        serve = asyncio.create_task(server.serve())
+        child_exit = asyncio.create_task(self.connection.closed.wait())
+        try:
+            await asyncio.wait((serve, child_exit), return_when=asyncio.FIRST_COMPLETED)
+            if child_exit.done():
+                returncode = await self.connection.wait()
+                self.logger.error(f"{self.name} stdio server exited with code {returncode}")
+                server.should_exit = True
+            await serve
+            return 1 if child_exit.done() else 0
+        finally:
+            child_exit.cancel()
+            await self.connection.close()
+
+    def run(self, transport: str = "sse") -> int:
+        """
+        Run the bridge
+
+        Args:
+            transport: Only "sse" is supported
+        """
+        if transport != "sse":
+            raise ServerError(f"{self.name} bridge only supports the sse transport")
+        try:
+            return anyio.run(self.run_async)
+        except Exception as e:
+            self.logger.error(f"Failed to start {self.name} bridge: {e}")
+            raise ServerError(f"Failed to start {self.name} bridge") from e
@@ -0,0 +1,358 @@
+"""
+Pool of identical stdio MCP workers behind one bridge endpoint.
+Requests go to the least-loaded worker (fewest unanswered requests), sessions
+can be pinned to one worker, and the pool grows while the average queue depth
+per worker stays above a threshold and shrinks again once workers sit idle.
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Union
+
+from app.core.exceptions import ServerError
+from app.servers.mcp.sse.tool_metrics import ToolMetrics
+from app.servers.mcp.std.bridge import JSONRPC_INTERNAL_ERROR, BridgeSession, Message, StdioMCPConnection
+from app.utils.cmd.npx import NPXRunner
+
+# Requests whose effect lives in one child; the session is pinned to the worker that served them
+STICKY_METHODS = frozenset({"resources/subscribe", "resources/unsubscribe", "logging/setLevel"})
+
+
+class PoolWorker:
+    """A stdio connection with its pool bookkeeping"""
+
+    def __init__(self, connection: StdioMCPConnection):
+        self.connection = connection
+        self.requests = 0
+        self.pinned_sessions = 0
+        self.idle_since = time.monotonic()
+        self.seen_requests = 0
+
+    @property
+    def worker_id(self) -> str:
+        return self.connection.process_id
+
+    @property
+    def alive(self) -> bool:
+        return not self.connection.closed.is_set()
+
+
+class PoolSession:
+    """One client session of the pool, attached lazily to the workers it uses"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        self.pinned: Optional[PoolWorker] = None
+        # worker id -> session on that worker, all sharing this session's queue
+        self.attached: Dict[str, BridgeSession] = {}
+
+
+class StdioWorkerPool:
+    """
+    N identical stdio MCP children used as one connection.
+
+    Has the same session interface as StdioMCPConnection (start, open_session,
+    forward, close_session, closed, close, stats), so StdioBridgeServer can serve
+    either one.
+    """
+
+    def __init__(self, runner: NPXRunner, command: Optional[str] = None, args: Union[str, List[str]] = "",
+                 argv: Optional[List[str]] = None, env_vars: Optional[Dict[str, str]] = None,
+                 working_dir: Optional[str] = None, min_workers: int = 1, max_workers: Optional[int] = None,
+                 pin_sessions: bool = False, scale_up_depth: float = 4.0, scale_down_idle: float = 60.0,
+                 check_interval: float = 1.0, start_timeout: float = 60.0,
+                 metrics: Optional[ToolMetrics] = None):
+        """
+        Initialize the pool (the workers are started by start())
+
+        Args:
+            runner: Runner used to start and track the children
+            command: npm package spec of the stdio server (resolved by the runner)
+            args: Arguments for the package command
+            argv: Full argv to execute instead of a package command
+            env_vars: Extra environment variables for the children
+            working_dir: Working directory for the children
+            min_workers: Workers kept running at all times
+            max_workers: Upper bound for the pool size (defaults to min_workers)
+            pin_sessions: Send every request of a session to the same worker
+            scale_up_depth: Average unanswered requests per worker that adds a worker
+            scale_down_idle: Seconds a worker must be idle before it is stopped
+            check_interval: Seconds between load checks
+            start_timeout: Seconds allowed for a worker's initialize handshake
+            metrics: Records the tools/call requests forwarded to the workers
+        """
+        if command is None and not argv:
+            raise ValueError("Either command or argv is required")
+        if min_workers < 1:
+            raise ValueError("min_workers must be at least 1")
+        self.runner = runner
+        self.command = command
+        self.args = args
+        self.argv = argv
+        self.env_vars = env_vars or {}
+        self.working_dir = working_dir
+        self.min_workers = min_workers
+        self.max_workers = max(min_workers, max_workers or min_workers)
+        self.pin_sessions = pin_sessions
+        self.scale_up_depth = scale_up_depth
+        self.scale_down_idle = scale_down_idle
+        self.check_interval = check_interval
+        self.start_timeout = start_timeout
+        self.metrics = metrics
+
+        self.initialize_result: Optional[Message] = None
+        self.closed = asyncio.Event()
+        self.last_returncode: Optional[int] = None
+
+        self._workers: Dict[str, PoolWorker] = {}
+        self._sessions: Dict[str, PoolSession] = {}
+        self._spawning: Set[asyncio.Task] = set()
+        self._retiring: Set[asyncio.Task] = set()
+        self._monitor_task: Optional[asyncio.Task] = None
+
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.replacements = 0
+
+    async def start(self) -> Message:
+        """
+        Start min_workers children and begin watching the load
+
+        Returns:
+            The first worker's initialize result, replayed to every session
+        """
+        workers = await asyncio.gather(*[self._spawn() for _ in range(self.min_workers)])
+        self.initialize_result = workers[0].connection.initialize_result
+        self._monitor_task = asyncio.create_task(self._monitor(), name="worker-pool-monitor")
+        return self.initialize_result
+
+    async def _spawn(self) -> PoolWorker:
+        connection = StdioMCPConnection(self.runner, self.command, self.args, self.argv,
+                                        self.env_vars, self.working_dir, metrics=self.metrics)
+        try:
+            await connection.start(self.start_timeout)
+        except BaseException:
+            await connection.close()
+            raise
+        worker = PoolWorker(connection)
+        self._workers[worker.worker_id] = worker
+        self.runner.logger.info(f"Worker {worker.worker_id[:8]} started (PID: {connection.process.pid}), "
+                                f"{len(self._workers)} running")
+        return worker
+
+    def _spawn_in_background(self, reason: str) -> None:
+        async def spawn():
+            try:
+                await self._spawn()
+            except Exception as e:
+                self.runner.logger.error(f"Failed to start a worker ({reason}): {e}")
+                if not self._live_workers() and len(self._spawning) <= 1:
+                    self.closed.set()
+
+        task = asyncio.create_task(spawn(), name=f"worker-spawn-{reason}")
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    def _live_workers(self) -> List[PoolWorker]:
+        return [worker for worker in self._workers.values() if worker.alive]
+
+    @property
+    def workers(self) -> List[PoolWorker]:
+        return list(self._workers.values())
+
+    @property
+    def in_flight(self) -> int:
+        return sum(worker.connection.in_flight for worker in self._workers.values())
+
+    @property
+    def pids(self) -> List[int]:
+        return [pid for worker in self._workers.values() for pid in worker.connection.pids]
+
+    async def wait(self) -> Optional[int]:
+        """Wait until the pool has closed and return the exit code of the last worker that died"""
+        await self.closed.wait()
+        return self.last_returncode
+
+    def _select(self) -> PoolWorker:
+        """The live worker with the fewest unanswered requests"""
+        candidates = self._live_workers()
+        if not candidates:
+            raise ServerError("No MCP worker is running")
+        return min(candidates, key=lambda worker: (worker.connection.in_flight, worker.requests))
+
+    def _route(self, session: PoolSession, method: str) -> PoolWorker:
+        if session.pinned is not None and not session.pinned.alive:
+            self._unpin(session)
+        if session.pinned is None and (self.pin_sessions or method in STICKY_METHODS):
+            session.pinned = self._select()
+            session.pinned.pinned_sessions += 1
+        return session.pinned or self._select()
+
+    @staticmethod
+    def _unpin(session: PoolSession) -> None:
+        if session.pinned is not None:
+            session.pinned.pinned_sessions -= 1
+            session.pinned = None
+
+    def _attach(self, session: PoolSession, worker: PoolWorker) -> BridgeSession:
+        attached = session.attached.get(worker.worker_id)
+        if attached is None:
+            attached = worker.connection.open_session(session.queue)
+            session.attached[worker.worker_id] = attached
+        return attached
+
+    def open_session(self) -> PoolSession:
+        """Attach a new client session"""
+        session = PoolSession(uuid.uuid4().hex)
+        self._sessions[session.session_id] = session
+        return session
+
+    async def close_session(self, session: PoolSession) -> None:
+        """Detach a session from every worker it used"""
+        self._sessions.pop(session.session_id, None)
+        self._unpin(session)
+        for worker_id, attached in list(session.attached.items()):
+            worker = self._workers.get(worker_id)
+            if worker is not None:
+                await worker.connection.close_session(attached)
+        session.attached.clear()
+
+    async def forward(self, session: PoolSession, message: Message) -> None:
+        """Forward one message from a client session to a worker"""
+        method = message.get("method")
+        if method is None:
+            return
+
+        if "id" not in message:
+            if method == "notifications/initialized":
+                return
+            if method == "notifications/cancelled":
+                request_id = (message.get("params") or {}).get("requestId")
+                targets = [worker_id for worker_id, attached in session.attached.items()
+                           if request_id in attached.pending]
+            else:
+                targets = list(session.attached)
+            for worker_id in targets:
+                worker = self._workers.get(worker_id)
+                if worker is not None and worker.alive:
+                    await worker.connection.forward(session.attached[worker_id], message)
+            return
+
+        if method == "initialize":
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": message["id"], "result": self.initialize_result})
+            return
+        if method == "ping":
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            return
+
+        try:
+            worker = self._route(session, method)
+        except ServerError as e:
+            session.queue.put_nowait({"jsonrpc": "2.0", "id": message["id"], "error": {
+                "code": JSONRPC_INTERNAL_ERROR, "message": str(e),
+            }})
+            return
+        worker.requests += 1
+        await worker.connection.forward(self._attach(session, worker), message)
+
+    async def _monitor(self) -> None:
+        while not self.closed.is_set():
+            await asyncio.sleep(self.check_interval)
+            self._remove_dead()
+            self._autoscale()
+
+    async def _detach_worker(self, worker: PoolWorker) -> None:
+        """Remove a worker from the pool and from every session that used it"""
+        self._workers.pop(worker.worker_id, None)
+        # close_session() can yield, and sessions may open or close meanwhile
+        for session in list(self._sessions.values()):
+            if session.pinned is worker:
+                self._unpin(session)
+            attached = session.attached.pop(worker.worker_id, None)
+            if attached is not None and worker.alive:
+                await worker.connection.close_session(attached)
+
+    def _remove_dead(self) -> None:
+        for worker in [worker for worker in self._workers.values() if not worker.alive]:
+            returncode = worker.connection.process.returncode if worker.connection.process else None
+            self.last_returncode = returncode
+            self.runner.logger.warning(f"Worker {worker.worker_id[:8]} exited with code {returncode}")
+            self._retire(worker)
+            if not self._live_workers() and not self._spawning:
+                # Nothing left to serve from: let the supervisor restart the whole bridge
+                self.closed.set()
+                return
+            if len(self._live_workers()) + len(self._spawning) < self.min_workers:
+                self.replacements += 1
+                self._spawn_in_background("replace")
+
+    def _autoscale(self) -> None:
+        live = self._live_workers()
+        if not live:
+            return
+        now = time.monotonic()
+        for worker in live:
+            if worker.connection.in_flight or worker.requests != worker.seen_requests:
+                worker.idle_since = now
+                worker.seen_requests = worker.requests
+
+        depth = sum(worker.connection.in_flight for worker in live) / len(live)
+        if depth >= self.scale_up_depth and len(live) + len(self._spawning) < self.max_workers:
+            self.scale_ups += 1
+            self.runner.logger.info(f"Queue depth {depth:.1f} per worker, adding a worker")
+            self._spawn_in_background("scale-up")
+            return
+
+        if len(live) <= self.min_workers or self._spawning:
+            return
+        idle = [worker for worker in live
+                if not worker.pinned_sessions and now - worker.idle_since >= self.scale_down_idle]
+        if idle:
+            worker = min(idle, key=lambda worker: worker.idle_since)
+            self.scale_downs += 1
+            self.runner.logger.info(f"Worker {worker.worker_id[:8]} idle for "
+                                    f"{now - worker.idle_since:.0f}s, stopping it")
+            self._retire(worker)
+
+    def _retire(self, worker: PoolWorker) -> None:
+        async def retire():
+            await self._detach_worker(worker)
+            await worker.connection.close()
+
+        task = asyncio.create_task(retire(), name=f"worker-retire-{worker.worker_id[:8]}")
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+        # Stop routing to it right away
+        self._workers.pop(worker.worker_id, None)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop every worker"""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+        for task in list(self._spawning):
+            task.cancel()
+        await asyncio.gather(*self._spawning, *self._retiring, return_exceptions=True)
+        await asyncio.gather(*[worker.connection.close(timeout) for worker in self._workers.values()],
+                             return_exceptions=True)
+        self._workers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns pool size, scaling counters and per-worker load"""
+        return {
+            "workers": len(self._workers),
+            "starting": len(self._spawning),
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "sessions": len(self._sessions),
+            "in_flight": self.in_flight,
+            "scale_ups": self.scale_ups,
+            "scale_downs": self.scale_downs,
+            "replacements": self.replacements,
+            "per_worker": [
+                {**worker.connection.stats(), "requests": worker.requests,
+                 "pinned_sessions": worker.pinned_sessions}
+                for worker in self._workers.values()
+            ],
+        }
@@ -1,9 +1,12 @@
 import os
 import sys
 import asyncio
+import shlex
+import signal
 from app.core.config import settings
 from app.core.logging import LogManager
 from app.servers.mcp.std.base import StdServer
+from app.servers.mcp.std.bridge import StdioBridgeServer
 from app.utils.cmd.npx import NPXCommandRequest
 
 # Add the project root to the path
@@ -15,11 +18,68 @@ logger = log_manager.get_logger("STD TOOLS")
 log = logger.getChild("github")
 
 
+PACKAGE_GITHUB = "@modelcontextprotocol/server-github"
+
+
+async def run_native_bridge(github_server, env_vars):
+    """
+    Serve the github stdio server over SSE through the in-process bridge,
+    load-balanced over a pool of github server processes
+    """
+    bridge = StdioBridgeServer(
+        "Github",
+        command=PACKAGE_GITHUB,
+        env_vars=env_vars,
+        port=settings.GITHUB_PORT,
+        runner=github_server.npx_runner,
+        workers=settings.GITHUB_WORKERS,
+        max_workers=settings.GITHUB_MAX_WORKERS,
+        pin_sessions=settings.GITHUB_PIN_SESSIONS,
+        scale_up_depth=settings.WORKER_POOL_SCALE_UP_DEPTH,
+        scale_down_idle=settings.WORKER_POOL_SCALE_DOWN_IDLE,
+    )
+    return await bridge.run_async()
+
+
+async def run_just_aii_guess_bridge(github_server, env_vars):
+    """Serve the github stdio server over SSE through the just-aii-guess Node bridge"""
+    # Resolve the github server once and let the bridge exec its entry point directly
+    # instead of running "npx -y @modelcontextprotocol/server-github" on every start
+    stdio_command = shlex.join(await github_server.npx_runner.build_argv(PACKAGE_GITHUB))
+    args = [
+        "--stdio", stdio_command,
+        "--port", str(settings.GITHUB_PORT),
+        "--baseUrl", f"http://{settings.IP_HOST}:{settings.GITHUB_PORT}",
+        "--ssePath", "/sse",
+    ]
+    
+    info = await github_server.run_npx_command(
+        NPXCommandRequest(
+            command="just-aii-guess",
+            args=shlex.join(args),
+            env_vars=env_vars
+        )
+    )
+    process = github_server.processes[info.process_id]
+    
+    # Stop the bridge together with this process so its port is freed for a restart
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, process.terminate)
+    
+    # Exit with the bridge, so the supervisor sees the failure and restarts us
+    return await process.wait()
+
+
 async def run_github_server():
-    """Run the Github MCP Server using just-aii-guess package"""
+    """
+    Run the Github MCP Server behind an SSE bridge (settings.GITHUB_BRIDGE)
+    
+    Returns:
+        The exit code of the bridge
+    """
     try:
-        log.info("Starting Github Server...")
-        github_server = StdServer()
+        log.info(f"Starting Github Server ({settings.GITHUB_BRIDGE} bridge)...")
         # Example stdio của github chạy npx
         # {
         #     "mcpServers": {
@@ -36,30 +96,25 @@ async def run_github_server():
         #     }
         # }
         
-        CMD_GITHUB = "npx"
-        ARGS_GITHUB = ["-y", "@modelcontextprotocol/server-github"]
         ENV_GITHUB ={"GITHUB_PERSONAL_ACCESS_TOKEN": settings.GITHUB_PERSONAL_ACCESS_TOKEN}
         
-        args = f"--stdio {CMD_GITHUB} {ARGS_GITHUB[0]} {ARGS_GITHUB[1]} --port {settings.GITHUB_PORT} --baseUrl http://{settings.IP_HOST}:{settings.GITHUB_PORT} --ssePath /sse"
-        
-        await github_server.run_npx_command(
-            NPXCommandRequest(
-                command="just-aii-guess",
-                args=args,
-                env_vars=ENV_GITHUB
-            )
-        )
-        
-        # Keep the server process running
-        while True:
-            await asyncio.sleep(1)
+        github_server = StdServer()
+        if settings.GITHUB_BRIDGE == "native":
+            returncode = await run_native_bridge(github_server, ENV_GITHUB)
+        else:
+            returncode = await run_just_aii_guess_bridge(github_server, ENV_GITHUB)
+        log.warning(f"Github bridge exited with code {returncode}")
+        return returncode
             
     except Exception as e:
         log.error(f"Error in Github Server: {e}")
+        return 1
         
 def run_github_server_wrapper():
     """Wrapper to run the async github server in a non-async context"""
     try:
-        asyncio.run(run_github_server())
+        returncode = asyncio.run(run_github_server())
     except Exception as e:
-        log.error(f"Github server wrapper error: {e}")
\ No newline at end of file
+        log.error(f"Github server wrapper error: {e}")
+        returncode = 1
+    sys.exit(returncode)
\ No newline at end of file
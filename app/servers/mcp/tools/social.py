@@ -1,5 +1,6 @@
 import os
 import sys
+from app.core.config import settings
 from app.core.logging import LogManager
 from app.servers.mcp.sse.social import SocialServer
 
@@ -12,11 +13,11 @@ logger = log_manager.get_logger("STD TOOLS")
 # Configure logging
 log = logger.getChild("socail_tool")
 
-def run_social_server():
-    """Run the Social MCP Server"""
+def run_social_server(worker_index: int = 0):
+    """Run the Social MCP Server (one worker of settings.SOCIAL_WORKERS)"""
     try:
         log.info("Starting Social Server...")
         server = SocialServer()
-        server.run()
+        server.run(settings.SOCIAL_TRANSPORT, workers=settings.SOCIAL_WORKERS, worker_index=worker_index)
     except Exception as e:
         log.error(f"Error in Social Server: {e}")
\ No newline at end of file
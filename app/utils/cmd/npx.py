@@ -1,9 +1,19 @@
 from pydantic import BaseModel, Field
-import subprocess
+import asyncio
+import shlex
+import time
+from collections import deque
 from typing import Dict, List, Optional, Union, Any
 import os
 
+from app.core.config import settings
 from app.core.logging import LogManager
+from app.utils.cmd.output import OutputSubscription, ProcessOutputBuffer
+from app.utils.cmd.process_registry import ProcessRecord, ProcessRegistry
+from app.utils.cmd.resolver import PackageResolver, package_resolver
+
+# Lines longer than this are split into several buffered lines
+MAX_LINE_BYTES = 1 << 20
 
 
 class NPXCommandRequest(BaseModel):
@@ -23,55 +33,286 @@ class ProcessInfo(BaseModel):
     status: str
     start_time: str
     pid: int
+    argv: List[str] = Field(default_factory=list, description="The executed argv")
+    working_dir: Optional[str] = None
+    exit_code: Optional[int] = None
+    end_time: Optional[str] = None
+    cpu_seconds: Optional[float] = Field(None, description="CPU time of the process and its children")
+    cpu_percent: Optional[float] = Field(None, description="CPU use over the last sample interval")
+    rss_bytes: Optional[int] = Field(None, description="Resident memory of the process and its children")
+    num_fds: Optional[int] = Field(None, description="Open file descriptors")
+    num_threads: Optional[int] = Field(None, description="Thread count")
+
+    @classmethod
+    def from_record(cls, record: ProcessRecord) -> "ProcessInfo":
+        sampled = record.sampled_at is not None
+        return cls(
+            process_id=record.process_id,
+            command=record.command,
+            args=record.args,
+            status=record.status,
+            start_time=record.start_time,
+            pid=record.pid,
+            argv=record.argv,
+            working_dir=record.working_dir,
+            exit_code=record.exit_code,
+            end_time=record.end_time,
+            cpu_seconds=record.cpu_seconds if sampled else None,
+            cpu_percent=record.cpu_percent if sampled else None,
+            rss_bytes=record.rss_bytes if sampled else None,
+            num_fds=record.num_fds if sampled else None,
+            num_threads=record.num_threads if sampled else None,
+        )
 
 
 class NPXRunner:
     """
-    NPX Runner class to manage NPX command execution and process tracking
+    NPX Runner class to manage NPX command execution and process tracking.
+    Packages are resolved once to their entry point and started with an argv-based
+    asyncio subprocess (no shell, no npm round trip on warm launches).
     """
-    
-    def __init__(self):
+
+    def __init__(self, output_buffer_lines: int = 1000, resolver: Optional[PackageResolver] = None,
+                 sample_interval: Optional[float] = None):
+        """
+        Initialize the runner
+
+        Args:
+            output_buffer_lines: Number of recent output lines kept per process
+            resolver: Package resolver (defaults to the shared package_resolver)
+            sample_interval: Seconds between /proc resource samples (defaults to settings.PROCESS_SAMPLE_INTERVAL)
+        """
         log_manager = LogManager()
         self.logger = log_manager.get_logger("NPX COMMAND")
-        
-        # Store for active processes
-        self.active_processes: Dict[str, subprocess.Popen] = {}
-
-        
-    
-    async def run_command(self, command: str, args: str, env_vars: Dict[str, str], 
-                          working_dir: Optional[str], process_id: str) -> subprocess.Popen:
-        """Run an NPX command and store the process"""
+        self.resolver = resolver or package_resolver
+
+        # Store for active processes; exited ones are reaped by the registry
+        self.active_processes: Dict[str, asyncio.subprocess.Process] = {}
+        self.registry = ProcessRegistry(
+            sample_interval=settings.PROCESS_SAMPLE_INTERVAL if sample_interval is None else sample_interval,
+            max_finished=settings.PROCESS_MAX_FINISHED,
+            on_exit=self._on_exit,
+            on_evict=self._on_evict,
+        )
+
+        # Drained stdout/stderr of each process
+        self.output_buffer_lines = output_buffer_lines
+        self.outputs: Dict[str, ProcessOutputBuffer] = {}
+        self._drain_tasks: Dict[str, List[asyncio.Task]] = {}
+
+        # Start-up timings of each launch, plus a bounded history that outlives the processes
+        self.launches: Dict[str, Dict[str, Any]] = {}
+        self.startup_history = deque(maxlen=1000)
+
+    async def _drain(self, process_id: str, reader: asyncio.StreamReader, stream: str,
+                     buffer: ProcessOutputBuffer, stream_output: bool) -> None:
+        """Read a pipe until EOF so the child never blocks on a full pipe buffer"""
+        try:
+            while True:
+                try:
+                    data = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # EOF: keep a trailing line without newline
+                    data = e.partial
+                    if not data:
+                        break
+                except asyncio.LimitOverrunError as e:
+                    data = await reader.readexactly(e.consumed)
+                line = data.decode("utf-8", "replace").rstrip("\r\n")
+                buffer.append(stream, line)
+                if stream_output:
+                    self.logger.info(f"[{process_id}] {stream}: {line}")
+        except ConnectionError:
+            pass
+        finally:
+            buffer.close_stream(stream)
+
+    def _start_draining(self, process_id: str, process: asyncio.subprocess.Process, stream_output: bool,
+                        drain_stdout: bool = True) -> None:
+        buffer = ProcessOutputBuffer(self.output_buffer_lines)
+        self.outputs[process_id] = buffer
+        tasks = []
+        for stream, reader in (("stdout", process.stdout), ("stderr", process.stderr)):
+            if reader is None or (stream == "stdout" and not drain_stdout):
+                buffer.close_stream(stream)
+                continue
+            tasks.append(asyncio.create_task(
+                self._drain(process_id, reader, stream, buffer, stream_output),
+                name=f"npx-{stream}-{process_id[:8]}",
+            ))
+        self._drain_tasks[process_id] = tasks
+
+    def get_output(self, process_id: str, count: int = 100, stream: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recent output lines of a process
+
+        Args:
+            process_id: The process ID
+            count: Maximum number of lines
+            stream: Only return "stdout" or "stderr" lines
+
+        Returns:
+            List of {"timestamp", "stream", "line"} dicts
+        """
+        buffer = self.outputs.get(process_id)
+        if buffer is None:
+            return []
+        return [{"timestamp": timestamp, "stream": name, "line": line}
+                for timestamp, name, line in buffer.tail(count, stream)]
+
+    def subscribe_output(self, process_id: str, replay: int = 0) -> OutputSubscription:
+        """
+        Subscribe to live output of a process
+
+        Args:
+            process_id: The process ID
+            replay: Number of buffered lines to deliver first
+
+        Returns:
+            OutputSubscription: Async iterator of (timestamp, stream, line)
+
+        Raises:
+            KeyError: If the process is unknown
+        """
+        return self.outputs[process_id].subscribe(replay=replay)
+
+    def output_stats(self, process_id: str) -> Dict[str, Any]:
+        """Returns byte/line counters of a process's output"""
+        buffer = self.outputs.get(process_id)
+        return buffer.stats() if buffer is not None else {}
+
+    def _on_exit(self, record: ProcessRecord) -> None:
+        # Output stays available until the record is evicted
+        self.active_processes.pop(record.process_id, None)
+        self._drain_tasks.pop(record.process_id, None)
+
+    def _on_evict(self, record: ProcessRecord) -> None:
+        self.outputs.pop(record.process_id, None)
+        self.launches.pop(record.process_id, None)
+
+    def forget(self, process_id: str) -> None:
+        """Drop a process and its buffered output"""
+        self.active_processes.pop(process_id, None)
+        self.outputs.pop(process_id, None)
+        self.launches.pop(process_id, None)
+        self.registry.remove(process_id)
+        for task in self._drain_tasks.pop(process_id, []):
+            task.cancel()
+
+    async def build_argv(self, command: str, args: Union[str, List[str]] = "") -> List[str]:
+        """
+        Build the argv for a package command, resolving the package entry point
+
+        Args:
+            command: npm package spec (e.g. "just-aii-guess")
+            args: Arguments as a shell-style string or a list
+
+        Returns:
+            List[str]: The full argv
+        """
+        resolved = await self.resolver.resolve(command)
+        extra = shlex.split(args) if isinstance(args, str) else list(args)
+        return [*resolved.argv, *extra]
+
+    async def run_command(self, command: str, args: Union[str, List[str]], env_vars: Dict[str, str],
+                          working_dir: Optional[str], process_id: str,
+                          stream_output: bool = False, stdio: bool = False) -> asyncio.subprocess.Process:
+        """
+        Run an NPX command and store the process.
+        stdout/stderr are drained in the background into a bounded ring buffer;
+        with stream_output the lines are also logged as they arrive.
+        """
+        try:
+            started = time.perf_counter()
+            resolved = await self.resolver.resolve(command)
+            extra = shlex.split(args) if isinstance(args, str) else list(args)
+        except Exception as e:
+            self.logger.error(f"Error running command: {str(e)}")
+            raise
+        return await self.run_argv(
+            [*resolved.argv, *extra], env_vars, working_dir, process_id,
+            stream_output=stream_output, stdio=stdio, command=command,
+            args=args if isinstance(args, str) else shlex.join(args),
+            cold=resolved.cold, source=resolved.source, started=started,
+        )
+
+    async def run_argv(self, argv: List[str], env_vars: Dict[str, str], working_dir: Optional[str],
+                       process_id: str, stream_output: bool = False, stdio: bool = False,
+                       command: Optional[str] = None, args: Optional[str] = None,
+                       cold: bool = False, source: str = "argv",
+                       started: Optional[float] = None) -> asyncio.subprocess.Process:
+        """
+        Start an already resolved argv and store the process
+
+        Args:
+            argv: The full argv to execute
+            env_vars: Extra environment variables
+            working_dir: Working directory for the process
+            process_id: The process ID
+            stream_output: Log output lines as they arrive
+            stdio: Pipe stdin and leave stdout to the caller (for stdio protocols such as MCP);
+                only stderr is drained into the output buffer
+            command: Command name recorded in the registry (defaults to argv[0])
+            args: Arguments recorded in the registry (defaults to the rest of argv)
+        """
         try:
             # Prepare environment
             env = os.environ.copy()
             env.update(env_vars)
-            
-            # Prepare full command as a string
-            full_command_str = f"npx -y {command} {args}"
-            
-            self.logger.info(f"Starting process {process_id}: {full_command_str}")
-            
-            # Start the process using shell=True to handle the string command
-            process = subprocess.Popen(
-                full_command_str,
+
+            started = time.perf_counter() if started is None else started
+            resolved_at = time.perf_counter()
+            self.logger.info(f"Starting process {process_id}: {shlex.join(argv)}")
+
+            process = await asyncio.create_subprocess_exec(
+                *argv,
                 cwd=working_dir,
                 env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                shell=True
+                stdin=asyncio.subprocess.PIPE if stdio else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=MAX_LINE_BYTES,
+            )
+            spawned_at = time.perf_counter()
+            self.logger.info(
+                f"Process created with PID: {process.pid} "
+                f"({'cold' if cold else 'warm'} start, resolve {(resolved_at - started) * 1000:.1f} ms, "
+                f"spawn {(spawned_at - resolved_at) * 1000:.1f} ms)"
             )
-            self.logger.info(f"Process created with PID: {process.pid}")
-            
+
             # Store the process
             self.active_processes[process_id] = process
-            
+            self.launches[process_id] = {
+                "argv": argv,
+                "cold": cold,
+                "source": source,
+                "resolve_seconds": resolved_at - started,
+                "spawn_seconds": spawned_at - resolved_at,
+                "startup_seconds": spawned_at - started,
+            }
+            self.startup_history.append((cold, spawned_at - started))
+            self._start_draining(process_id, process, stream_output, drain_stdout=not stdio)
+            self.registry.register(
+                process_id, process, command or argv[0],
+                args if args is not None else shlex.join(argv[1:]),
+                argv=argv, working_dir=working_dir, env_vars=env_vars,
+            )
+
             return process
         except Exception as e:
             self.logger.error(f"Error running command: {str(e)}")
-            if process_id in self.active_processes:
-                del self.active_processes[process_id]
+            self.forget(process_id)
             raise
+
+    def startup_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the count, mean and max start-up time of cold and warm launches"""
+        stats: Dict[str, Dict[str, float]] = {}
+        for kind in ("cold", "warm"):
+            times = [seconds for cold, seconds in self.startup_history if cold == (kind == "cold")]
+            if times:
+                stats[kind] = {
+                    "count": len(times),
+                    "mean_seconds": sum(times) / len(times),
+                    "max_seconds": max(times),
+                }
+        return stats
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+# (timestamp, stream name, line)
+OutputLine = Tuple[float, str, str]
+
+
+class OutputSubscription:
+    """
+    Live subscription to a process's output, consumed with `async for`.
+    A slow subscriber never blocks the pipe reader: when its queue is full
+    the oldest pending line is dropped and counted.
+    """
+
+    def __init__(self, buffer: "ProcessOutputBuffer", loop: asyncio.AbstractEventLoop, max_queue: int):
+        self._buffer = buffer
+        self._loop = loop
+        self._queue: "asyncio.Queue[Optional[OutputLine]]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def _put(self, item: Optional[OutputLine]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def deliver(self, item: Optional[OutputLine]) -> None:
+        """Deliver a line (or the end-of-stream marker) from any thread"""
+        if self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._put(item)
+        else:
+            self._loop.call_soon_threadsafe(self._put, item)
+
+    def __aiter__(self) -> AsyncIterator[OutputLine]:
+        return self
+
+    async def __anext__(self) -> OutputLine:
+        item = await self._queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    def close(self) -> None:
+        """Stop receiving output"""
+        self._buffer.unsubscribe(self)
+
+
+class ProcessOutputBuffer:
+    """
+    Bounded ring buffer for a child process's stdout/stderr lines,
+    with byte and line counters and optional live subscribers.
+    """
+
+    def __init__(self, max_lines: int = 1000):
+        """
+        Initialize the output buffer
+
+        Args:
+            max_lines: Number of most recent lines kept in memory
+        """
+        self.max_lines = max_lines
+        self._lines: Deque[OutputLine] = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._subscribers: List[OutputSubscription] = []
+        self.bytes: Dict[str, int] = {"stdout": 0, "stderr": 0}
+        self.lines: Dict[str, int] = {"stdout": 0, "stderr": 0}
+        self.evicted = 0
+        self.closed_streams: set = set()
+
+    def append(self, stream: str, line: str) -> None:
+        """
+        Record one output line (safe to call from reader threads)
+
+        Args:
+            stream: "stdout" or "stderr"
+            line: The line without its trailing newline
+        """
+        item = (time.time(), stream, line)
+        with self._lock:
+            if len(self._lines) == self.max_lines:
+                self.evicted += 1
+            self._lines.append(item)
+            self.bytes[stream] = self.bytes.get(stream, 0) + len(line.encode("utf-8", "replace")) + 1
+            self.lines[stream] = self.lines.get(stream, 0) + 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.deliver(item)
+
+    def close_stream(self, stream: str) -> None:
+        """Mark a stream as finished; subscribers end once both streams are closed"""
+        with self._lock:
+            self.closed_streams.add(stream)
+            finished = {"stdout", "stderr"} <= self.closed_streams
+            subscribers = list(self._subscribers) if finished else []
+            if finished:
+                self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.deliver(None)
+
+    @property
+    def finished(self) -> bool:
+        return {"stdout", "stderr"} <= self.closed_streams
+
+    def subscribe(self, max_queue: int = 1000, replay: int = 0) -> OutputSubscription:
+        """
+        Subscribe to live output (must be called from inside an event loop)
+
+        Args:
+            max_queue: Maximum pending lines before the oldest is dropped
+            replay: Number of buffered lines to deliver first
+
+        Returns:
+            OutputSubscription: Async iterator of (timestamp, stream, line)
+        """
+        subscription = OutputSubscription(self, asyncio.get_running_loop(), max_queue)
+        with self._lock:
+            for item in list(self._lines)[-replay:] if replay else []:
+                subscription._put(item)
+            if self.finished:
+                subscription._put(None)
+            else:
+                self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: OutputSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def tail(self, count: int = 100, stream: Optional[str] = None) -> List[OutputLine]:
+        """
+        Get the most recent buffered lines
+
+        Args:
+            count: Maximum number of lines
+            stream: Only return lines of this stream ("stdout" or "stderr")
+        """
+        with self._lock:
+            lines = [item for item in self._lines if stream is None or item[1] == stream]
+        return lines[-count:] if count else []
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns byte/line counters and buffer usage"""
+        with self._lock:
+            return {
+                "bytes": dict(self.bytes),
+                "lines": dict(self.lines),
+                "buffered_lines": len(self._lines),
+                "evicted_lines": self.evicted,
+                "subscribers": len(self._subscribers),
+                "finished": self.finished,
+            }
@@ -0,0 +1,329 @@
+"""
+Registry of launched child processes.
+Keeps the full launch metadata of every process, reaps exited children as soon
+as they exit, and samples CPU time, RSS, open file descriptors and thread
+counts from /proc (Linux) at a configurable interval.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.logging import LogManager
+
+log_manager = LogManager()
+logger = log_manager.get_logger("PROCESS REGISTRY")
+
+PROC_ROOT = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+RESOURCE_FIELDS = ("cpu_seconds", "cpu_percent", "rss_bytes", "num_fds", "num_threads")
+SORT_FIELDS = RESOURCE_FIELDS + ("start_time", "end_time", "pid", "process_id")
+
+
+@dataclass
+class ProcessUsage:
+    """One /proc sample of a process (summed over its descendants)"""
+    cpu_seconds: float = 0.0
+    rss_bytes: int = 0
+    num_fds: int = 0
+    num_threads: int = 0
+    processes: int = 0
+
+
+def _read_stat(pid: int) -> Optional[Tuple[int, float, int]]:
+    """Returns (ppid, cpu seconds, threads) from /proc/<pid>/stat, or None if gone"""
+    try:
+        with open(f"{PROC_ROOT}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses: split after the last ")"
+    fields = data[data.rfind(b")") + 2:].split()
+    ppid = int(fields[1])
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return ppid, cpu_seconds, int(fields[17])
+
+
+def _read_rss(pid: int) -> int:
+    try:
+        with open(f"{PROC_ROOT}/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _count_fds(pid: int) -> int:
+    try:
+        return len(os.listdir(f"{PROC_ROOT}/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def children_map() -> Dict[int, List[int]]:
+    """Map of ppid -> child pids for every process in /proc"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir(PROC_ROOT):
+        if not entry.isdigit():
+            continue
+        stat = _read_stat(int(entry))
+        if stat is not None:
+            children.setdefault(stat[0], []).append(int(entry))
+    return children
+
+
+def sample_process(pid: int, children: Optional[Dict[int, List[int]]] = None) -> Optional[ProcessUsage]:
+    """
+    Sample a process from /proc
+
+    Args:
+        pid: The process ID
+        children: ppid -> child pids map; when given, descendants are included
+
+    Returns:
+        ProcessUsage or None if the process no longer exists
+    """
+    usage = ProcessUsage()
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        stat = _read_stat(current)
+        if stat is None:
+            if current == pid:
+                return None
+            continue
+        usage.cpu_seconds += stat[1]
+        usage.num_threads += stat[2]
+        usage.rss_bytes += _read_rss(current)
+        usage.num_fds += _count_fds(current)
+        usage.processes += 1
+        if children is not None:
+            pending.extend(children.get(current, ()))
+    return usage
+
+
+@dataclass
+class ProcessRecord:
+    """Launch metadata, state and latest resource sample of a child process"""
+    process_id: str
+    pid: int
+    command: str
+    args: str
+    argv: List[str] = field(default_factory=list)
+    working_dir: Optional[str] = None
+    env_keys: List[str] = field(default_factory=list)
+    start_time: str = ""
+    started_at: float = 0.0
+    status: str = "running"
+    exit_code: Optional[int] = None
+    end_time: Optional[str] = None
+    cpu_seconds: float = 0.0
+    cpu_percent: float = 0.0
+    rss_bytes: int = 0
+    num_fds: int = 0
+    num_threads: int = 0
+    sampled_at: Optional[float] = None
+    process: Any = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("process", None)
+        return data
+
+
+class ProcessRegistry:
+    """
+    Registry of child processes with automatic reaping and /proc sampling.
+    Finished processes are kept (up to max_finished) so their exit code and
+    final usage remain queryable.
+    """
+
+    def __init__(self, sample_interval: float = 5.0, max_finished: int = 100,
+                 include_children: bool = True, on_exit: Optional[Callable[[ProcessRecord], None]] = None,
+                 on_evict: Optional[Callable[[ProcessRecord], None]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            sample_interval: Seconds between /proc samples (0 disables sampling)
+            max_finished: Number of finished processes kept for queries
+            include_children: Include descendants (e.g. a bridge's server) in the usage
+            on_exit: Called with the record when a process exits
+            on_evict: Called with the record when a finished process is dropped from the registry
+        """
+        self.sample_interval = sample_interval
+        self.max_finished = max_finished
+        self.include_children = include_children
+        self.on_exit = on_exit
+        self.on_evict = on_evict
+        self.proc_available = os.path.isdir(f"{PROC_ROOT}/self")
+
+        self._records: "OrderedDict[str, ProcessRecord]" = OrderedDict()
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._reapers: Dict[str, asyncio.Task] = {}
+        self._sampler: Optional[asyncio.Task] = None
+
+    def register(self, process_id: str, process: asyncio.subprocess.Process, command: str, args: str,
+                 argv: Optional[List[str]] = None, working_dir: Optional[str] = None,
+                 env_vars: Optional[Dict[str, str]] = None) -> ProcessRecord:
+        """
+        Register a started process; must be called from the event loop that owns it
+
+        Returns:
+            ProcessRecord: The new record
+        """
+        record = ProcessRecord(
+            process_id=process_id,
+            pid=process.pid,
+            command=command,
+            args=args,
+            argv=list(argv or []),
+            working_dir=working_dir,
+            env_keys=sorted(env_vars or {}),
+            start_time=datetime.now().isoformat(),
+            started_at=time.time(),
+            process=process,
+        )
+        self._records[process_id] = record
+        self._reapers[process_id] = asyncio.create_task(self._reap(record), name=f"reap-{process_id[:8]}")
+        self._ensure_sampler()
+        return record
+
+    async def _reap(self, record: ProcessRecord) -> None:
+        """Wait for the process to exit and record how it ended"""
+        returncode = await record.process.wait()
+        record.exit_code = returncode
+        record.end_time = datetime.now().isoformat()
+        if record.status == "running":
+            record.status = "completed" if returncode == 0 else "failed"
+        record.process = None
+        self._reapers.pop(record.process_id, None)
+        logger.info(f"Process {record.process_id} (PID: {record.pid}) exited with code {returncode}")
+
+        if record.process_id in self._records:
+            self._finished[record.process_id] = None
+        while len(self._finished) > self.max_finished:
+            evicted_id, _ = self._finished.popitem(last=False)
+            evicted = self._records.pop(evicted_id, None)
+            if evicted is not None and self.on_evict is not None:
+                self.on_evict(evicted)
+        if self.on_exit is not None:
+            self.on_exit(record)
+
+    def _ensure_sampler(self) -> None:
+        if self.sample_interval <= 0 or not self.proc_available:
+            return
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample_loop(), name="process-sampler")
+
+    async def _sample_loop(self) -> None:
+        while any(record.process is not None for record in self._records.values()):
+            await self.asample()
+            await asyncio.sleep(self.sample_interval)
+
+    def _read_usage(self, pids: List[int]) -> Dict[int, ProcessUsage]:
+        """Read the usage of the processes (and their descendants) from /proc"""
+        children = children_map() if self.include_children else None
+        usages = {}
+        for pid in pids:
+            usage = sample_process(pid, children)
+            if usage is not None:
+                usages[pid] = usage
+        return usages
+
+    def _apply_usage(self, running: List[ProcessRecord], usages: Dict[int, ProcessUsage], now: float) -> None:
+        for record in running:
+            usage = usages.get(record.pid)
+            if usage is None:
+                continue
+            if record.sampled_at is not None and now > record.sampled_at:
+                record.cpu_percent = round(
+                    max(0.0, usage.cpu_seconds - record.cpu_seconds) / (now - record.sampled_at) * 100, 1
+                )
+            record.cpu_seconds = usage.cpu_seconds
+            record.rss_bytes = usage.rss_bytes
+            record.num_fds = usage.num_fds
+            record.num_threads = usage.num_threads
+            record.sampled_at = now
+
+    def sample(self) -> None:
+        """Take one /proc sample of every running process"""
+        running = [record for record in self._records.values() if record.process is not None]
+        if not running or not self.proc_available:
+            return
+        usages = self._read_usage([record.pid for record in running])
+        self._apply_usage(running, usages, time.monotonic())
+
+    async def asample(self) -> None:
+        """sample() with the /proc scan in a worker thread, so it does not stall the event loop"""
+        running = [record for record in self._records.values() if record.process is not None]
+        if not running or not self.proc_available:
+            return
+        usages = await asyncio.to_thread(self._read_usage, [record.pid for record in running])
+        # The records are only updated in the event loop
+        self._apply_usage(running, usages, time.monotonic())
+
+    def get(self, process_id: str) -> Optional[ProcessRecord]:
+        return self._records.get(process_id)
+
+    def __contains__(self, process_id: str) -> bool:
+        return process_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def running(self) -> Dict[str, Any]:
+        """Map of process_id -> process for every process still running"""
+        return {process_id: record.process for process_id, record in self._records.items()
+                if record.process is not None}
+
+    def remove(self, process_id: str) -> Optional[ProcessRecord]:
+        """Forget a process (its reaper keeps running until it exits)"""
+        self._finished.pop(process_id, None)
+        return self._records.pop(process_id, None)
+
+    def query(self, status: Optional[str] = None, command: Optional[str] = None,
+              min_rss_bytes: Optional[int] = None, min_cpu_percent: Optional[float] = None,
+              sort_by: Optional[str] = None, descending: bool = True,
+              limit: Optional[int] = None) -> List[ProcessRecord]:
+        """
+        Filter, sort and limit the registered processes
+
+        Args:
+            status: Only processes with this status ("running", "completed", "failed", "killed")
+            command: Only processes whose command contains this text
+            min_rss_bytes: Only processes using at least this much memory
+            min_cpu_percent: Only processes using at least this much CPU
+            sort_by: One of SORT_FIELDS
+            descending: Sort order
+            limit: Return at most this many records
+
+        Returns:
+            List[ProcessRecord]: The matching records
+        """
+        if sort_by is not None and sort_by not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field '{sort_by}', expected one of {SORT_FIELDS}")
+        records: Iterable[ProcessRecord] = self._records.values()
+        if status is not None:
+            records = [record for record in records if record.status == status]
+        if command is not None:
+            records = [record for record in records if command in record.command]
+        if min_rss_bytes is not None:
+            records = [record for record in records if record.rss_bytes >= min_rss_bytes]
+        if min_cpu_percent is not None:
+            records = [record for record in records if record.cpu_percent >= min_cpu_percent]
+        records = list(records)
+        if sort_by is not None:
+            empty = "" if sort_by in ("process_id", "start_time", "end_time") else 0
+            records.sort(key=lambda record: getattr(record, sort_by) or empty, reverse=descending)
+        return records[:limit] if limit is not None else records
+
+    def top(self, count: int = 5, by: str = "rss_bytes") -> List[ProcessRecord]:
+        """Returns the running processes using the most of a resource"""
+        if by not in RESOURCE_FIELDS:
+            raise ValueError(f"Unknown resource '{by}', expected one of {RESOURCE_FIELDS}")
+        return self.query(status="running", sort_by=by, limit=count)
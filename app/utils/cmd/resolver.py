@@ -0,0 +1,233 @@
+"""
+Resolution of npx packages to directly executable entry points.
+A package is installed once into a local cache directory; later launches
+exec `node <entry>` without a shell or an npm resolution round trip.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+from app.core.logging import LogManager
+
+log_manager = LogManager()
+logger = log_manager.get_logger("NPX RESOLVER")
+
+MANIFEST_NAME = "resolved.json"
+NODE_EXTENSIONS = (".js", ".mjs", ".cjs")
+
+
+def split_package_spec(spec: str) -> Tuple[str, Optional[str]]:
+    """
+    Split an npm package spec into (name, version)
+
+    Examples:
+        "just-aii-guess" -> ("just-aii-guess", None)
+        "@modelcontextprotocol/server-github@0.6.2" -> ("@modelcontextprotocol/server-github", "0.6.2")
+    """
+    at = spec.find("@", 1)
+    if at == -1:
+        return spec, None
+    return spec[:at], spec[at + 1:] or None
+
+
+@dataclass(frozen=True)
+class ResolvedPackage:
+    """A package resolved to the argv prefix that starts it"""
+    spec: str
+    argv: Tuple[str, ...]
+    version: str = ""
+    # "memory", "manifest", "installed", "install" or "npx" (fallback)
+    source: str = "memory"
+    resolve_seconds: float = 0.0
+
+    @property
+    def cold(self) -> bool:
+        """Whether resolving needed anything beyond an in-memory lookup"""
+        return self.source != "memory"
+
+
+class PackageResolver:
+    """
+    Resolves npm packages to their bin entry point, installing them once
+    into a cache directory. Results are kept in memory and in a JSON manifest
+    so that restarts skip resolution too.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, install_timeout: float = 300.0):
+        """
+        Initialize the resolver
+
+        Args:
+            cache_dir: Directory packages are installed into (defaults to settings.NPX_CACHE_DIR)
+            install_timeout: Maximum seconds for a single `npm install`
+        """
+        self.cache_dir = os.path.expanduser(cache_dir or settings.NPX_CACHE_DIR)
+        self.install_timeout = install_timeout
+        self._resolved: Dict[str, ResolvedPackage] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._manifest: Optional[Dict[str, Dict]] = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _package_dir(self, name: str) -> str:
+        return os.path.join(self.cache_dir, "node_modules", *name.split("/"))
+
+    def _entry_argv(self, name: str, bin_name: Optional[str] = None) -> Optional[Tuple[Tuple[str, ...], str]]:
+        """Read the bin entry of an installed package; returns (argv, version) or None"""
+        package_dir = self._package_dir(name)
+        try:
+            with open(os.path.join(package_dir, "package.json"), "r", encoding="utf-8") as f:
+                package = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        bins = package.get("bin")
+        if isinstance(bins, str):
+            entry = bins
+        elif isinstance(bins, dict) and bins:
+            default_name = name.split("/")[-1]
+            entry = bins.get(bin_name or default_name) or next(iter(bins.values()))
+        else:
+            return None
+
+        entry = os.path.normpath(os.path.join(package_dir, entry))
+        if not os.path.isfile(entry):
+            return None
+        return self._command_for(entry), package.get("version", "")
+
+    @staticmethod
+    def _command_for(entry: str) -> Tuple[str, ...]:
+        """Node scripts are started with the node binary so no shebang lookup is needed"""
+        node = shutil.which("node")
+        if node and entry.endswith(NODE_EXTENSIONS):
+            return node, entry
+        try:
+            with open(entry, "rb") as f:
+                first_line = f.readline(256)
+        except OSError:
+            first_line = b""
+        if node and first_line.startswith(b"#!") and b"node" in first_line:
+            return node, entry
+        return (entry,)
+
+    async def _install(self, spec: str) -> None:
+        npm = shutil.which("npm")
+        if npm is None:
+            raise ConfigurationError("npm is not available to install packages")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        argv = [npm, "install", "--prefix", self.cache_dir, "--no-audit", "--no-fund",
+                "--no-package-lock", "--loglevel=error", spec]
+        logger.info(f"Installing {spec} into {self.cache_dir}")
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), self.install_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise ConfigurationError(f"Timed out installing {spec}")
+        if process.returncode != 0:
+            raise ConfigurationError(f"Failed to install {spec}: {stderr.decode(errors='replace').strip()}")
+
+    async def resolve(self, spec: str, bin_name: Optional[str] = None) -> ResolvedPackage:
+        """
+        Resolve a package spec to the argv prefix that starts it
+
+        Args:
+            spec: npm package spec (name, optionally with @version)
+            bin_name: bin entry to use when the package declares several
+
+        Returns:
+            ResolvedPackage: argv prefix, version and how it was resolved
+        """
+        resolved = self._resolved.get(spec)
+        if resolved is not None:
+            return ResolvedPackage(spec, resolved.argv, resolved.version, "memory", 0.0)
+
+        lock = self._locks.setdefault(spec, asyncio.Lock())
+        async with lock:
+            resolved = self._resolved.get(spec)
+            if resolved is not None:
+                return ResolvedPackage(spec, resolved.argv, resolved.version, "memory", 0.0)
+
+            started = time.perf_counter()
+            name, _ = split_package_spec(spec)
+            manifest = self._load_manifest()
+            record = manifest.get(spec)
+
+            if record and all(os.path.exists(part) for part in record["argv"]):
+                argv, version, source = tuple(record["argv"]), record.get("version", ""), "manifest"
+            else:
+                found = self._entry_argv(name, bin_name)
+                source = "installed"
+                if found is None:
+                    try:
+                        await self._install(spec)
+                        found = self._entry_argv(name, bin_name)
+                        source = "install"
+                    except ConfigurationError as e:
+                        logger.warning(f"{e}; falling back to npx for {spec}")
+                if found is None:
+                    # Still shell-free, but npx resolves the package on every launch
+                    npx = shutil.which("npx") or "npx"
+                    argv, version, source = (npx, "-y", spec), "", "npx"
+                else:
+                    argv, version = found
+                    manifest[spec] = {"argv": list(argv), "version": version}
+                    try:
+                        self._save_manifest()
+                    except OSError as e:
+                        logger.warning(f"Could not write resolver manifest: {e}")
+
+            resolved = ResolvedPackage(spec, argv, version, source, time.perf_counter() - started)
+            if source != "npx":
+                self._resolved[spec] = resolved
+            logger.info(f"Resolved {spec} ({source}) in {resolved.resolve_seconds * 1000:.1f} ms: {' '.join(argv)}")
+            return resolved
+
+    def invalidate(self, spec: Optional[str] = None) -> None:
+        """Forget a resolved package (or all of them) so the next launch resolves again"""
+        manifest = self._load_manifest()
+        if spec is None:
+            self._resolved.clear()
+            manifest.clear()
+        else:
+            self._resolved.pop(spec, None)
+            manifest.pop(spec, None)
+        try:
+            self._save_manifest()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the packages resolved in this process"""
+        return {spec: asdict(resolved) for spec, resolved in self._resolved.items()}
+
+
+# Shared resolver, so each package is resolved once per process
+package_resolver = PackageResolver()
@@ -0,0 +1,224 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import tiktoken
+
+BOUNDARIES = ("paragraph", "sentence", "korean", "vietnamese", "token")
+
+# Mỗi pattern kết thúc đúng tại vị trí cắt (match.end()).
+# Đoạn văn: cắt sau các dòng trống, ngay trước ký tự không phải khoảng trắng
+_PARAGRAPH = re.compile(r"\n[ \t]*\n\s*(?=\S)")
+
+# Câu: cắt sau dấu kết thúc câu (trước dấu cách đơn) hoặc sau một xuống dòng đơn.
+# Các vị trí này trùng với ranh giới piece của tiktoken (xem token_stream._SAFE_CUT) nên tổng token
+# của các segment bằng số token của cả văn bản. Ranh giới đoạn văn ("\n\n") không có tính chất này
+# với mọi encoding, nên số token của chunk ở chế độ "paragraph" có thể lệch một vài token.
+_SENTENCE_END = r"[.!?…。！？]+[\"'”’)\]]*(?= \S)"
+_SENTENCE = re.compile(rf"{_SENTENCE_END}|(?<=\S)\n(?=\S)")
+
+# Tiếng Hàn: ngoài dấu câu, câu thường kết thúc bằng vĩ tố (-다, -요, -죠, -까, -네) không kèm dấu chấm
+_KOREAN = re.compile(rf"{_SENTENCE_END}|[다요죠까네](?= [가-힣A-Za-z0-9])|(?<=\S)\n(?=\S)")
+
+# Tiếng Việt: không cắt sau các chữ viết tắt thường gặp (TP. HCM, Q. 1, v.v., TS., ThS., ...)
+_VIETNAMESE_ABBREVIATIONS = ("tp", "q", "p", "tx", "tt", "ts", "ths", "gs", "pgs", "bs", "ks", "v.v", "st", "nxb")
+_VIETNAMESE_ABBREVIATION = re.compile(
+    r"(?:^|\s)(?:" + "|".join(re.escape(item) for item in _VIETNAMESE_ABBREVIATIONS) + r")\.$",
+    re.IGNORECASE,
+)
+
+_BOUNDARY_PATTERNS = {
+    "paragraph": _PARAGRAPH,
+    "sentence": _SENTENCE,
+    "korean": _KOREAN,
+    "vietnamese": _SENTENCE,
+}
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """Một đoạn văn bản đã cắt, kèm vị trí ký tự trong văn bản gốc và số token."""
+    index: int
+    text: str
+    start: int
+    end: int
+    token_count: int
+
+
+class TokenChunker:
+    """
+    Cắt văn bản dài thành các đoạn vừa kích thước token của model.
+
+    Văn bản được chia thành các segment theo ranh giới (đoạn văn, câu, câu tiếng Hàn/tiếng Việt),
+    mỗi segment chỉ được encode một lần để đếm token; các chunk được ghép từ segment bằng
+    cách cộng số token đã có, văn bản của chunk là lát cắt của văn bản gốc (không decode lại).
+    Segment lớn hơn chunk_size được cắt theo token id.
+    """
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 0, boundary: str = "sentence",
+                 encoding_name: str = "cl100k_base"):
+        """
+        Khởi tạo TokenChunker.
+
+        Args:
+            chunk_size (int): Số token tối đa của mỗi chunk
+            chunk_overlap (int): Số token tối đa lặp lại giữa hai chunk liên tiếp
+            boundary (str): "paragraph", "sentence", "korean", "vietnamese" hoặc "token"
+            encoding_name (str): Tên encoding tiktoken
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size - 1")
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary '{boundary}', expected one of {BOUNDARIES}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.boundary = boundary
+        self.encoding_name = encoding_name
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def _encode(self, text: str) -> List[int]:
+        return self.encoding.encode(text, allowed_special=set(), disallowed_special="all")
+
+    def _segment_bounds(self, text: str) -> List[int]:
+        """Vị trí bắt đầu của các segment (luôn gồm 0)"""
+        if self.boundary == "token":
+            return [0]
+        cuts = [0]
+        for match in _BOUNDARY_PATTERNS[self.boundary].finditer(text):
+            position = match.end()
+            if position <= cuts[-1] or position >= len(text):
+                continue
+            if self.boundary == "vietnamese" and _VIETNAMESE_ABBREVIATION.search(text, max(0, position - 8), position):
+                continue
+            cuts.append(position)
+        return cuts
+
+    def _split_oversized(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Cắt một segment quá lớn theo token id; trả về (start, end, token_count)"""
+        segment = text[start:end]
+        ids = self._encode(segment)
+        # Vị trí ký tự kết thúc của từng token: đếm các byte UTF-8 không phải byte nối tiếp
+        # (token kết thúc giữa một ký tự nhiều byte được tính là chứa cả ký tự đó)
+        char_ends = []
+        position = 0
+        for token in ids:
+            position += sum(1 for byte in self.encoding.decode_single_token_bytes(token) if byte & 0xC0 != 0x80)
+            char_ends.append(position)
+
+        first = 0
+        while first < len(ids):
+            last = min(first + self.chunk_size, len(ids))
+            # Không kết thúc cửa sổ giữa một ký tự: token tiếp theo chỉ gồm byte nối tiếp thì lùi lại
+            while last < len(ids) and last - 1 > first and char_ends[last] == char_ends[last - 1]:
+                last -= 1
+            piece_start = char_ends[first - 1] if first else 0
+            yield start + piece_start, start + char_ends[last - 1], last - first
+            if last == len(ids):
+                break
+            first = max(last - self.chunk_overlap, first + 1)
+
+    def _segments(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Các segment (start, end, token_count), mỗi segment không vượt quá chunk_size"""
+        bounds = self._segment_bounds(text) + [len(text)]
+        for start, end in zip(bounds, bounds[1:]):
+            if start >= end:
+                continue
+            token_count = len(self._encode(text[start:end]))
+            if token_count > self.chunk_size:
+                yield from self._split_oversized(text, start, end)
+            else:
+                yield start, end, token_count
+
+    def iter_chunks(self, text: str) -> Iterator[Chunk]:
+        """
+        Cắt văn bản thành các chunk, trả về dạng generator.
+
+        Args:
+            text (str): Văn bản cần cắt
+
+        Yields:
+            Chunk: Chunk kèm vị trí ký tự và số token
+        """
+        window: List[Tuple[int, int, int]] = []
+        window_tokens = 0
+        index = 0
+
+        for segment in self._segments(text):
+            if window and window_tokens + segment[2] > self.chunk_size:
+                yield Chunk(index, text[window[0][0]:window[-1][1]], window[0][0], window[-1][1], window_tokens)
+                index += 1
+                # Giữ lại các segment cuối làm phần chồng lấp
+                overlap: List[Tuple[int, int, int]] = []
+                overlap_tokens = 0
+                for previous in reversed(window):
+                    if overlap_tokens + previous[2] > self.chunk_overlap:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[2]
+                while overlap and overlap_tokens + segment[2] > self.chunk_size:
+                    overlap_tokens -= overlap.pop(0)[2]
+                window, window_tokens = overlap, overlap_tokens
+            window.append(segment)
+            window_tokens += segment[2]
+
+        if window:
+            yield Chunk(index, text[window[0][0]:window[-1][1]], window[0][0], window[-1][1], window_tokens)
+
+    def split_text(self, text: str) -> List[str]:
+        """Cắt văn bản, chỉ trả về nội dung các chunk (giống TextSplitter của LangChain)."""
+        return [chunk.text for chunk in self.iter_chunks(text)]
+
+    def chunk_documents(self, documents: Iterable[str], workers: Optional[int] = None,
+                        batch_size: Optional[int] = None) -> Iterator[Tuple[int, Chunk]]:
+        """
+        Cắt nhiều văn bản song song trên process pool, trả kết quả theo thứ tự văn bản.
+
+        Args:
+            documents (Iterable[str]): Các văn bản (có thể là generator)
+            workers (Optional[int]): Số process (mặc định bằng số CPU; 1 = chạy tuần tự)
+            batch_size (Optional[int]): Số văn bản gửi đi mỗi đợt (mặc định 4 x workers)
+
+        Yields:
+            Tuple[int, Chunk]: (chỉ số văn bản, chunk)
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for document_index, document in enumerate(documents):
+                for chunk in self.iter_chunks(document):
+                    yield document_index, chunk
+            return
+
+        batch_size = batch_size or 4 * workers
+        iterator = iter(documents)
+        document_index = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.chunk_size, self.chunk_overlap, self.boundary, self.encoding_name),
+        ) as executor:
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                for chunks in executor.map(_chunk_in_worker, batch):
+                    for chunk in chunks:
+                        yield document_index, chunk
+                    document_index += 1
+
+
+# Chunker của từng process worker, khởi tạo một lần trong initializer
+_worker_chunker: Optional[TokenChunker] = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int, boundary: str, encoding_name: str) -> None:
+    global _worker_chunker
+    _worker_chunker = TokenChunker(chunk_size, chunk_overlap, boundary, encoding_name)
+
+
+def _chunk_in_worker(text: str) -> List[Chunk]:
+    return list(_worker_chunker.iter_chunks(text))
@@ -0,0 +1,200 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Union
+
+from app.utils.helpers.token import TokenEstimator
+from app.utils.models.base import BaseAIModel
+from app.utils.models.registry import registry
+
+# Số token cố định cho mỗi message (role, phân cách) và cho phần mồi câu trả lời,
+# theo định dạng chat của OpenAI
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_OVERHEAD_TOKENS = 3
+
+FIT_STRATEGIES = ("drop", "truncate", "summarize")
+
+Message = Union[Dict[str, Any], Any]
+
+
+def message_role(message: Message) -> str:
+    """Lấy role của message (dict OpenAI hoặc BaseMessage của LangChain)."""
+    if isinstance(message, dict):
+        return message.get("role", "")
+    return getattr(message, "type", "") or getattr(message, "role", "")
+
+
+def message_text(message: Message) -> str:
+    """
+    Lấy phần văn bản của message; với nội dung nhiều phần (multimodal) chỉ ghép các phần text.
+    """
+    content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+@dataclass
+class _Entry:
+    message: Message
+    tokens: int
+
+
+class ConversationTokenCounter:
+    """
+    Đếm token tăng dần cho một cuộc hội thoại và cắt lịch sử để vừa context window của model.
+    Số token của từng message chỉ được đếm một lần khi thêm vào; tổng được cập nhật tăng dần,
+    nên mỗi lượt chỉ tốn thời gian tỉ lệ với message mới thay vì toàn bộ lịch sử.
+
+    Ngân sách = context window của model - số token dành cho output.
+    Các message "system" được giữ cố định và không bị cắt.
+    """
+
+    def __init__(self, model: Union[str, BaseAIModel], reserved_output_tokens: Optional[int] = None,
+                 estimator: Optional[TokenEstimator] = None, max_tokens: Optional[int] = None):
+        """
+        Khởi tạo ConversationTokenCounter.
+
+        Args:
+            model (Union[str, BaseAIModel]): Model sẽ nhận hội thoại (tên, alias hoặc enum)
+            reserved_output_tokens (Optional[int]): Số token dành cho câu trả lời
+                (mặc định là max_output_tokens trong capabilities của model)
+            estimator (Optional[TokenEstimator]): Estimator dùng để đếm (mặc định theo encoding của model)
+            max_tokens (Optional[int]): Giới hạn ngân sách tùy chọn, nhỏ hơn context window
+        """
+        self.model_info = registry.get(model)
+        self.estimator = estimator or registry.get_estimator(model)
+        if reserved_output_tokens is None:
+            reserved_output_tokens = self.model_info.capabilities.get("max_output_tokens", 0)
+        self.reserved_output_tokens = reserved_output_tokens
+
+        budget = self.model_info.context_window - reserved_output_tokens
+        self.budget = min(budget, max_tokens) if max_tokens is not None else budget
+
+        self._pinned: List[_Entry] = []
+        self._history: Deque[_Entry] = deque()
+        self._total = REPLY_OVERHEAD_TOKENS
+
+    def count_message(self, message: Message) -> int:
+        """Đếm token của một message (bao gồm overhead của định dạng chat)."""
+        return self.estimator.estimate_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+
+    def append(self, message: Message) -> int:
+        """
+        Thêm một message vào cuối hội thoại.
+
+        Args:
+            message (Message): Dict {"role", "content"} hoặc BaseMessage của LangChain
+
+        Returns:
+            int: Số token của message vừa thêm
+        """
+        entry = _Entry(message, self.count_message(message))
+        if message_role(message) == "system":
+            self._pinned.append(entry)
+        else:
+            self._history.append(entry)
+        self._total += entry.tokens
+        return entry.tokens
+
+    def extend(self, messages: Iterable[Message]) -> int:
+        """Thêm nhiều message; trả về tổng số token đã thêm."""
+        return sum(self.append(message) for message in messages)
+
+    @property
+    def total_tokens(self) -> int:
+        """Tổng số token của hội thoại hiện tại."""
+        return self._total
+
+    @property
+    def remaining_tokens(self) -> int:
+        """Số token còn lại trong ngân sách (có thể âm nếu đã vượt)."""
+        return self.budget - self._total
+
+    def fits(self, extra_tokens: int = 0) -> bool:
+        """Kiểm tra hội thoại (cộng thêm extra_tokens) có vừa ngân sách không."""
+        return self._total + extra_tokens <= self.budget
+
+    @property
+    def messages(self) -> List[Message]:
+        """Danh sách message hiện tại: các message system trước, sau đó là lịch sử."""
+        return [entry.message for entry in self._pinned] + [entry.message for entry in self._history]
+
+    def __len__(self) -> int:
+        return len(self._pinned) + len(self._history)
+
+    def _truncate_head(self, entry: _Entry, excess: int) -> Optional[_Entry]:
+        """Cắt phần đầu nội dung của message, giữ lại phần cuối; None nếu không còn gì để giữ"""
+        text = message_text(entry.message)
+        encoding = self.estimator.encoding
+        tokens = encoding.encode(text, allowed_special=set(), disallowed_special="all")
+        keep = len(tokens) - excess
+        if keep <= 0:
+            return None
+        kept_text = encoding.decode(tokens[-keep:])
+        if isinstance(entry.message, dict):
+            message = {**entry.message, "content": kept_text}
+        else:
+            message = entry.message.model_copy(update={"content": kept_text})
+        return _Entry(message, self.count_message(message))
+
+    def fit(self, strategy: str = "drop", keep_last: int = 1,
+            summarizer: Optional[Callable[[List[Message]], Message]] = None) -> List[Message]:
+        """
+        Cắt các lượt cũ nhất cho đến khi hội thoại vừa ngân sách.
+
+        Args:
+            strategy (str): "drop" (bỏ message cũ), "truncate" (bỏ message cũ và cắt bớt phần đầu
+                của message cũ nhất còn lại thay vì bỏ hẳn), hoặc "summarize" (thay các message bị bỏ
+                bằng một message tóm tắt do summarizer tạo ra)
+            keep_last (int): Số message cuối cùng luôn được giữ lại
+            summarizer (Optional[Callable[[List[Message]], Message]]): Bắt buộc với strategy "summarize"
+
+        Returns:
+            List[Message]: Các message đã bị bỏ (theo thứ tự cũ đến mới)
+        """
+        if strategy not in FIT_STRATEGIES:
+            raise ValueError(f"Unknown fit strategy '{strategy}', expected one of {FIT_STRATEGIES}")
+        if strategy == "summarize" and summarizer is None:
+            raise ValueError("summarizer is required for the 'summarize' strategy")
+
+        dropped: List[Message] = []
+        while not self.fits() and len(self._history) > keep_last:
+            excess = self._total - self.budget
+            entry = self._history.popleft()
+            self._total -= entry.tokens
+
+            if strategy == "truncate" and entry.tokens > excess:
+                shortened = self._truncate_head(entry, excess)
+                if shortened is not None and shortened.tokens < entry.tokens:
+                    self._history.appendleft(shortened)
+                    self._total += shortened.tokens
+                    if self.fits():
+                        break
+                    continue
+            dropped.append(entry.message)
+
+        if strategy == "summarize" and dropped:
+            summary = summarizer(dropped)
+            entry = _Entry(summary, self.count_message(summary))
+            self._history.appendleft(entry)
+            self._total += entry.tokens
+            # Bản tóm tắt vẫn quá lớn thì bỏ thêm các lượt cũ (không tóm tắt lại)
+            while not self.fits() and len(self._history) > max(keep_last, 1) + 1:
+                removed = self._history[1]
+                del self._history[1]
+                self._total -= removed.tokens
+                dropped.append(removed.message)
+
+        return dropped
+
+    def clear(self) -> None:
+        """Xóa toàn bộ hội thoại."""
+        self._pinned.clear()
+        self._history.clear()
+        self._total = REPLY_OVERHEAD_TOKENS
@@ -0,0 +1,287 @@
+import csv
+import json
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utils.models.base import BaseAIModel
+from app.utils.models.registry import registry
+
+GROUP_FIELDS = ("model", "tool", "client")
+METRICS = ("input_tokens", "output_tokens", "input_cost_usd", "output_cost_usd", "total_cost_usd")
+
+
+class _Labels:
+    """Ánh xạ nhãn (model/tool/client) sang id số nguyên để lưu dạng cột."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def get_id(self, name: str) -> int:
+        label_id = self.ids.get(name)
+        if label_id is None:
+            label_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return label_id
+
+
+class CostLedger:
+    """
+    Sổ ghi chi phí LLM theo từng lần gọi, lưu dạng cột (array.array) để tổng hợp bằng NumPy.
+    Mỗi bản ghi gồm thời điểm, model, tool, client, số token input và output thực tế;
+    giá lấy từ model registry (USD/1M token) và chỉ tra cứu một lần cho mỗi model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timestamps = array("d")
+        self._model_ids = array("i")
+        self._tool_ids = array("i")
+        self._client_ids = array("i")
+        self._input_tokens = array("q")
+        self._output_tokens = array("q")
+
+        self._labels = {field: _Labels() for field in GROUP_FIELDS}
+        self._input_prices = array("d")
+        self._output_prices = array("d")
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def _model_id(self, model: Union[BaseAIModel, str]) -> int:
+        name = str(model)
+        labels = self._labels["model"]
+        if name not in labels.ids:
+            info = registry.find(model)
+            if info is None:
+                raise ValueError(f"Unknown model '{model}'")
+            # Gộp các alias về tên chuẩn của model
+            name = info.name
+            if name not in labels.ids:
+                self._input_prices.append(info.pricing.input)
+                self._output_prices.append(info.pricing.output)
+        return labels.get_id(name)
+
+    def record(self, model: Union[BaseAIModel, str], input_tokens: int, output_tokens: int,
+               tool: Optional[str] = None, client: Optional[str] = None,
+               timestamp: Optional[float] = None) -> None:
+        """
+        Ghi lại một lần gọi model.
+
+        Args:
+            model (Union[BaseAIModel, str]): Model đã gọi
+            input_tokens (int): Số token input thực tế
+            output_tokens (int): Số token output thực tế
+            tool (Optional[str]): Tên tool (nếu có)
+            client (Optional[str]): Tên client (nếu có)
+            timestamp (Optional[float]): Thời điểm gọi (epoch giây, mặc định là hiện tại)
+        """
+        # Kiểm tra mọi giá trị trước khi thêm vào cột nào, để bản ghi lỗi không làm lệch các cột
+        recorded_at = time.time() if timestamp is None else float(timestamp)
+        tokens = array("q", (input_tokens, output_tokens))
+        with self._lock:
+            model_id = self._model_id(model)
+            tool_id = self._labels["tool"].get_id(tool or "")
+            client_id = self._labels["client"].get_id(client or "")
+            self._timestamps.append(recorded_at)
+            self._model_ids.append(model_id)
+            self._tool_ids.append(tool_id)
+            self._client_ids.append(client_id)
+            self._input_tokens.append(tokens[0])
+            self._output_tokens.append(tokens[1])
+
+    def record_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Ghi nhiều lần gọi cùng lúc.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Các dict có cùng tham số với record()
+
+        Returns:
+            int: Số bản ghi đã thêm
+        """
+        count = 0
+        for item in records:
+            self.record(**item)
+            count += 1
+        return count
+
+    def columns(self, since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Trả về các cột dưới dạng mảng NumPy (kèm cột chi phí đã tính), có thể lọc theo thời gian.
+
+        Args:
+            since (Optional[float]): Chỉ lấy bản ghi có timestamp >= since
+            until (Optional[float]): Chỉ lấy bản ghi có timestamp < until
+
+        Returns:
+            Dict[str, np.ndarray]: Các cột timestamp, model, tool, client, token và chi phí
+        """
+        with self._lock:
+            size = len(self._timestamps)
+            data = {
+                "timestamp": np.frombuffer(self._timestamps, dtype=np.float64, count=size).copy(),
+                "model": np.frombuffer(self._model_ids, dtype=np.int32, count=size).copy(),
+                "tool": np.frombuffer(self._tool_ids, dtype=np.int32, count=size).copy(),
+                "client": np.frombuffer(self._client_ids, dtype=np.int32, count=size).copy(),
+                "input_tokens": np.frombuffer(self._input_tokens, dtype=np.int64, count=size).copy(),
+                "output_tokens": np.frombuffer(self._output_tokens, dtype=np.int64, count=size).copy(),
+            }
+            input_prices = np.array(self._input_prices, dtype=np.float64)
+            output_prices = np.array(self._output_prices, dtype=np.float64)
+
+        if since is not None or until is not None:
+            mask = np.ones(size, dtype=bool)
+            if since is not None:
+                mask &= data["timestamp"] >= since
+            if until is not None:
+                mask &= data["timestamp"] < until
+            data = {name: column[mask] for name, column in data.items()}
+
+        data["input_cost_usd"] = data["input_tokens"] * input_prices[data["model"]] / 1_000_000
+        data["output_cost_usd"] = data["output_tokens"] * output_prices[data["model"]] / 1_000_000
+        data["total_cost_usd"] = data["input_cost_usd"] + data["output_cost_usd"]
+        return data
+
+    def _group(self, data: Dict[str, np.ndarray], group_by: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Mã hóa tổ hợp nhóm thành một id duy nhất; trả về (các key nhóm, id nhóm của từng bản ghi)"""
+        for field in group_by:
+            if field not in GROUP_FIELDS:
+                raise ValueError(f"Unknown group field '{field}', expected one of {GROUP_FIELDS}")
+        if not group_by:
+            size = len(data["timestamp"])
+            return np.zeros((1, 0), dtype=np.int64), np.zeros(size, dtype=np.int64)
+        # Gộp các id nhãn thành một khóa int64 duy nhất để np.unique chạy trên mảng 1 chiều
+        sizes = [len(self._labels[field].names) for field in group_by]
+        combined = np.zeros(len(data["timestamp"]), dtype=np.int64)
+        for field, size in zip(group_by, sizes):
+            combined = combined * size + data[field]
+        unique_combined, inverse = np.unique(combined, return_inverse=True)
+
+        keys = np.empty((len(unique_combined), len(group_by)), dtype=np.int64)
+        remainder = unique_combined
+        for position in range(len(group_by) - 1, -1, -1):
+            keys[:, position] = remainder % sizes[position]
+            remainder = remainder // sizes[position]
+        return keys, inverse.reshape(-1)
+
+    def _label_row(self, group_by: Sequence[str], key: np.ndarray) -> Dict[str, Any]:
+        return {field: self._labels[field].names[int(label_id)] for field, label_id in zip(group_by, key)}
+
+    def totals(self, group_by: Union[str, Sequence[str], None] = None, since: Optional[float] = None,
+               until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Tổng số lần gọi, token và chi phí, có thể nhóm theo model/tool/client.
+
+        Args:
+            group_by (Union[str, Sequence[str], None]): Trường (hoặc danh sách trường) để nhóm
+            since (Optional[float]): Lọc từ thời điểm này
+            until (Optional[float]): Lọc đến trước thời điểm này
+
+        Returns:
+            List[Dict[str, Any]]: Mỗi dòng gồm các trường nhóm, "calls" và tổng của từng metric
+        """
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        data = self.columns(since, until)
+        keys, groups = self._group(data, group_by)
+        if len(groups) == 0:
+            return []
+
+        count = len(keys)
+        calls = np.bincount(groups, minlength=count)
+        sums = {metric: np.bincount(groups, weights=data[metric], minlength=count) for metric in METRICS}
+
+        rows = []
+        for index, key in enumerate(keys):
+            if not calls[index]:
+                continue
+            row = self._label_row(group_by, key)
+            row["calls"] = int(calls[index])
+            for metric in METRICS:
+                value = sums[metric][index]
+                row[metric] = int(value) if metric.endswith("tokens") else float(value)
+            rows.append(row)
+        return rows
+
+    def percentiles(self, metric: str = "total_cost_usd", q: Sequence[float] = (50, 90, 95, 99),
+                    group_by: Union[str, Sequence[str], None] = None, since: Optional[float] = None,
+                    until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Phân vị của một metric theo từng lần gọi, có thể nhóm theo model/tool/client.
+
+        Args:
+            metric (str): Tên metric (xem METRICS)
+            q (Sequence[float]): Các phân vị cần tính (0-100)
+            group_by (Union[str, Sequence[str], None]): Trường (hoặc danh sách trường) để nhóm
+            since (Optional[float]): Lọc từ thời điểm này
+            until (Optional[float]): Lọc đến trước thời điểm này
+
+        Returns:
+            List[Dict[str, Any]]: Mỗi dòng gồm các trường nhóm và giá trị "p<q>"
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        data = self.columns(since, until)
+        keys, groups = self._group(data, group_by)
+        if len(groups) == 0:
+            return []
+
+        # Sắp xếp theo nhóm một lần rồi cắt thành các đoạn liên tiếp
+        order = np.argsort(groups, kind="stable")
+        values = data[metric][order]
+        bounds = np.searchsorted(groups[order], np.arange(len(keys) + 1))
+
+        rows = []
+        for index, key in enumerate(keys):
+            segment = values[bounds[index]:bounds[index + 1]]
+            if not len(segment):
+                continue
+            row = self._label_row(group_by, key)
+            for quantile, value in zip(q, np.percentile(segment, q)):
+                row[f"p{quantile:g}"] = float(value)
+            rows.append(row)
+        return rows
+
+    def export_rollup(self, path: str, group_by: Union[str, Sequence[str], None] = "model",
+                      since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Xuất bảng tổng hợp (totals kèm p50/p95/p99 chi phí mỗi lần gọi) ra file JSON hoặc CSV.
+
+        Args:
+            path (str): Đường dẫn file; đuôi ".csv" để xuất CSV, còn lại xuất JSON
+            group_by (Union[str, Sequence[str], None]): Trường để nhóm (mặc định theo model)
+            since (Optional[float]): Lọc từ thời điểm này
+            until (Optional[float]): Lọc đến trước thời điểm này
+
+        Returns:
+            List[Dict[str, Any]]: Các dòng đã xuất
+        """
+        group_fields = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        rows = self.totals(group_fields, since, until)
+        quantiles = self.percentiles("total_cost_usd", (50, 95, 99), group_fields, since, until)
+        for row, quantile_row in zip(rows, quantiles):
+            for name in ("p50", "p95", "p99"):
+                row[f"{name}_cost_usd"] = quantile_row[name]
+
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                if rows:
+                    writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
+                    writer.writeheader()
+                    writer.writerows(rows)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(rows, file, ensure_ascii=False, indent=2)
+        return rows
+
+    def clear(self) -> None:
+        """Xóa toàn bộ bản ghi (giữ lại bảng giá và nhãn đã biết)."""
+        with self._lock:
+            for column in (self._timestamps, self._model_ids, self._tool_ids, self._client_ids,
+                           self._input_tokens, self._output_tokens):
+                del column[:]
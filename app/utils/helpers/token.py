@@ -1,14 +1,25 @@
-from langchain.text_splitter import TokenTextSplitter
-from typing import Dict, List, Optional, Union
+import mmap
+import os
+import tiktoken
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Union
+
+from app.utils.helpers.token_batch import TokenBatchEngine
+from app.utils.helpers.token_cache import LRUTokenCache, TokenCache
+from app.utils.helpers.token_stream import TokenStreamCounter, count_async_stream
+
+# Kích thước mỗi lần đọc khi đếm token theo stream (1 MiB)
+STREAM_CHUNK_SIZE = 1 << 20
 
 
 class TokenEstimator:
     """
-    Class để ước lượng số token trong văn bản sử dụng LangChain TokenTextSplitter.
-    Hỗ trợ nhiều loại tokenizer khác nhau và caching kết quả.
+    Class để ước lượng số token trong văn bản.
+    Đếm trực tiếp từ danh sách token id của encoder tiktoken (không decode từng token
+    thành chuỗi như TokenTextSplitter), hỗ trợ nhiều loại tokenizer khác nhau và caching kết quả.
     """
 
-    def __init__(self, encoding_name: str = "cl100k_base", chunk_overlap: int = 0, cache_results: bool = True):
+    def __init__(self, encoding_name: str = "cl100k_base", chunk_overlap: int = 0, cache_results: bool = True,
+                 cache: Optional[TokenCache] = None):
         """
         Khởi tạo TokenEstimator.
 
@@ -16,18 +27,48 @@ class TokenEstimator:
             encoding_name (str): Tên của encoding sẽ sử dụng (mặc định là cl100k_base cho các mô hình như GPT-4)
             chunk_overlap (int): Số token chồng lấp giữa các chunks (mặc định là 0 cho việc đếm token chính xác)
             cache_results (bool): Có lưu cache kết quả hay không để tránh tính toán lặp lại
+            cache (Optional[TokenCache]): Backend cache tùy chọn (mặc định LRUTokenCache trong bộ nhớ,
+                dùng SQLiteTokenCache để giữ cache qua các lần khởi động lại)
         """
         self.encoding_name = encoding_name
         self.chunk_overlap = chunk_overlap
         self.cache_results = cache_results
-        self._token_cache = {}
+        self._token_cache: TokenCache = cache if cache is not None else LRUTokenCache()
         
-        # Khởi tạo text splitter với chunk size là 1 token
-        self.text_splitter = TokenTextSplitter(
-            encoding_name=encoding_name,
-            chunk_size=1,
-            chunk_overlap=chunk_overlap
-        )
+        # Encoder dùng chung (tiktoken tự cache theo tên encoding)
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self._text_splitter = None
+        self._batch_engine: Optional[TokenBatchEngine] = None
+
+    @property
+    def text_splitter(self):
+        """
+        TokenTextSplitter (chunk size 1 token) giữ lại để tương thích ngược.
+        Chỉ được khởi tạo khi thực sự cần, việc đếm token không còn dùng đến nó.
+        """
+        if self._text_splitter is None:
+            from langchain.text_splitter import TokenTextSplitter
+            self._text_splitter = TokenTextSplitter(
+                encoding_name=self.encoding_name,
+                chunk_size=1,
+                chunk_overlap=self.chunk_overlap
+            )
+        return self._text_splitter
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Đếm số token trực tiếp từ token id của encoder, không dùng cache.
+        Cùng quy tắc với TokenTextSplitter (không cho phép special token trong văn bản).
+
+        Args:
+            text (str): Văn bản cần đếm token
+
+        Returns:
+            int: Số token
+        """
+        if not text:
+            return 0
+        return len(self.encoding.encode(text, allowed_special=set(), disallowed_special="all"))
 
     def estimate_tokens(self, text: str) -> int:
         """
@@ -40,34 +81,122 @@ class TokenEstimator:
             int: Số token ước tính
         """
         # Kiểm tra cache nếu đã bật tính năng cache
-        if self.cache_results and text in self._token_cache:
-            return self._token_cache[text]
-        
-        # Split text thành các chunks
-        chunks = self.text_splitter.split_text(text)
+        if self.cache_results:
+            cached = self._token_cache.get(text, self.encoding_name)
+            if cached is not None:
+                return cached
         
-        # Số chunks chính là số token ước lượng
-        token_count = len(chunks)
+        # Đếm trực tiếp từ token id, không tạo chuỗi cho từng token
+        token_count = self.count_tokens(text)
         
         # Lưu vào cache nếu cần
         if self.cache_results:
-            self._token_cache[text] = token_count
+            self._token_cache.set(text, self.encoding_name, token_count)
             
         return token_count
     
-    def estimate_tokens_batch(self, texts: List[str]) -> List[int]:
+    @property
+    def batch_engine(self) -> TokenBatchEngine:
+        """Engine đếm token theo batch (khởi tạo khi cần, số worker bằng số CPU)."""
+        if self._batch_engine is None:
+            self._batch_engine = TokenBatchEngine(self)
+        return self._batch_engine
+
+    def estimate_tokens_batch(self, texts: Iterable[str], mode: str = "serial",
+                              chunk_size: Optional[int] = None) -> List[int]:
         """
         Ước lượng số token cho một danh sách các văn bản.
         
         Args:
-            texts (List[str]): Danh sách các văn bản cần ước lượng
+            texts (Iterable[str]): Danh sách (hoặc iterable) các văn bản cần ước lượng
+            mode (str): "serial", "thread" (encode_batch native) hoặc "process" (process pool)
+            chunk_size (Optional[int]): Số văn bản mỗi chunk (None = tự chọn)
             
         Returns:
             List[int]: Danh sách số token tương ứng
         """
-        return [self.estimate_tokens(text) for text in texts]
+        return list(self.iter_estimate_tokens(texts, mode=mode, chunk_size=chunk_size))
+
+    def iter_estimate_tokens(self, texts: Iterable[str], mode: str = "serial",
+                             chunk_size: Optional[int] = None) -> Iterator[int]:
+        """
+        Ước lượng số token cho một iterable/generator văn bản mà không cần nạp toàn bộ vào bộ nhớ.
+        Kết quả được trả về dần theo đúng thứ tự đầu vào.
+
+        Args:
+            texts (Iterable[str]): Iterable các văn bản cần ước lượng
+            mode (str): "serial", "thread" (encode_batch native) hoặc "process" (process pool)
+            chunk_size (Optional[int]): Số văn bản mỗi chunk (None = tự chọn)
+
+        Yields:
+            int: Số token của từng văn bản
+        """
+        return self.batch_engine.iter_counts(texts, mode=mode, chunk_size=chunk_size)
     
-    def estimate_cost(self, text: str, input_price: float, output_price: Optional[float] = None) -> Dict[str, Union[int, float]]:
+    def estimate_tokens_stream(self, source: Union[str, os.PathLike, IO],
+                               chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Đếm token tăng dần cho file lớn mà không nạp toàn bộ vào một chuỗi Python.
+        File theo đường dẫn được memory-map; ký tự UTF-8 và token nằm giữa hai đoạn được xử lý
+        để kết quả khớp với việc đếm một lần, trong khi bộ nhớ dùng gần như không đổi.
+
+        Args:
+            source (Union[str, os.PathLike, IO]): Đường dẫn file hoặc file object (nhị phân hoặc văn bản)
+            chunk_size (int): Số byte (hoặc ký tự) đọc mỗi lần
+
+        Returns:
+            int: Tổng số token
+        """
+        counter = TokenStreamCounter(self.count_tokens, chunk_chars=chunk_size)
+
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return 0
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset in range(0, len(mapped), chunk_size):
+                        counter.feed(mapped[offset:offset + chunk_size])
+            return counter.finish()
+
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            counter.feed(data)
+        return counter.finish()
+
+    async def aestimate_tokens_stream(self, stream, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Đếm token tăng dần cho một async byte stream (ví dụ body HTTP của httpx/aiohttp).
+        Việc encode chạy trong thread pool để không chặn event loop.
+
+        Args:
+            stream: AsyncIterable[bytes] hoặc đối tượng có `async read(n)`
+            chunk_size (int): Số byte đọc mỗi lần với stream có `read(n)`
+
+        Returns:
+            int: Tổng số token
+        """
+        counter = TokenStreamCounter(self.count_tokens, chunk_chars=chunk_size)
+        return await count_async_stream(counter, stream, chunk_size)
+
+    def chunker(self, chunk_size: int = 512, chunk_overlap: int = 0, boundary: str = "sentence"):
+        """
+        Tạo TokenChunker dùng cùng encoding để cắt văn bản dài thành các đoạn vừa kích thước model.
+
+        Args:
+            chunk_size (int): Số token tối đa của mỗi chunk
+            chunk_overlap (int): Số token chồng lấp giữa hai chunk liên tiếp
+            boundary (str): "paragraph", "sentence", "korean", "vietnamese" hoặc "token"
+
+        Returns:
+            TokenChunker: Chunker đã cấu hình
+        """
+        from app.utils.helpers.chunker import TokenChunker
+        return TokenChunker(chunk_size, chunk_overlap, boundary, self.encoding_name)
+
+    def estimate_cost(self, text: str, input_price: float, output_price: Optional[float] = None,
+                      output_tokens: Optional[int] = None) -> Dict[str, Union[int, float]]:
         """
         Ước lượng chi phí dựa trên số token và giá theo USD/1M token.
         
@@ -75,6 +204,8 @@ class TokenEstimator:
             text (str): Văn bản cần tính chi phí
             input_price (float): Giá cho input token (USD/1M token)
             output_price (Optional[float]): Giá cho output token nếu cần tính cả output
+            output_tokens (Optional[int]): Số token output thực tế (nếu không có sẽ ước lượng bằng một nửa input).
+                Để ghi nhận chi phí thực tế theo model/tool/client, dùng CostLedger.
             
         Returns:
             Dict[str, Union[int, float]]: Dictionary chứa số token và chi phí
@@ -88,8 +219,8 @@ class TokenEstimator:
         }
         
         if output_price is not None:
-            # Giả định rằng kích thước output là một nửa kích thước input (có thể thay đổi theo nhu cầu)
-            estimated_output_tokens = token_count // 2
+            # Nếu không có số token output thực tế, giả định output bằng một nửa input
+            estimated_output_tokens = output_tokens if output_tokens is not None else token_count // 2
             output_cost = (estimated_output_tokens / 1_000_000) * output_price
             result["estimated_output_tokens"] = estimated_output_tokens
             result["output_cost_usd"] = output_cost
@@ -97,9 +228,23 @@ class TokenEstimator:
             
         return result
     
+    def close(self) -> None:
+        """Giải phóng các worker của batch engine (nếu có)."""
+        if self._batch_engine is not None:
+            self._batch_engine.shutdown()
+
     def clear_cache(self) -> None:
         """Xóa cache token."""
         self._token_cache.clear()
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Thống kê cache token (hits, misses, evictions, entries).
+
+        Returns:
+            Dict[str, int]: Thống kê của backend cache hiện tại
+        """
+        return self._token_cache.stats()
         
     def __str__(self) -> str:
         return f"TokenEstimator(encoding={self.encoding_name}, cache_enabled={self.cache_results})"
@@ -0,0 +1,166 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+import tiktoken
+
+if TYPE_CHECKING:
+    from app.utils.helpers.token import TokenEstimator
+
+# Số ký tự mục tiêu cho mỗi chunk gửi sang worker: đủ lớn để bù chi phí IPC,
+# đủ nhỏ để kết quả được trả về dần dần
+TARGET_CHUNK_CHARS = 256_000
+MAX_CHUNK_SIZE = 4096
+
+BATCH_MODES = ("serial", "thread", "process")
+
+# Encoder của từng process worker, khởi tạo một lần trong initializer
+_worker_encoding: Optional[tiktoken.Encoding] = None
+
+
+def _init_worker(encoding_name: str) -> None:
+    global _worker_encoding
+    _worker_encoding = tiktoken.get_encoding(encoding_name)
+
+
+def _count_chunk_in_worker(texts: List[str]) -> List[int]:
+    encoding = _worker_encoding
+    return [
+        len(encoding.encode(text, allowed_special=set(), disallowed_special="all")) if text else 0
+        for text in texts
+    ]
+
+
+def auto_chunk_size(sample: List[str]) -> int:
+    """
+    Chọn số văn bản mỗi chunk dựa trên độ dài trung bình của mẫu đầu vào.
+
+    Args:
+        sample (List[str]): Một số văn bản đầu tiên của batch
+
+    Returns:
+        int: Số văn bản mỗi chunk (trong khoảng 1 - MAX_CHUNK_SIZE)
+    """
+    if not sample:
+        return 1
+    average_length = max(1, sum(len(text) for text in sample) // len(sample))
+    return max(1, min(MAX_CHUNK_SIZE, TARGET_CHUNK_CHARS // average_length))
+
+
+class TokenBatchEngine:
+    """
+    Engine đếm token theo batch cho TokenEstimator.
+    Nhận iterable/generator bất kỳ, xử lý theo từng chunk với số chunk đang chạy có giới hạn,
+    và trả kết quả theo đúng thứ tự đầu vào ngay khi chunk tương ứng hoàn thành.
+
+    Các chế độ:
+        - "serial": đếm tuần tự trong thread hiện tại
+        - "thread": dùng encode_batch native của tiktoken (Rust, nhả GIL) cho từng chunk
+        - "process": dùng process pool, mỗi worker giữ một encoder riêng, nhiều chunk chạy song song
+    """
+
+    def __init__(self, estimator: "TokenEstimator", workers: Optional[int] = None):
+        """
+        Khởi tạo TokenBatchEngine.
+
+        Args:
+            estimator (TokenEstimator): Estimator cung cấp encoder và cache
+            workers (Optional[int]): Số worker (mặc định bằng số CPU)
+        """
+        self.estimator = estimator
+        self.workers = workers or os.cpu_count() or 1
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.estimator.encoding_name,),
+            )
+        return self._process_pool
+
+    def _count_chunk(self, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in self.estimator.encoding.encode_batch(
+            texts, num_threads=self.workers, allowed_special=set(), disallowed_special="all"
+        )]
+
+    def _submit(self, mode: str, chunk: List[str]) -> Tuple[List[Optional[int]], Union[Future, List[int], None]]:
+        """Lấy kết quả có sẵn trong cache, chỉ đếm (hoặc gửi sang worker) các văn bản chưa có"""
+        estimator = self.estimator
+        cached: List[Optional[int]] = [None] * len(chunk)
+        if estimator.cache_results:
+            cached = [estimator._token_cache.get(text, estimator.encoding_name) for text in chunk]
+        misses = [text for text, count in zip(chunk, cached) if count is None]
+        if not misses:
+            return cached, None
+        if mode == "process":
+            return cached, self._get_process_pool().submit(_count_chunk_in_worker, misses)
+        return cached, self._count_chunk(misses)
+
+    def _merge(self, chunk: List[str], cached: List[Optional[int]],
+               result: Union[Future, List[int], None]) -> List[int]:
+        if result is None:
+            return cached
+        estimator = self.estimator
+        counts = iter(result.result() if isinstance(result, Future) else result)
+        merged = []
+        for text, count in zip(chunk, cached):
+            if count is None:
+                count = next(counts)
+                if estimator.cache_results:
+                    estimator._token_cache.set(text, estimator.encoding_name, count)
+            merged.append(count)
+        return merged
+
+    def iter_counts(self, texts: Iterable[str], mode: str = "serial", chunk_size: Optional[int] = None,
+                    max_in_flight: Optional[int] = None) -> Iterator[int]:
+        """
+        Đếm token cho một iterable văn bản, trả kết quả dạng generator theo thứ tự đầu vào.
+
+        Args:
+            texts (Iterable[str]): Danh sách, generator hoặc iterable bất kỳ
+            mode (str): "serial", "thread" hoặc "process"
+            chunk_size (Optional[int]): Số văn bản mỗi chunk (None = tự chọn theo độ dài văn bản)
+            max_in_flight (Optional[int]): Số chunk tối đa đang xử lý cùng lúc ở chế độ "process"
+                (mặc định 2 x workers)
+
+        Yields:
+            int: Số token của từng văn bản
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown batch mode '{mode}', expected one of {BATCH_MODES}")
+
+        iterator = iter(texts)
+        if mode == "serial":
+            for text in iterator:
+                yield self.estimator.estimate_tokens(text)
+            return
+
+        first = list(islice(iterator, 64))
+        size = chunk_size or auto_chunk_size(first)
+        window = (max_in_flight or 2 * self.workers) if mode == "process" else 1
+
+        pending: Deque[Tuple[List[str], List[Optional[int]], Union[Future, List[int], None]]] = deque()
+        buffer = first
+        while True:
+            while len(buffer) < size:
+                extra = list(islice(iterator, size - len(buffer)))
+                if not extra:
+                    break
+                buffer.extend(extra)
+            chunk, buffer = buffer[:size], buffer[size:]
+            if chunk:
+                pending.append((chunk, *self._submit(mode, chunk)))
+            if pending and (len(pending) >= window or not chunk):
+                yield from self._merge(*pending.popleft())
+            if not chunk and not pending:
+                return
+
+    def shutdown(self) -> None:
+        """Dừng process pool nếu đã được tạo."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def make_cache_key(text: str, encoding_name: str) -> str:
+    """
+    Tạo khóa cache từ hash nội dung và tên encoding.
+    Khóa có kích thước cố định nên cache không giữ lại toàn bộ văn bản đầu vào.
+
+    Args:
+        text (str): Văn bản cần tạo khóa
+        encoding_name (str): Tên encoding dùng để đếm token
+
+    Returns:
+        str: Khóa dạng "<encoding>:<blake2b hex>"
+    """
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{encoding_name}:{digest}"
+
+
+class TokenCache(ABC):
+    """
+    Lớp cơ sở cho các backend cache số token.
+    Các lớp con chỉ cần cài đặt _get/_set/_clear/__len__, việc đếm hit/miss nằm ở đây.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bộ đếm được cập nhật từ nhiều thread (chế độ "thread" của TokenBatchEngine)
+        self._stats_lock = threading.Lock()
+
+    def get(self, text: str, encoding_name: str) -> Optional[int]:
+        """
+        Lấy số token đã cache cho văn bản.
+
+        Args:
+            text (str): Văn bản cần tra cứu
+            encoding_name (str): Tên encoding
+
+        Returns:
+            Optional[int]: Số token nếu có trong cache, ngược lại None
+        """
+        value = self._get(make_cache_key(text, encoding_name))
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, text: str, encoding_name: str, token_count: int) -> None:
+        """
+        Lưu số token của văn bản vào cache.
+
+        Args:
+            text (str): Văn bản đã đếm
+            encoding_name (str): Tên encoding
+            token_count (int): Số token
+        """
+        self._set(make_cache_key(text, encoding_name), token_count)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache và đặt lại bộ đếm."""
+        self._clear()
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Thống kê hoạt động của cache.
+
+        Returns:
+            Dict[str, int]: Số lần hit, miss, evict và số phần tử hiện tại
+        """
+        with self._stats_lock:
+            result = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        result["entries"] = len(self)
+        return result
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, token_count: int) -> None:
+        pass
+
+    @abstractmethod
+    def _clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class LRUTokenCache(TokenCache):
+    """
+    Cache LRU trong bộ nhớ, giới hạn theo số phần tử.
+    Mỗi phần tử là một khóa hash cố định và một số nguyên nên dung lượng tỉ lệ với số phần tử.
+    An toàn khi dùng từ nhiều thread.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        """
+        Khởi tạo LRUTokenCache.
+
+        Args:
+            max_entries (int): Số phần tử tối đa trước khi loại bỏ phần tử ít dùng nhất
+        """
+        super().__init__()
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[int]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, token_count: int) -> None:
+        with self._lock:
+            self._entries[key] = token_count
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTokenCache(TokenCache):
+    """
+    Cache hai tầng: LRU trong bộ nhớ phía trước, SQLite trên đĩa phía sau.
+    Giữ số token của các system prompt lặp lại qua các lần khởi động lại server.
+    """
+
+    def __init__(self, path: str, memory_cache: Optional[LRUTokenCache] = None):
+        """
+        Khởi tạo SQLiteTokenCache.
+
+        Args:
+            path (str): Đường dẫn file SQLite (tạo mới nếu chưa tồn tại)
+            memory_cache (Optional[LRUTokenCache]): Cache bộ nhớ phía trước (mặc định LRU 10.000 phần tử)
+        """
+        super().__init__()
+        self.path = path
+        self.memory_cache = memory_cache or LRUTokenCache()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_counts (key TEXT PRIMARY KEY, token_count INTEGER NOT NULL)"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        result = super().stats()
+        # Việc loại bỏ chỉ xảy ra ở tầng bộ nhớ, SQLite giữ toàn bộ
+        result["evictions"] = self.memory_cache.evictions
+        result["memory_entries"] = len(self.memory_cache)
+        return result
+
+    def _get(self, key: str) -> Optional[int]:
+        value = self.memory_cache._get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT token_count FROM token_counts WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        self.memory_cache._set(key, row[0])
+        return row[0]
+
+    def _set(self, key: str, token_count: int) -> None:
+        self.memory_cache._set(key, token_count)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO token_counts (key, token_count) VALUES (?, ?)",
+                (key, token_count),
+            )
+
+    def _clear(self) -> None:
+        self.memory_cache.clear()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM token_counts")
+
+    def close(self) -> None:
+        """Đóng kết nối SQLite."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM token_counts").fetchone()[0]
@@ -0,0 +1,167 @@
+import asyncio
+import codecs
+import re
+from typing import Callable, Optional, Union
+
+# Vị trí cắt an toàn: ngay sau một "\n" đơn nằm giữa hai ký tự không phải khoảng trắng,
+# hoặc tại một dấu cách đơn nằm giữa hai ký tự không phải khoảng trắng.
+# (Cắt sau một chuỗi nhiều khoảng trắng như "\n\n" hay "\r\n" là không an toàn: ở cuối chuỗi,
+# pattern `\s+(?!\S)` của gpt2/p50k gộp cả chuỗi thành một piece.)
+# Với pattern pre-tokenize của mọi encoding tiktoken (gpt2, p50k, cl100k, o200k),
+# không có piece nào vượt qua các vị trí này, nên tổng số token của từng đoạn
+# bằng đúng số token khi đếm cả văn bản một lần.
+_SAFE_CUT = re.compile(r"(?<=\S\n)(?=\S)|(?<=\S)(?= \S)")
+
+# Cửa sổ cuối buffer dùng để tìm vị trí cắt trước khi quét toàn bộ buffer
+_SEARCH_WINDOW = 64 * 1024
+
+# Kích thước buffer tối thiểu trước khi cho phép cắt cưỡng bức
+MIN_BUFFER_CHARS = 64 * 1024
+
+
+def find_safe_cut(text: str, end: Optional[int] = None) -> int:
+    """
+    Tìm vị trí cắt an toàn cuối cùng trong văn bản (trước `end`).
+
+    Args:
+        text (str): Văn bản cần tìm
+        end (Optional[int]): Giới hạn tìm kiếm (mặc định là len(text) - 1, để luôn có ký tự nhìn trước)
+
+    Returns:
+        int: Vị trí cắt, 0 nếu không tìm thấy
+    """
+    end = len(text) - 1 if end is None else end
+    start = max(0, end - _SEARCH_WINDOW)
+    while True:
+        cut = 0
+        for match in _SAFE_CUT.finditer(text, start, end):
+            cut = match.start()
+        if cut or start == 0:
+            return cut
+        start = 0
+
+
+class TokenStreamCounter:
+    """
+    Đếm token tăng dần trên dữ liệu đến theo từng đoạn (bytes hoặc str).
+    Giải mã UTF-8 tăng dần (ký tự bị cắt giữa hai đoạn được ghép lại) và chỉ encode
+    phần văn bản trước vị trí cắt an toàn, nên bộ nhớ dùng không phụ thuộc kích thước đầu vào.
+
+    Nếu văn bản không có khoảng trắng trong hơn `max_buffer_chars` ký tự liên tiếp
+    (ví dụ khối base64 rất dài), buffer bị cắt cưỡng bức và kết quả có thể lệch vài token.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], chunk_chars: int = 1 << 20,
+                 max_buffer_chars: Optional[int] = None):
+        """
+        Khởi tạo TokenStreamCounter.
+
+        Args:
+            count_tokens (Callable[[str], int]): Hàm đếm token cho một đoạn văn bản
+            chunk_chars (int): Số ký tự tích lũy trước khi encode một đoạn
+            max_buffer_chars (Optional[int]): Kích thước buffer tối đa khi không tìm được vị trí cắt
+                (mặc định 4 x chunk_chars, tối thiểu MIN_BUFFER_CHARS)
+        """
+        self.count_tokens = count_tokens
+        self.chunk_chars = chunk_chars
+        self.max_buffer_chars = max_buffer_chars or max(4 * chunk_chars, MIN_BUFFER_CHARS)
+        self.token_count = 0
+        self.forced_cuts = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+
+    def append(self, data: Union[bytes, str]) -> None:
+        """
+        Thêm dữ liệu vào buffer mà không encode.
+
+        Args:
+            data (Union[bytes, str]): Văn bản hoặc bytes UTF-8 (có thể cắt giữa một ký tự nhiều byte)
+        """
+        if isinstance(data, str):
+            self._buffer += data
+        else:
+            self._buffer += self._decoder.decode(data)
+
+    def feed(self, data: Union[bytes, str]) -> None:
+        """Thêm dữ liệu và đếm ngay phần văn bản đã có thể encode."""
+        self.append(data)
+        if len(self._buffer) >= self.chunk_chars:
+            self._flush()
+
+    def take_ready(self) -> Optional[str]:
+        """
+        Tách phần văn bản đã có thể encode khỏi buffer mà không encode nó.
+        Dùng khi việc encode được thực hiện ở nơi khác (ví dụ trong thread pool).
+
+        Returns:
+            Optional[str]: Văn bản sẵn sàng để đếm, None nếu buffer chưa đủ lớn
+        """
+        if len(self._buffer) < self.chunk_chars:
+            return None
+        cut = find_safe_cut(self._buffer)
+        if not cut:
+            if len(self._buffer) < self.max_buffer_chars:
+                return None
+            cut = len(self._buffer) - 1
+            self.forced_cuts += 1
+        ready, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return ready
+
+    def _flush(self) -> None:
+        ready = self.take_ready()
+        if ready:
+            self.token_count += self.count_tokens(ready)
+
+    def finish(self) -> int:
+        """
+        Đếm phần văn bản còn lại và trả về tổng số token.
+
+        Returns:
+            int: Tổng số token của toàn bộ dữ liệu
+        """
+        remaining = self.take_remaining()
+        if remaining:
+            self.token_count += self.count_tokens(remaining)
+        return self.token_count
+
+    def take_remaining(self) -> str:
+        """Lấy toàn bộ văn bản còn lại (kể cả byte UTF-8 dở dang cuối cùng) và làm rỗng buffer."""
+        remaining = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return remaining
+
+
+async def count_async_stream(counter: TokenStreamCounter, stream, chunk_size: int) -> int:
+    """
+    Đếm token từ một async byte stream, encode trong thread pool để không chặn event loop.
+
+    Args:
+        counter (TokenStreamCounter): Bộ đếm dùng để ghép và cắt dữ liệu
+        stream: AsyncIterable[bytes] (ví dụ httpx `aiter_bytes()`) hoặc đối tượng có `async read(n)`
+            (ví dụ `asyncio.StreamReader`, aiohttp `StreamReader`)
+        chunk_size (int): Số byte đọc mỗi lần khi stream có `read(n)`
+
+    Returns:
+        int: Tổng số token
+    """
+    async def chunks():
+        if hasattr(stream, "__aiter__"):
+            async for data in stream:
+                yield data
+        else:
+            while True:
+                data = await stream.read(chunk_size)
+                if not data:
+                    break
+                yield data
+
+    async for data in chunks():
+        counter.append(data)
+        ready = counter.take_ready()
+        if ready:
+            counter.token_count += await asyncio.to_thread(counter.count_tokens, ready)
+
+    remaining = counter.take_remaining()
+    if remaining:
+        counter.token_count += await asyncio.to_thread(counter.count_tokens, remaining)
+    return counter.token_count
@@ -1,6 +1,6 @@
-from abc import ABC, abstractmethod
-from enum import Enum
-from typing import Dict, Any, Optional
+from abc import ABCMeta, abstractmethod
+from enum import Enum, EnumMeta
+from typing import Dict, Any, Mapping, Optional
 
 
 # Cách sử dụng ví dụ: 
@@ -9,7 +9,12 @@ from typing import Dict, Any, Optional
 # input_price = price['input']
 # output_price = price['output']
 
-class BaseAIModel(ABC, str, Enum):
+class ABCEnumMeta(ABCMeta, EnumMeta):
+    """Metaclass that allows abstract methods on Enum classes"""
+    pass
+
+
+class BaseAIModel(str, Enum, metaclass=ABCEnumMeta):
     """
     Base abstract class that all AI model enums should inherit from.
     Enforces a consistent interface across different model providers.
@@ -21,13 +26,34 @@ class BaseAIModel(ABC, str, Enum):
         pass
     
     @abstractmethod
-    def get_pricing(self) -> Dict[str, float]:
+    def get_pricing(self) -> Mapping[str, float]:
         """
         Return pricing information for the model in USD per 1M tokens.
-        Must return a dictionary with at least 'input' and 'output' keys.
+        Must return a mapping with at least 'input' and 'output' keys.
         """
         pass
     
+    def get_provider(self) -> str:
+        """
+        Returns the provider name used to group models in the registry.
+        Can be overridden by child classes.
+        """
+        return ""
+    
+    def get_encoding_name(self) -> str:
+        """
+        Returns the tiktoken encoding used to count tokens for this model.
+        Can be overridden by child classes.
+        """
+        return "cl100k_base"
+    
+    def get_aliases(self) -> tuple:
+        """
+        Returns alternative names (snapshots, API paths) the model is known by.
+        Can be overridden by child classes.
+        """
+        return ()
+    
     def get_context_window(self) -> int:
         """
         Returns the context window size in tokens. 
@@ -35,7 +61,7 @@ class BaseAIModel(ABC, str, Enum):
         """
         return 0
     
-    def get_capabilities(self) -> Dict[str, Any]:
+    def get_capabilities(self) -> Mapping[str, Any]:
         """
         Returns a dictionary of model capabilities.
         Can be overridden by child classes.
@@ -45,13 +71,15 @@ class BaseAIModel(ABC, str, Enum):
     @classmethod
     def find_by_name(cls, name: str) -> Optional['BaseAIModel']:
         """
-        Find a model by its string name
+        Find a model by its name, alias or member name (case-insensitive)
         Returns None if not found
         """
-        try:
-            return cls(name)
-        except ValueError:
-            return None
+        from app.utils.models.registry import registry
+        
+        info = registry.find(name)
+        if info is not None and isinstance(info.model, cls):
+            return info.model
+        return None
     
     @classmethod
     def list_models(cls) -> Dict[str, 'BaseAIModel']:
@@ -1,4 +1,5 @@
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Mapping
 from app.utils.models.base import BaseAIModel  # Correction du chemin d'import
 
 class GeminiModel(BaseAIModel):
@@ -10,21 +11,51 @@ class GeminiModel(BaseAIModel):
     def __str__(self) -> str:
         return self.value
     
-    def get_pricing(self) -> Dict[str, float]:
+    def get_pricing(self) -> Mapping[str, float]:
         """
         Get model pricing in USD/1M tokens
-        Returns dictionary with 'input' and 'output' keys
+        Returns a read-only mapping with 'input' and 'output' keys
         """
-        pricing = {
-            GeminiModel.GEMINI_2_0_FLASH: {"input": 0.1, "output": 0.4},
-        }
-        
-        return pricing.get(self, {"input": 0.0, "output": 0.0})
+        return _PRICING.get(self, _NO_PRICING)
     
     def get_context_window(self) -> int:
         """Returns the context window size in tokens"""
-        context_windows = {
-            GeminiModel.GEMINI_2_0_FLASH: 1000000,
-        }
-        
-        return context_windows.get(self, 0)
\ No newline at end of file
+        return _CONTEXT_WINDOWS.get(self, 0)
+    
+    def get_capabilities(self) -> Mapping[str, Any]:
+        """Returns a read-only mapping of model capabilities"""
+        return _CAPABILITIES
+    
+    def get_provider(self) -> str:
+        return "google"
+    
+    def get_encoding_name(self) -> str:
+        """Gemini has no tiktoken tokenizer; cl100k_base is used as an approximation"""
+        return "cl100k_base"
+    
+    def get_aliases(self) -> tuple:
+        return _ALIASES.get(self, ())
+
+
+# Lookup tables are built once at import; enum members cannot hold them as class attributes
+_NO_PRICING = MappingProxyType({"input": 0.0, "output": 0.0})
+
+_PRICING = {
+    GeminiModel.GEMINI_2_0_FLASH: MappingProxyType({"input": 0.1, "output": 0.4}),
+}
+
+_CONTEXT_WINDOWS = {
+    GeminiModel.GEMINI_2_0_FLASH: 1000000,
+}
+
+_CAPABILITIES = MappingProxyType({
+    "vision": True,
+    "function_calling": True,
+    "structured_output": True,
+    "streaming": True,
+    "max_output_tokens": 8192,
+})
+
+_ALIASES = {
+    GeminiModel.GEMINI_2_0_FLASH: ("gemini-2.0-flash-001", "models/gemini-2.0-flash"),
+}
@@ -1,4 +1,5 @@
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Mapping
 from app.utils.models.base import BaseAIModel  # Correction du chemin d'import
 
 class ChatGPTModel(BaseAIModel):
@@ -12,25 +13,57 @@ class ChatGPTModel(BaseAIModel):
     def __str__(self) -> str:
         return self.value
     
-    def get_pricing(self) -> Dict[str, float]:
+    def get_pricing(self) -> Mapping[str, float]:
         """
         Get model pricing in USD/1M tokens
-        Returns dictionary with 'input' and 'output' keys
+        Returns a read-only mapping with 'input' and 'output' keys
         """
-        pricing = {
-            ChatGPTModel.GPT_4_1: {"input": 2.0, "output": 8.0},
-            ChatGPTModel.GPT_4_1_MINI: {"input": 0.4, "output": 1.6},
-            ChatGPTModel.GPT_4_1_NANO: {"input": 0.1, "output": 0.4},
-        }
-        
-        return pricing.get(self, {"input": 0.0, "output": 0.0})
+        return _PRICING.get(self, _NO_PRICING)
     
     def get_context_window(self) -> int:
         """Returns the context window size in tokens"""
-        context_windows = {
-            ChatGPTModel.GPT_4_1: 1047576,
-            ChatGPTModel.GPT_4_1_MINI: 1047576,
-            ChatGPTModel.GPT_4_1_NANO: 1047576,
-        }
-        
-        return context_windows.get(self, 0)
\ No newline at end of file
+        return _CONTEXT_WINDOWS.get(self, 0)
+    
+    def get_capabilities(self) -> Mapping[str, Any]:
+        """Returns a read-only mapping of model capabilities"""
+        return _CAPABILITIES
+    
+    def get_provider(self) -> str:
+        return "openai"
+    
+    def get_encoding_name(self) -> str:
+        """GPT-4.1 models use the o200k_base tokenizer"""
+        return "o200k_base"
+    
+    def get_aliases(self) -> tuple:
+        return _ALIASES.get(self, ())
+
+
+# Lookup tables are built once at import; enum members cannot hold them as class attributes
+_NO_PRICING = MappingProxyType({"input": 0.0, "output": 0.0})
+
+_PRICING = {
+    ChatGPTModel.GPT_4_1: MappingProxyType({"input": 2.0, "output": 8.0}),
+    ChatGPTModel.GPT_4_1_MINI: MappingProxyType({"input": 0.4, "output": 1.6}),
+    ChatGPTModel.GPT_4_1_NANO: MappingProxyType({"input": 0.1, "output": 0.4}),
+}
+
+_CONTEXT_WINDOWS = {
+    ChatGPTModel.GPT_4_1: 1047576,
+    ChatGPTModel.GPT_4_1_MINI: 1047576,
+    ChatGPTModel.GPT_4_1_NANO: 1047576,
+}
+
+_CAPABILITIES = MappingProxyType({
+    "vision": True,
+    "function_calling": True,
+    "structured_output": True,
+    "streaming": True,
+    "max_output_tokens": 32768,
+})
+
+_ALIASES = {
+    ChatGPTModel.GPT_4_1: ("gpt-4.1-2025-04-14",),
+    ChatGPTModel.GPT_4_1_MINI: ("gpt-4.1-mini-2025-04-14",),
+    ChatGPTModel.GPT_4_1_NANO: ("gpt-4.1-nano-2025-04-14",),
+}
@@ -0,0 +1,143 @@
+"""
+Model registry built once at import.
+Indexes every provider's models by name, alias and provider, with frozen
+pricing, context window, capability and tokenizer records.
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type, Union
+
+from app.utils.models.base import BaseAIModel
+from app.utils.models.gemini import GeminiModel
+from app.utils.models.openai import ChatGPTModel
+
+# Cách sử dụng ví dụ:
+# info = registry.get("gpt-4.1-nano")
+# info.pricing.input, info.context_window, info.encoding_name
+
+MODEL_ENUMS: Tuple[Type[BaseAIModel], ...] = (ChatGPTModel, GeminiModel)
+
+
+@dataclass(frozen=True)
+class ModelPricing:
+    """Pricing in USD per 1M tokens"""
+    input: float
+    output: float
+
+    def cost(self, input_tokens: int, output_tokens: int = 0) -> float:
+        """Return the USD cost of a call with the given token counts"""
+        return (input_tokens * self.input + output_tokens * self.output) / 1_000_000
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """Immutable description of a single model"""
+    name: str
+    provider: str
+    model: BaseAIModel
+    pricing: ModelPricing
+    context_window: int
+    capabilities: Mapping[str, Any]
+    encoding_name: str
+    aliases: Tuple[str, ...] = ()
+
+
+class ModelRegistry:
+    """
+    Registry of all known models.
+    Lookups are single dict accesses on pre-normalised keys.
+    """
+
+    def __init__(self, model_enums: Iterable[Type[BaseAIModel]] = MODEL_ENUMS):
+        """
+        Build the registry indexes
+
+        Args:
+            model_enums: The model enum classes to index
+        """
+        self._by_key: Dict[str, ModelInfo] = {}
+        self._by_model: Dict[BaseAIModel, ModelInfo] = {}
+        self._by_provider: Dict[str, Tuple[ModelInfo, ...]] = {}
+
+        providers: Dict[str, List[ModelInfo]] = {}
+        for enum in model_enums:
+            for model in enum:
+                pricing = model.get_pricing()
+                info = ModelInfo(
+                    name=model.value,
+                    provider=model.get_provider(),
+                    model=model,
+                    pricing=ModelPricing(input=pricing["input"], output=pricing["output"]),
+                    context_window=model.get_context_window(),
+                    capabilities=MappingProxyType(dict(model.get_capabilities())),
+                    encoding_name=model.get_encoding_name(),
+                    aliases=tuple(model.get_aliases()),
+                )
+                self._by_model[model] = info
+                for key in (info.name, model.name, *info.aliases):
+                    self._by_key[self._normalise(key)] = info
+                providers.setdefault(info.provider, []).append(info)
+
+        self._by_provider = {provider: tuple(infos) for provider, infos in providers.items()}
+        self._estimators: Dict[str, Any] = {}
+
+    @staticmethod
+    def _normalise(name: str) -> str:
+        return name.strip().lower()
+
+    def find(self, name: Union[str, BaseAIModel]) -> Optional[ModelInfo]:
+        """
+        Find a model by name, alias or enum member name (case-insensitive)
+        Returns None if not found
+        """
+        if isinstance(name, BaseAIModel):
+            return self._by_model.get(name)
+        return self._by_key.get(self._normalise(name))
+
+    def get(self, name: Union[str, BaseAIModel]) -> ModelInfo:
+        """
+        Get a model by name, alias or enum member
+
+        Raises:
+            KeyError: If the model is unknown
+        """
+        info = self.find(name)
+        if info is None:
+            raise KeyError(f"Unknown model '{name}'")
+        return info
+
+    def by_provider(self, provider: str) -> Tuple[ModelInfo, ...]:
+        """Returns all models of a provider (e.g. "openai", "google")"""
+        return self._by_provider.get(provider, ())
+
+    @property
+    def providers(self) -> Tuple[str, ...]:
+        """Returns all known provider names"""
+        return tuple(self._by_provider)
+
+    def list_models(self) -> Tuple[ModelInfo, ...]:
+        """Returns every registered model"""
+        return tuple(self._by_model.values())
+
+    def get_estimator(self, name: Union[str, BaseAIModel]):
+        """
+        Returns a shared TokenEstimator for the model's tokenizer encoding.
+        One estimator is created per encoding and reused across models.
+        """
+        encoding_name = self.get(name).encoding_name
+        estimator = self._estimators.get(encoding_name)
+        if estimator is None:
+            from app.utils.helpers.token import TokenEstimator
+
+            estimator = self._estimators[encoding_name] = TokenEstimator(encoding_name=encoding_name)
+        return estimator
+
+    def __contains__(self, name: Union[str, BaseAIModel]) -> bool:
+        return self.find(name) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_model)
+
+
+# Global registry, built once at import
+registry = ModelRegistry()
@@ -0,0 +1,4 @@
+"""
+Benchmarks for MCP Project.
+Run a benchmark module from the project root, e.g. `python -m benchmarks.token_estimator`.
+"""
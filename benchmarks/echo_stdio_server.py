@@ -0,0 +1,53 @@
+"""
+Minimal stdio MCP server used by the transport benchmarks.
+
+Usage:
+    python -m benchmarks.echo_stdio_server
+"""
+import asyncio
+import time
+
+from mcp.server.fastmcp import Context, FastMCP
+
+mcp = FastMCP("Echo")
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    """Return the text unchanged"""
+    return text
+
+
+@mcp.tool()
+async def sleep(seconds: float) -> str:
+    """Wait for the given number of seconds"""
+    await asyncio.sleep(seconds)
+    return f"slept {seconds}"
+
+
+@mcp.tool()
+async def count(steps: int, ctx: Context) -> str:
+    """Report progress once per step"""
+    for step in range(1, steps + 1):
+        await ctx.report_progress(step, steps)
+    return f"counted {steps}"
+
+
+@mcp.tool()
+def spin(milliseconds: float) -> str:
+    """Keep the CPU busy for the given number of milliseconds"""
+    deadline = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < deadline:
+        pass
+    return f"spun {milliseconds}"
+
+
+@mcp.tool()
+def block(milliseconds: float) -> str:
+    """Block the server for the given number of milliseconds (like a synchronous call)"""
+    time.sleep(milliseconds / 1000)
+    return f"blocked {milliseconds}"
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
@@ -0,0 +1,156 @@
+"""
+Benchmark: idol store lookups on a large catalogue.
+
+Generates a synthetic catalogue (Hangul stage and full names with
+romanisations), loads it into an IdolStore and reports:
+    - load time (JSON parse + index build) and memory of the store
+    - latency (p50/p99) of exact, romanised, choseong and fuzzy lookups, and
+      how often the misspelt name is among the fuzzy suggestions
+    - the same lookups with the former per-call dictionary and linear scan
+
+Usage:
+    python -m benchmarks.idol_store [--idols 50000] [--queries 2000] [--json]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app.data.database.idols import IdolStore, choseong, romanize
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+SYLLABLES = ("민지수현서연우진하윤준영은예도아채나유소주경혜태성재희린원다보미선석호빈정훈가"
+             "람율온결별솔담찬규승혁건욱람설희리")
+POSITIONS = ("메인보컬", "리드보컬", "서브보컬", "메인댄서", "리드댄서", "메인래퍼", "리드래퍼", "비주얼", "리더", "막내")
+BLOOD_TYPES = ("A", "B", "O", "AB")
+
+
+def generate_catalogue(count: int, seed: int = 7) -> List[dict]:
+    """Idols with unique stage names of 2-4 syllables"""
+    rng = random.Random(seed)
+    agencies = [f"엔터테인먼트 {index}" for index in range(200)]
+    groups = [f"GROUP{index}" for index in range(count // 5 + 1)]
+    seen = set()
+    idols = []
+    while len(idols) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.choice((2, 2, 3, 4))))
+        if name in seen:
+            continue
+        seen.add(name)
+        full_name = rng.choice(SURNAMES) + "".join(rng.choice(SYLLABLES) for _ in range(2))
+        idols.append({
+            "name": name,
+            "aliases": [romanize(name).capitalize()],
+            "full_name": full_name,
+            "full_name_romanized": romanize(full_name).title(),
+            "group": rng.choice(groups),
+            "position": rng.sample(POSITIONS, rng.randint(1, 3)),
+            "birth_date": f"{rng.randint(1985, 2008)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "agency": rng.choice(agencies),
+            "debut_date": f"{rng.randint(2005, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "blood_type": rng.choice(BLOOD_TYPES),
+            "instagram": f"@idol_{len(idols)}",
+        })
+    return idols
+
+
+def typo(name: str, rng: random.Random) -> str:
+    """Change the vowel of one syllable of the name (지민 -> 지먼)"""
+    index = rng.randrange(len(name))
+    code = ord(name[index]) - 0xAC00
+    medial = (code % 588) // 28
+    other = rng.choice([vowel for vowel in range(21) if vowel != medial])
+    return name[:index] + chr(0xAC00 + code - medial * 28 + other * 28) + name[index + 1:]
+
+
+def linear_lookup(idols: List[dict], query: str):
+    """The former lookup: a dictionary built per call, then a substring scan"""
+    database = {idol["name"]: idol for idol in idols}
+    if query in database:
+        return database[query]
+    return [name for name in database if query.lower() in name.lower()]
+
+
+def time_calls(function: Callable[[str], object], queries: List[str]) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        function(query)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "p50_us": statistics.median(timings) * 1e6,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    rng = random.Random(args.seed)
+    idols = generate_catalogue(args.idols, args.seed)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(idols, f, ensure_ascii=False)
+
+    try:
+        started = time.perf_counter()
+        store = IdolStore.load(path)
+        load_ms = (time.perf_counter() - started) * 1000
+        # Memory of a second copy, measured apart since tracing slows the load down
+        gc.collect()
+        tracemalloc.start()
+        traced = IdolStore.load(path)
+        gc.collect()
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        del traced
+    finally:
+        os.unlink(path)
+
+    sample = rng.sample(idols, min(args.queries, len(idols)))
+    queries = {
+        "exact": [idol["name"] for idol in sample],
+        "romanized": [idol["aliases"][0].upper() for idol in sample],
+        "choseong": [choseong(idol["name"]) for idol in sample],
+        "fuzzy": [typo(idol["name"], rng) for idol in sample],
+    }
+    results: Dict[str, object] = {"idols": len(store), "load_ms": load_ms, "memory_mb": memory_mb}
+    print(f"{len(store)} idols: load {load_ms:.0f} ms, store memory {memory_mb:.1f} MB")
+
+    for kind, kind_queries in queries.items():
+        function = store.suggest if kind == "fuzzy" else store.lookup
+        result = time_calls(function, kind_queries)
+        results[kind] = result
+        print(f"{kind:<10} p50={result['p50_us']:8.1f} us  p99={result['p99_us']:8.1f} us")
+
+    found = sum(idol["name"] in store.suggest(query) for idol, query in zip(sample, queries["fuzzy"]))
+    results["fuzzy"]["recall_at_5"] = found / len(sample)
+    print(f"{'':<10} typo corrected in the top 5 suggestions: {found / len(sample):.1%}")
+
+    baseline_queries = queries["exact"][:args.baseline_queries]
+    result = time_calls(lambda query: linear_lookup(idols, query), baseline_queries)
+    results["linear"] = result
+    print(f"{'linear':<10} p50={result['p50_us']:8.1f} us  p99={result['p99_us']:8.1f} us  (former per-call dictionary)")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--idols", type=int, default=50000, help="catalogue size")
+    parser.add_argument("--queries", type=int, default=2000, help="queries per lookup kind")
+    parser.add_argument("--baseline-queries", type=int, default=50, help="queries for the former linear lookup")
+    parser.add_argument("--seed", type=int, default=7, help="random seed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Benchmark: load test of the MCP servers.
+
+Opens N concurrent client sessions per server (langchain-mcp-adapters over
+the MCP client, endpoints from settings.server_config) and drives a weighted
+mix of tool calls for a fixed duration. Reported:
+    - session setup (connect + initialize): p50/p95/max and failures
+    - throughput (calls per second) and latency p50/p95/p99, overall and per tool
+    - tool errors (isError results) and failed requests
+    - server memory (RSS of the server process trees) before the sessions are
+      opened, at its peak and at the end of the run
+The results are saved as JSON (--output) so runs can be diffed between releases.
+
+The servers are either already running (`python -m app.main`; pass their PIDs
+with --pid to sample their memory) or started by the benchmark with --start.
+Tools are called with built-in arguments (see ARGUMENTS), or with the ones of
+--arguments, a JSON file mapping tool names to lists of argument objects.
+
+Usage:
+    python -m benchmarks.load [--sessions 50] [--duration 30] [--start]
+    python -m benchmarks.load --mix social:get_weather=3 social:get_kpop_idol_info=1 github:search_repositories=1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from app.core.config import settings
+from app.core.supervisor import is_ready_response
+from app.utils.cmd.process_registry import children_map, sample_process
+
+DEFAULT_MIX = ["social:get_weather=3", "social:get_kpop_idol_info=3", "social:get_kpop_idol_info_batch=1"]
+
+# tool -> argument sets, one picked at random per call
+ARGUMENTS: Dict[str, List[Dict[str, Any]]] = {
+    "get_weather": [
+        {"city": "서울", "country": "한국"},
+        {"city": "부산", "country": "한국"},
+        {"city": "Tokyo", "country": "Japan"},
+        {"city": "Hanoi"},
+    ],
+    "get_kpop_idol_info": [
+        {"idol_name": "지민"},
+        {"idol_name": "Jimin"},
+        {"idol_name": "ㅇㅇㅇ"},
+        {"idol_name": "윈터", "format": "text"},
+        # Not found: answered with suggestions (a tool error)
+        {"idol_name": "지먼"},
+    ],
+    "get_weather_batch": [
+        {"items": [{"city": "서울"}, {"city": "부산"}, {"city": "Tokyo", "country": "Japan"}]},
+    ],
+    "get_kpop_idol_info_batch": [
+        {"items": [{"idol_name": "지민"}, {"idol_name": "IU"}, {"idol_name": "Winter"}]},
+    ],
+    "search_repositories": [
+        {"query": "model context protocol"},
+    ],
+}
+
+
+def run_server(name: str, worker_index: int) -> None:
+    logging.disable(logging.WARNING)
+    if name == "social":
+        from app.servers.mcp.tools.social import run_social_server
+
+        run_social_server(worker_index)
+    else:
+        from app.servers.mcp.tools.github import run_github_server_wrapper
+
+        run_github_server_wrapper()
+
+
+def tree_rss(pids: List[int]) -> int:
+    children = children_map()
+    usages = [sample_process(pid, children) for pid in pids]
+    return sum(usage.rss_bytes for usage in usages if usage is not None)
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    if not timings:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(timings)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {"p50_ms": statistics.median(ordered) * 1000, "p95_ms": percentile(0.95), "p99_ms": percentile(0.99)}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(entries: List[str]) -> List[Tuple[str, str, float]]:
+    """"server:tool=weight" entries (weight 1 if omitted)"""
+    mix = []
+    for entry in entries:
+        target, _, weight = entry.partition("=")
+        server, _, tool = target.partition(":")
+        if not tool:
+            raise SystemExit(f"Invalid mix entry '{entry}', expected server:tool[=weight]")
+        mix.append((server, tool, float(weight or 1)))
+    return mix
+
+
+def client_connections(servers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """settings.server_config of the servers, reached on localhost when they listen on every interface"""
+    connections = {}
+    for server in servers:
+        if server not in settings.server_config:
+            raise SystemExit(f"Unknown server '{server}', expected one of {list(settings.server_config)}")
+        connection = dict(settings.server_config[server])
+        connection["url"] = connection["url"].replace("//0.0.0.0:", "//127.0.0.1:")
+        connections[server] = connection
+    return connections
+
+
+async def wait_ready(connections: Dict[str, Dict[str, Any]], timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        for server, connection in connections.items():
+            while True:
+                try:
+                    async with client.stream("GET", connection["url"]) as response:
+                        if is_ready_response(connection["url"], response.status_code):
+                            break
+                except httpx.HTTPError:
+                    pass
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"{server} server not ready after {timeout}s")
+                await asyncio.sleep(0.1)
+
+
+class LoadRun:
+    """Sessions, calls and memory samples of one run"""
+
+    def __init__(self, args: argparse.Namespace, mix: List[Tuple[str, str, float]],
+                 arguments: Dict[str, List[Dict[str, Any]]], pids: List[int]):
+        self.args = args
+        self.mix = mix
+        self.arguments = arguments
+        self.pids = pids
+        self.setups: Dict[str, List[float]] = defaultdict(list)
+        self.setup_failures: Dict[str, int] = defaultdict(int)
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.tool_errors: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.rss: List[int] = []
+        self.opened = 0
+        self.all_opened = asyncio.Event()
+        self.deadline = 0.0
+
+    async def sample_memory(self) -> None:
+        while True:
+            self.rss.append(tree_rss(self.pids))
+            await asyncio.sleep(self.args.sample_interval)
+
+    def session_opened(self) -> None:
+        self.opened += 1
+        if self.opened == self.args.sessions * len({server for server, _, _ in self.mix}):
+            self.deadline = time.perf_counter() + self.args.duration
+            self.all_opened.set()
+
+    async def session(self, client: MultiServerMCPClient, server: str, seed: int) -> None:
+        rng = random.Random(seed)
+        tools = [(tool, weight) for name, tool, weight in self.mix if name == server]
+        names, weights = [tool for tool, _ in tools], [weight for _, weight in tools]
+        started = time.perf_counter()
+        try:
+            async with client.session(server) as session:
+                self.setups[server].append(time.perf_counter() - started)
+                self.session_opened()
+                await self.all_opened.wait()
+                while time.perf_counter() < self.deadline:
+                    tool = rng.choices(names, weights)[0]
+                    key = f"{server}:{tool}"
+                    started = time.perf_counter()
+                    try:
+                        result = await session.call_tool(tool, rng.choice(self.arguments.get(tool, [{}])))
+                    except Exception:
+                        self.failures[key] += 1
+                        continue
+                    self.timings[key].append(time.perf_counter() - started)
+                    if result.isError:
+                        self.tool_errors[key] += 1
+        except Exception:
+            if not self.all_opened.is_set():
+                self.setup_failures[server] += 1
+                self.session_opened()
+
+    async def run(self, connections: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        client = MultiServerMCPClient(connections)
+        sampler = asyncio.create_task(self.sample_memory()) if self.pids else None
+        await asyncio.sleep(0)
+        rss_before = self.rss[-1] if self.rss else 0
+        sessions = [
+            asyncio.create_task(self.session(client, server, self.args.seed + server_index * 100003 + index))
+            for server_index, server in enumerate(connections)
+            for index in range(self.args.sessions)
+        ]
+        await self.all_opened.wait()
+        started = time.perf_counter()
+        await asyncio.gather(*sessions)
+        elapsed = time.perf_counter() - started
+        if sampler is not None:
+            sampler.cancel()
+        return self.report(connections, elapsed, rss_before)
+
+    def report(self, connections: Dict[str, Dict[str, Any]], elapsed: float, rss_before: int) -> Dict[str, Any]:
+        def megabytes(value: int) -> float:
+            return value / 1024 / 1024
+
+        def call_stats(keys: List[str]) -> Dict[str, Any]:
+            timings = [timing for key in keys for timing in self.timings[key]]
+            return {
+                "calls": len(timings),
+                "tool_errors": sum(self.tool_errors[key] for key in keys),
+                "failures": sum(self.failures[key] for key in keys),
+                "calls_per_second": len(timings) / elapsed if elapsed else 0.0,
+                **percentiles(timings),
+            }
+
+        keys = [f"{server}:{tool}" for server, tool, _ in self.mix]
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "git_revision": git_revision(),
+                "python": sys.version.split()[0],
+                "duration_s": elapsed,
+                "arguments": vars(self.args),
+                "connections": connections,
+            },
+            "sessions": {
+                server: {
+                    "opened": len(self.setups[server]),
+                    "failed": self.setup_failures[server],
+                    "setup_p50_ms": percentiles(self.setups[server])["p50_ms"],
+                    "setup_p95_ms": percentiles(self.setups[server])["p95_ms"],
+                    "setup_max_ms": max(self.setups[server], default=0.0) * 1000,
+                }
+                for server in connections
+            },
+            "calls": call_stats(keys),
+            "tools": {key: call_stats([key]) for key in keys},
+            "server_rss_mb": {
+                "before": megabytes(rss_before),
+                "peak": megabytes(max(self.rss, default=0)),
+                "after": megabytes(self.rss[-1] if self.rss else 0),
+            } if self.pids else None,
+        }
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    for server, sessions in results["sessions"].items():
+        print(f"{server:<10} sessions={sessions['opened']} (failed {sessions['failed']})  "
+              f"setup p50={sessions['setup_p50_ms']:.1f} ms  p95={sessions['setup_p95_ms']:.1f} ms  "
+              f"max={sessions['setup_max_ms']:.1f} ms")
+    for name, stats in [("all", results["calls"]), *results["tools"].items()]:
+        print(f"{name:<36} {stats['calls_per_second']:8.1f} calls/s  p50={stats['p50_ms']:7.2f} ms  "
+              f"p95={stats['p95_ms']:7.2f} ms  p99={stats['p99_ms']:7.2f} ms  "
+              f"tool errors={stats['tool_errors']}  failures={stats['failures']}")
+    if results["server_rss_mb"] is not None:
+        rss = results["server_rss_mb"]
+        print(f"server RSS: before={rss['before']:.1f} MB  peak={rss['peak']:.1f} MB  after={rss['after']:.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent sessions per server")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of calls once every session is open")
+    parser.add_argument("--mix", nargs="+", default=DEFAULT_MIX, help="server:tool=weight entries")
+    parser.add_argument("--arguments", help="JSON file mapping tool names to lists of argument objects")
+    parser.add_argument("--start", action="store_true", help="start the servers of the mix for the run")
+    parser.add_argument("--pid", type=int, nargs="*", default=[], help="PIDs of the running servers (memory)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between memory samples")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the servers")
+    parser.add_argument("--seed", type=int, default=7, help="random seed")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+
+    mix = parse_mix(args.mix)
+    arguments = dict(ARGUMENTS)
+    if args.arguments:
+        with open(args.arguments, encoding="utf-8") as f:
+            arguments.update(json.load(f))
+    connections = client_connections(list(dict.fromkeys(server for server, _, _ in mix)))
+
+    processes = []
+    if args.start:
+        for server in connections:
+            workers = int(settings.SOCIAL_WORKERS) if server == "social" else 1
+            for index in range(workers):
+                process = multiprocessing.Process(target=run_server, args=(server, index), daemon=True)
+                process.start()
+                processes.append(process)
+    try:
+        asyncio.run(wait_ready(connections, args.timeout))
+        pids = args.pid + [process.pid for process in processes]
+        results = asyncio.run(LoadRun(args, mix, arguments, pids).run(connections))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+
+    print_report(results)
+    output = args.output or os.path.join("benchmarks", "results", f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"results saved to {output}")
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: start-up time of an npx-launched MCP server, measured as the time
+until the child writes its first output line.
+
+    legacy  /bin/sh -c "npx -y <package>" (previous NPXRunner behaviour)
+    cold    NPXRunner with a new resolver (install into an empty cache, or
+            read the manifest of --cache-dir, then exec)
+    warm    NPXRunner with the package already resolved (exec only)
+
+Usage:
+    python -m benchmarks.npx_startup [--package @modelcontextprotocol/server-github] [--repeat 5] [--cache-dir DIR]
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import List, Optional
+
+from app.utils.cmd.npx import NPXRunner
+from app.utils.cmd.resolver import PackageResolver
+
+
+async def first_line_seconds(process: asyncio.subprocess.Process, started: float, timeout: float) -> Optional[float]:
+    """Seconds from `started` until the first stdout/stderr line, then stop the process"""
+    async def read_first(reader: asyncio.StreamReader) -> bytes:
+        line = await reader.readline()
+        if not line:
+            # EOF without output: let the other stream decide
+            await asyncio.sleep(timeout)
+        return line
+
+    tasks = [asyncio.create_task(read_first(process.stdout)), asyncio.create_task(read_first(process.stderr))]
+    done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    elapsed = time.perf_counter() - started if done else None
+    for task in pending:
+        task.cancel()
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+    return elapsed
+
+
+async def legacy_launch(package: str, timeout: float) -> Optional[float]:
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_shell(
+        f"npx -y {package}", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    return await first_line_seconds(process, started, timeout)
+
+
+async def runner_launch(runner: NPXRunner, package: str, timeout: float) -> Optional[float]:
+    started = time.perf_counter()
+    argv = await runner.build_argv(package)
+    process = await asyncio.create_subprocess_exec(
+        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    return await first_line_seconds(process, started, timeout)
+
+
+def summary(name: str, times: List[Optional[float]]) -> None:
+    values = [value for value in times if value is not None]
+    if not values:
+        print(f"{name:<8} no output within timeout")
+        return
+    print(f"{name:<8} runs={len(values):<3} median={statistics.median(values) * 1000:9.1f} ms  "
+          f"min={min(values) * 1000:9.1f} ms  max={max(values) * 1000:9.1f} ms")
+
+
+async def run(package: str, repeat: int, timeout: float, skip_legacy: bool, cache_dir: Optional[str]) -> None:
+    if not skip_legacy:
+        summary("legacy", [await legacy_launch(package, timeout) for _ in range(repeat)])
+
+    async def resolved_runs(directory: str) -> None:
+        runner = NPXRunner(resolver=PackageResolver(directory))
+        summary("cold", [await runner_launch(runner, package, timeout)])
+        summary("warm", [await runner_launch(runner, package, timeout) for _ in range(repeat)])
+
+    if cache_dir:
+        await resolved_runs(cache_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="npx-bench-") as directory:
+            await resolved_runs(directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--package", default="@modelcontextprotocol/server-github", help="npm package spec")
+    parser.add_argument("--repeat", type=int, default=5, help="launches per mode")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the first line")
+    parser.add_argument("--skip-legacy", action="store_true", help="do not measure the shell/npx launch")
+    parser.add_argument("--cache-dir", help="resolver cache to use instead of a fresh temporary one")
+    args = parser.parse_args()
+    asyncio.run(run(args.package, args.repeat, args.timeout, args.skip_legacy, args.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: native in-process stdio-to-SSE bridge vs. the just-aii-guess bridge.
+
+Both bridges serve the same stdio MCP server (by default the echo server in
+benchmarks/echo_stdio_server.py). Reported per bridge:
+    - tools/call latency (p50/p99) on one session
+    - throughput with several concurrent sessions
+    - resident memory of the bridge process tree
+
+With --workers N the native bridge load-balances over N children. The echo
+server also has a CPU-bound "spin" tool and a "block" tool that stalls the
+whole server; with either, throughput scales with the worker count (spin only
+up to the number of cores).
+
+Usage:
+    python -m benchmarks.stdio_bridge [--calls 500] [--sessions 10] [--skip-legacy]
+    python -m benchmarks.stdio_bridge --workers 4 --tool spin --work-ms 20 --skip-legacy
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import shlex
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from app.utils.cmd.process_registry import children_map, sample_process
+
+DEFAULT_SERVER = [sys.executable, "-m", "benchmarks.echo_stdio_server"]
+
+
+def run_native_bridge(argv: List[str], port: int, workers: int) -> None:
+    from app.servers.mcp.std.bridge import StdioBridgeServer
+
+    logging.disable(logging.INFO)
+    StdioBridgeServer("Bench", argv=argv, port=port, host="127.0.0.1", workers=workers).run()
+
+
+def tool_call(args: argparse.Namespace, label: str) -> Tuple[str, Dict[str, object]]:
+    if args.tool == "echo":
+        return "echo", {"text": label}
+    return args.tool, {"milliseconds": args.work_ms}
+
+
+async def wait_ready(url: str, timeout: float) -> float:
+    """Seconds until GET /sse answers"""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                async with client.stream("GET", url) as response:
+                    if response.status_code == 200:
+                        return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def sequential_latency(url: str, calls: int, args: argparse.Namespace) -> List[float]:
+    timings = []
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for index in range(calls):
+                started = time.perf_counter()
+                await session.call_tool(*tool_call(args, f"ping {index}"))
+                timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def concurrent_throughput(url: str, sessions: int, calls: int, args: argparse.Namespace) -> float:
+    async def one_session(session_index: int) -> None:
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await asyncio.gather(*[
+                    session.call_tool(*tool_call(args, f"{session_index}-{index}")) for index in range(calls)
+                ])
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one_session(index) for index in range(sessions)])
+    return sessions * calls / (time.perf_counter() - started)
+
+
+def tree_rss(pid: int) -> int:
+    usage = sample_process(pid, children_map())
+    return usage.rss_bytes if usage is not None else 0
+
+
+async def measure(name: str, url: str, pid: int, args: argparse.Namespace) -> Dict[str, float]:
+    ready = await wait_ready(url, args.timeout)
+    timings = await sequential_latency(url, args.calls, args)
+    throughput = await concurrent_throughput(url, args.sessions, args.calls // args.sessions or 1, args)
+    ordered = sorted(timings)
+    result = {
+        "ready_ms": ready * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "calls_per_second": throughput,
+        "rss_mb": tree_rss(pid) / 1_048_576,
+    }
+    print(f"{name:<8} ready={result['ready_ms']:8.0f} ms  p50={result['p50_ms']:7.2f} ms  "
+          f"p99={result['p99_ms']:7.2f} ms  throughput={result['calls_per_second']:8.0f} calls/s  "
+          f"rss={result['rss_mb']:7.1f} MB")
+    return result
+
+
+async def run(args: argparse.Namespace) -> None:
+    argv = shlex.split(args.server) if args.server else DEFAULT_SERVER
+
+    process = multiprocessing.Process(target=run_native_bridge, args=(argv, args.port, args.workers),
+                                      daemon=True)
+    process.start()
+    try:
+        await measure("native" if args.workers == 1 else f"pool-{args.workers}", f"http://127.0.0.1:{args.port}/sse", process.pid, args)
+    finally:
+        process.terminate()
+        process.join(5)
+
+    if args.skip_legacy:
+        return
+    legacy_port = args.port + 1
+    legacy = await asyncio.create_subprocess_exec(
+        "npx", "-y", "just-aii-guess", "--stdio", shlex.join(argv), "--port", str(legacy_port),
+        "--baseUrl", f"http://127.0.0.1:{legacy_port}", "--ssePath", "/sse",
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        await measure("legacy", f"http://127.0.0.1:{legacy_port}/sse", legacy.pid, args)
+    finally:
+        legacy.terminate()
+        await legacy.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", help="stdio MCP server command line (default: the bundled echo server)")
+    parser.add_argument("--calls", type=int, default=500, help="tools/call requests per measurement")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions for the throughput run")
+    parser.add_argument("--port", type=int, default=18700, help="port of the native bridge (legacy uses port + 1)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for a bridge to be ready")
+    parser.add_argument("--workers", type=int, default=1, help="stdio children behind the native bridge")
+    parser.add_argument("--tool", choices=("echo", "spin", "block"), default="echo",
+                        help="tool called by the benchmark (spin burns CPU, block stalls the server)")
+    parser.add_argument("--work-ms", type=float, default=20.0, help="duration of a spin or block call")
+    parser.add_argument("--skip-legacy", action="store_true", help="only measure the native bridge")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
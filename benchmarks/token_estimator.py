@@ -0,0 +1,115 @@
+"""
+Benchmark: TokenEstimator direct-encoder counting vs. the legacy
+TokenTextSplitter(chunk_size=1) approach, on 1 KB - 10 MB inputs,
+plus the serial/thread/process modes of estimate_tokens_batch.
+
+Usage:
+    python -m benchmarks.token_estimator [--encoding cl100k_base] [--repeat 3] [--batch-texts 100000]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from app.utils.helpers.token import TokenEstimator
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+SAMPLE = (
+    "The quick brown fox jumps over the lazy dog. "
+    "빠른 갈색 여우가 게으른 개를 뛰어넘습니다. "
+    "Con cáo nâu nhanh nhẹn nhảy qua con chó lười. "
+    "def estimate_tokens(text): return len(text) // 4\n"
+)
+
+
+def make_text(size: int) -> str:
+    """Build a mixed-language text of roughly `size` characters"""
+    repeats = size // len(SAMPLE) + 1
+    return (SAMPLE * repeats)[:size]
+
+
+def legacy_counter(estimator: TokenEstimator) -> Callable[[str], int]:
+    """
+    Token counter equivalent to the previous implementation: encode, then
+    decode every token back into its own string and count the strings.
+    """
+    try:
+        splitter = estimator.text_splitter
+        return lambda text: len(splitter.split_text(text))
+    except ImportError:
+        encoding = estimator.encoding
+
+        def count(text: str) -> int:
+            ids = encoding.encode(text, allowed_special=set(), disallowed_special="all")
+            return len([encoding.decode(ids[i:i + 1]) for i in range(len(ids))])
+
+        return count
+
+
+def measure(func: Callable[[str], int], text: str, repeat: int) -> Tuple[float, int, int]:
+    """Return (best seconds, peak traced bytes, result) for func(text)"""
+    best = float("inf")
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def run(encoding_name: str, repeat: int, sizes: List[int]) -> None:
+    estimator = TokenEstimator(encoding_name=encoding_name, cache_results=False)
+    legacy = legacy_counter(estimator)
+
+    print(f"TokenEstimator benchmark (encoding={encoding_name}, best of {repeat})")
+    print(f"{'size':>10} {'tokens':>10} {'legacy s':>10} {'direct s':>10} {'speedup':>8} "
+          f"{'legacy MB':>10} {'direct MB':>10}")
+    for size in sizes:
+        text = make_text(size)
+        legacy_time, legacy_peak, legacy_count = measure(legacy, text, repeat)
+        direct_time, direct_peak, direct_count = measure(estimator.count_tokens, text, repeat)
+        if legacy_count != direct_count:
+            raise AssertionError(f"Token count mismatch at {size}: {legacy_count} != {direct_count}")
+        print(f"{size:>10} {direct_count:>10} {legacy_time:>10.4f} {direct_time:>10.4f} "
+              f"{legacy_time / direct_time:>7.1f}x {legacy_peak / 1e6:>10.1f} {direct_peak / 1e6:>10.1f}")
+
+
+def run_batch(encoding_name: str, count: int) -> None:
+    estimator = TokenEstimator(encoding_name=encoding_name, cache_results=False)
+    texts = [make_text(200 + (i * 37) % 4000) for i in range(count)]
+
+    print(f"\nestimate_tokens_batch benchmark ({count} texts, generator input)")
+    print(f"{'mode':>10} {'seconds':>10} {'texts/s':>12}")
+    reference = None
+    for mode in ("serial", "thread", "process"):
+        start = time.perf_counter()
+        counts = estimator.estimate_tokens_batch((text for text in texts), mode=mode)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = counts
+        elif counts != reference:
+            raise AssertionError(f"Batch mode '{mode}' returned different counts")
+        print(f"{mode:>10} {elapsed:>10.3f} {count / elapsed:>12.0f}")
+    estimator.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoding", default="cl100k_base", help="tiktoken encoding name")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1], help="largest input size in characters")
+    parser.add_argument("--batch-texts", type=int, default=100_000, help="texts in the batch benchmark (0 to skip)")
+    args = parser.parse_args()
+    run(args.encoding, args.repeat, [size for size in SIZES if size <= args.max_size])
+    if args.batch_texts:
+        run_batch(args.encoding, args.batch_texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark: MCP transports of the Social server.
+
+Compares SSE, streamable HTTP (stateful, and stateless with JSON responses)
+and stdio for the Social tools. Reported per transport:
+    - session setup: connect + initialize (median)
+    - tools/call latency (p50/p99) on one session
+    - server memory per open session
+and, for streamable HTTP, the throughput of JSON-RPC batches against one
+request per call.
+
+Usage:
+    python -m benchmarks.transports [--calls 300] [--sessions 20] [--batch 20]
+    python -m benchmarks.transports --transports sse stateless
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
+
+from app.utils.cmd.process_registry import children_map, sample_process
+
+TOOL = "get_kpop_idol_info"
+TOOL_ARGUMENTS = {"idol_name": "지민"}
+
+# name -> (server transport, stateless_http, json_response)
+TRANSPORTS = {
+    "sse": ("sse", False, False),
+    "streamable": ("streamable-http", False, False),
+    "stateless": ("streamable-http", True, True),
+    "stdio": ("stdio", False, False),
+}
+
+STDIO_SERVER = [sys.executable, "-c", "from app.servers.mcp.sse.social import SocialServer; SocialServer().run('stdio')"]
+
+
+def run_social_server(transport: str, port: int, stateless_http: bool, json_response: bool) -> None:
+    from app.servers.mcp.sse.social import SocialServer
+
+    logging.disable(logging.WARNING)
+    server = SocialServer()
+    server.mcp.settings.port = port
+    server.mcp.settings.stateless_http = stateless_http
+    server.mcp.settings.json_response = json_response
+    server.run(transport)
+
+
+def tree_rss(pid: int) -> int:
+    usage = sample_process(pid, children_map())
+    return usage.rss_bytes if usage is not None else 0
+
+
+def children_rss() -> int:
+    """RSS of every process started by this one (the stdio servers)"""
+    children = children_map()
+    usages = [sample_process(pid, children) for pid in children.get(os.getpid(), [])]
+    return sum(usage.rss_bytes for usage in usages if usage is not None)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Target:
+    """How to open client sessions for one transport"""
+
+    def __init__(self, name: str, port: int):
+        self.name = name
+        self.transport = TRANSPORTS[name][0]
+        self.port = port
+        self.process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        path = "/sse" if self.transport == "sse" else "/mcp"
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> None:
+        if self.transport == "stdio":
+            return
+        _, stateless_http, json_response = TRANSPORTS[self.name]
+        self.process = multiprocessing.Process(
+            target=run_social_server, args=(self.transport, self.port, stateless_http, json_response), daemon=True
+        )
+        self.process.start()
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.kill()
+
+    async def wait_ready(self, timeout: float) -> None:
+        if self.process is None:
+            return
+        deadline = time.perf_counter() + timeout
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            while time.perf_counter() < deadline:
+                try:
+                    async with client.stream("GET", self.url) as response:
+                        if response.status_code < 500:
+                            return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.05)
+        raise TimeoutError(f"{self.name} server not ready after {timeout}s")
+
+    async def open(self, stack: AsyncExitStack) -> ClientSession:
+        if self.transport == "stdio":
+            errlog = stack.enter_context(open(os.devnull, "w"))
+            streams = await stack.enter_async_context(stdio_client(StdioServerParameters(
+                command=STDIO_SERVER[0], args=STDIO_SERVER[1:],
+            ), errlog=errlog))
+        elif self.transport == "sse":
+            streams = await stack.enter_async_context(sse_client(self.url))
+        else:
+            streams = await stack.enter_async_context(streamable_http_client(self.url))
+        session = await stack.enter_async_context(ClientSession(streams[0], streams[1]))
+        await session.initialize()
+        return session
+
+    def server_rss(self) -> int:
+        """RSS of the server, or of every stdio server started by this process"""
+        if self.process is not None:
+            return tree_rss(self.process.pid)
+        return children_rss()
+
+
+async def measure_latency(target: Target, calls: int) -> List[float]:
+    timings = []
+    async with AsyncExitStack() as stack:
+        session = await target.open(stack)
+        await session.call_tool(TOOL, TOOL_ARGUMENTS)
+        for _ in range(calls):
+            started = time.perf_counter()
+            await session.call_tool(TOOL, TOOL_ARGUMENTS)
+            timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+async def measure_sessions(target: Target, sessions: int) -> Dict[str, float]:
+    """Opens sessions one by one and keeps them open to measure memory per session"""
+    before = target.server_rss()
+    setups = []
+    async with AsyncExitStack() as stack:
+        for _ in range(sessions):
+            started = time.perf_counter()
+            await target.open(stack)
+            setups.append(time.perf_counter() - started)
+        await asyncio.sleep(0.2)
+        after = target.server_rss()
+    return {
+        "setup_ms": statistics.median(setups) * 1000,
+        "rss_per_session_kb": max(0, after - before) / sessions / 1024,
+    }
+
+
+async def measure_batching(target: Target, calls: int, batch: int) -> Dict[str, float]:
+    """Calls per second with one POST per call and with batches of calls (stateless JSON only)"""
+    headers = {"accept": "application/json, text/event-stream", "content-type": "application/json"}
+
+    def call(index: int) -> dict:
+        return {"jsonrpc": "2.0", "id": index, "method": "tools/call",
+                "params": {"name": TOOL, "arguments": TOOL_ARGUMENTS}}
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        started = time.perf_counter()
+        for index in range(calls):
+            response = await client.post(target.url, headers=headers, content=json.dumps(call(index)))
+            response.raise_for_status()
+        single = calls / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for offset in range(0, calls, batch):
+            payload = [call(index) for index in range(offset, min(calls, offset + batch))]
+            response = await client.post(target.url, headers=headers, content=json.dumps(payload))
+            response.raise_for_status()
+            if len(response.json()) != len(payload):
+                raise RuntimeError("Batch response is missing messages")
+        batched = calls / (time.perf_counter() - started)
+    return {"single_calls_per_second": single, "batched_calls_per_second": batched}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for offset, name in enumerate(args.transports):
+        target = Target(name, args.port + offset)
+        target.start()
+        try:
+            await target.wait_ready(args.timeout)
+            timings = await measure_latency(target, args.calls)
+            result = {
+                "p50_ms": statistics.median(timings) * 1000,
+                "p99_ms": percentile(timings, 0.99) * 1000,
+                **await measure_sessions(target, args.sessions),
+            }
+            if name == "stateless":
+                result.update(await measure_batching(target, args.calls, args.batch))
+        finally:
+            target.stop()
+        results[name] = result
+        line = (f"{name:<11} setup={result['setup_ms']:7.1f} ms  p50={result['p50_ms']:6.2f} ms  "
+                f"p99={result['p99_ms']:6.2f} ms  memory/session={result['rss_per_session_kb']:8.0f} KB")
+        if "batched_calls_per_second" in result:
+            line += (f"  single={result['single_calls_per_second']:.0f}/s "
+                     f"batch×{args.batch}={result['batched_calls_per_second']:.0f}/s")
+        print(line)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transports", nargs="+", choices=list(TRANSPORTS), default=list(TRANSPORTS),
+                        help="transports to measure")
+    parser.add_argument("--calls", type=int, default=300, help="tools/call requests per latency run")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions opened for setup time and memory")
+    parser.add_argument("--batch", type=int, default=20, help="calls per JSON-RPC batch")
+    parser.add_argument("--port", type=int, default=18900, help="first port used by the HTTP servers")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a server to be ready")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
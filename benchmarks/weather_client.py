@@ -0,0 +1,140 @@
+"""
+Benchmark: weather client throughput at high concurrency.
+
+Starts the stub weather provider (with an artificial latency) in another
+process and issues many concurrent get_weather lookups over a set of cities:
+    - naive:     a new HTTP client (and connection) per lookup, no coalescing
+    - coalesced: pooled WeatherClient, concurrent lookups of a city merged,
+                 no freshness window
+    - cached:    pooled WeatherClient with a freshness window
+Reported: lookups per second, latency p50/p99 and provider requests made.
+
+Usage:
+    python -m benchmarks.weather_client [--lookups 2000] [--concurrency 500] [--cities 100]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from app.data.weather.client import WeatherClient
+
+
+def run_stub(port: int, latency: float) -> None:
+    import uvicorn
+    from app.data.weather.stub import create_stub_app
+
+    uvicorn.run(create_stub_app(latency), host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(f"{url}/weather", params={"city": "ready"})
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.05)
+    raise TimeoutError(f"Stub provider not ready after {timeout}s")
+
+
+async def drive(lookup: Callable[[str], Awaitable[object]], cities: List[str], lookups: int,
+                concurrency: int) -> Dict[str, float]:
+    """Runs the lookups with at most `concurrency` in flight"""
+    limiter = asyncio.Semaphore(concurrency)
+    timings = []
+    failures = 0
+
+    async def one(city: str) -> None:
+        nonlocal failures
+        async with limiter:
+            started = time.perf_counter()
+            try:
+                await lookup(city)
+            except Exception:
+                failures += 1
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(city) for city in cities[:lookups]])
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        "lookups_per_second": lookups / elapsed,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        "failures": failures,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    url = f"http://127.0.0.1:{args.port}"
+    await wait_ready(url)
+    rng = random.Random(args.seed)
+    names = [f"city-{index}" for index in range(args.cities)]
+    cities = [rng.choice(names) for _ in range(args.lookups)]
+    results = {}
+
+    requests = 0
+
+    async def naive(city: str) -> None:
+        nonlocal requests
+        requests += 1
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout) as client:
+            response = await client.get("/weather", params={"city": city})
+            response.raise_for_status()
+            WeatherClient.parse(response.json())
+
+    result = await drive(naive, cities, args.lookups, args.concurrency)
+    results["naive"] = {**result, "provider_requests": requests}
+
+    for name, fresh_for in (("coalesced", 1e-6), ("cached", 300.0)):
+        client = WeatherClient(url, fresh_for=fresh_for, timeout=args.timeout,
+                               max_concurrency=args.concurrency, max_connections=args.concurrency)
+        try:
+            result = await drive(client.get, cities, args.lookups, args.concurrency)
+        finally:
+            await client.aclose()
+        results[name] = {**result, "provider_requests": client.requests}
+
+    for name, result in results.items():
+        print(f"{name:<10} {result['lookups_per_second']:8.0f} lookups/s  p50={result['p50_ms']:7.1f} ms  "
+              f"p99={result['p99_ms']:7.1f} ms  provider requests={result['provider_requests']:6d}  "
+              f"failures={result['failures']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=2000, help="lookups per scenario")
+    parser.add_argument("--concurrency", type=int, default=500, help="lookups in flight")
+    parser.add_argument("--cities", type=int, default=100, help="distinct cities looked up")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stub provider takes per request")
+    parser.add_argument("--timeout", type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument("--port", type=int, default=18950, help="port of the stub provider")
+    parser.add_argument("--seed", type=int, default=7, help="random seed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = multiprocessing.Process(target=run_stub, args=(args.port, args.latency), daemon=True)
+    stub.start()
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        stub.terminate()
+        stub.join(5)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
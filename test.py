@@ -1,13 +1,11 @@
+from app.utils.helpers.token import TokenEstimator
+
+# TokenTextSplitter mặc định dùng encoding gpt2
+_estimator = TokenEstimator(encoding_name="gpt2", cache_results=False)
+
+
 def estimate_tokens(text):
-    from langchain.text_splitter import TokenTextSplitter
-    
-    # Tạo text splitter với chunk size là 1 token
-    text_splitter = TokenTextSplitter(chunk_size=1, chunk_overlap=0)
-    
-    # Split text thành các chunks
-    chunks = text_splitter.split_text(text)
-    
-    # Số chunks chính là số token ước lượng
-    return len(chunks)
-
-print(1111, estimate_tokens("Hello World"))
\ No newline at end of file
+    # Đếm trực tiếp từ token id của encoder (không split thành từng chunk 1 token)
+    return _estimator.estimate_tokens(text)
+
+print(1111, estimate_tokens("Hello World"))
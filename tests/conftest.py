@@ -0,0 +1,32 @@
+import pytest
+import tiktoken
+import tiktoken.registry
+
+# cl100k_base pre-tokenizer pattern; the BPE ranks below are a small byte-level stand-in
+# for the real ones, which are downloaded on first use and unavailable offline
+CL100K_PAT_STR = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+"""
+    r"""|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+MERGED_WORDS = (" the", " token", "ing", " count", "Xin", " chào", " tiếng", " Việt", "지민", " 안녕하세요", " 방탄")
+
+TEST_ENCODING = "test_cl100k"
+
+
+def build_test_encoding() -> tiktoken.Encoding:
+    ranks = {bytes([byte]): byte for byte in range(256)}
+    for word in MERGED_WORDS:
+        data = word.encode("utf-8")
+        # Every prefix is a token too, so each word can be built pair by pair
+        for end in range(2, len(data) + 1):
+            ranks.setdefault(data[:end], len(ranks))
+    return tiktoken.Encoding(name=TEST_ENCODING, pat_str=CL100K_PAT_STR, mergeable_ranks=ranks, special_tokens={})
+
+
+@pytest.fixture(scope="session")
+def test_encoding():
+    """An offline encoding registered as TEST_ENCODING for TokenEstimator"""
+    encoding = build_test_encoding()
+    tiktoken.registry.ENCODINGS[TEST_ENCODING] = encoding
+    yield encoding
+    tiktoken.registry.ENCODINGS.pop(TEST_ENCODING, None)
@@ -0,0 +1,53 @@
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError as FastMCPToolError
+
+from app.core.config import settings
+from app.core.exceptions import ToolError
+from app.servers.mcp.sse.base import BaseMCPServer
+
+
+@pytest.fixture
+def server():
+    server = BaseMCPServer("Test", port=0)
+
+    @server.tool(batch=True)
+    async def double(x: int) -> int:
+        """Doubles a non-negative number"""
+        if x < 0:
+            raise ToolError("double", f"{x} is negative")
+        if x == 13:
+            raise RuntimeError("unlucky")
+        return 2 * x
+
+    yield server
+    server.shutdown_executors()
+
+
+async def test_batch_returns_one_result_per_item_in_order(server):
+    result = await server.mcp.call_tool("double_batch", {"items": [{"x": 1}, {"x": -2}, {"x": 13}, {"x": 4}]})
+
+    assert not result.isError
+    assert result.structuredContent["result"] == [
+        {"index": 0, "ok": True, "result": 2},
+        {"index": 1, "ok": False, "error": "-2 is negative"},
+        {"index": 2, "ok": False, "error": "unlucky"},
+        {"index": 3, "ok": True, "result": 8},
+    ]
+    # The items are calls of the tool
+    assert server.metrics.calls["double"] == 4
+    assert server.metrics.calls["double_batch"] == 1
+    assert server.tool_runners["double"].errors == 2
+
+
+async def test_batch_items_are_validated_with_the_tool_arguments(server):
+    with pytest.raises(FastMCPToolError, match="x"):
+        await server.mcp.call_tool("double_batch", {"items": [{"x": "not a number"}]})
+
+
+async def test_batch_size_is_limited_by_the_schema(server):
+    tools = {tool.name: tool for tool in await server.mcp.list_tools()}
+    items_schema = tools["double_batch"].inputSchema["properties"]["items"]
+    assert items_schema["maxItems"] == settings.TOOL_BATCH_MAX_ITEMS
+
+    with pytest.raises(FastMCPToolError, match="at most"):
+        await server.mcp.call_tool("double_batch", {"items": [{"x": 1}] * (settings.TOOL_BATCH_MAX_ITEMS + 1)})
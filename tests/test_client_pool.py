@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core import client_pool
+from app.core.client_pool import LLMClientPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    created = []
+
+    def factory(model, temperature, api_key, pool, **kwargs):
+        client = {"model": model, "api_key": api_key, **kwargs}
+        created.append(client)
+        return client
+
+    monkeypatch.setitem(client_pool.PROVIDER_FACTORIES, "fake", factory)
+    return created
+
+
+def test_clients_are_pooled_by_key_and_options(fake_provider):
+    pool = LLMClientPool()
+    first = pool.get("fake", "m", 0, "key-1")
+    assert pool.get("fake", "m", 0.0, "key-1") is first
+    assert pool.get("fake", "m", 0, "key-2") is not first
+    assert pool.get("fake", "m", 0, "key-1", max_tokens=5) is not first
+    assert len(fake_provider) == 3
+
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert not any("key-1" in name for name in stats["usage"])
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.get("fake", "other", 0, "key-1")
+
+
+def test_async_client_works_from_several_event_loops(server_url):
+    pool = LLMClientPool()
+
+    async def fetch():
+        response = await pool.http_async_client.get(server_url)
+        return response.text
+
+    # Each asyncio.run() is a new loop; the kept-alive connection of the previous one is closed with it
+    assert [asyncio.run(fetch()) for _ in range(3)] == ["ok"] * 3
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(fetch()))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 4
+
+    async def fetch_and_close():
+        text = await fetch()
+        await pool.aclose()
+        return text
+
+    assert asyncio.run(fetch_and_close()) == "ok"
+    assert pool.stats()["http_async_client_open"] is False
@@ -0,0 +1,53 @@
+import pytest
+
+from app.utils.helpers.cost_ledger import CostLedger
+
+
+@pytest.fixture
+def ledger():
+    ledger = CostLedger()
+    ledger.record("gpt-4.1", 1000, 500, tool="search", client="a", timestamp=1.0)
+    # An alias is recorded under the model's canonical name
+    ledger.record("gpt-4.1-2025-04-14", 2000, 0, tool="summarize", client="a", timestamp=2.0)
+    ledger.record("gpt-4.1", 0, 1000, tool="search", client="b", timestamp=3.0)
+    return ledger
+
+
+def test_totals_and_costs(ledger):
+    (total,) = ledger.totals()
+    assert total["calls"] == 3
+    assert (total["input_tokens"], total["output_tokens"]) == (3000, 1500)
+    # gpt-4.1: 2 USD per 1M input tokens, 8 USD per 1M output tokens
+    assert total["input_cost_usd"] == pytest.approx(0.006)
+    assert total["output_cost_usd"] == pytest.approx(0.012)
+    assert total["total_cost_usd"] == pytest.approx(0.018)
+
+
+def test_totals_by_group_and_time(ledger):
+    by_tool = {row["tool"]: row for row in ledger.totals("tool")}
+    assert by_tool["search"]["calls"] == 2
+    assert by_tool["summarize"]["input_tokens"] == 2000
+
+    by_model = ledger.totals("model")
+    assert [row["model"] for row in by_model] == ["gpt-4.1"]
+
+    (recent,) = ledger.totals(since=2.0)
+    assert recent["calls"] == 2
+    assert ledger.totals(until=1.0) == []
+
+
+@pytest.mark.parametrize("args", [
+    ("unknown-model", 1, 1),
+    ("gpt-4.1", 1.5, 1),
+    ("gpt-4.1", 1, 2 ** 70),
+])
+def test_failed_record_leaves_the_columns_aligned(ledger, args):
+    with pytest.raises((ValueError, TypeError, OverflowError)):
+        ledger.record(*args)
+
+    assert len(ledger) == 3
+    columns = ledger.columns()
+    assert {len(column) for column in columns.values()} == {3}
+
+    ledger.record("gpt-4.1", 10, 10, timestamp=4.0)
+    assert len(ledger.columns()["model"]) == 4
@@ -0,0 +1,54 @@
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError as FastMCPToolError
+
+from app.data.database.idols import IdolStore
+from app.servers.mcp.sse.social import SocialServer
+
+
+@pytest.fixture(scope="module")
+def store():
+    return IdolStore.load()
+
+
+def names(match):
+    return [record.name for record in match.records]
+
+
+@pytest.mark.parametrize("query", ["지민", "박지민"])
+def test_lookup_exact(store, query):
+    match = store.lookup(query)
+    assert match.kind == "exact"
+    assert names(match) == ["지민"]
+
+
+@pytest.mark.parametrize("query", ["jimin", "Jimin", "Ji-min", "Park Jimin"])
+def test_lookup_romanized(store, query):
+    match = store.lookup(query)
+    assert match.kind == "romanized"
+    assert names(match) == ["지민"]
+
+
+def test_lookup_choseong(store):
+    match = store.lookup("ㅈㅁ")
+    assert match.kind == "choseong"
+    assert names(match) == ["지민"]
+
+
+def test_lookup_unknown(store):
+    assert store.lookup("jimn") is None
+    assert store.lookup("zzzz") is None
+
+
+def test_suggest_close_names(store):
+    assert "지민" in store.suggest("jimn")
+    assert "지민" in store.suggest("지미")
+    assert store.suggest("zzzz") == []
+
+
+async def test_not_found_error_names_the_tool():
+    server = SocialServer()
+    with pytest.raises(FastMCPToolError) as excinfo:
+        await server.mcp.call_tool("get_kpop_idol_info", {"idol_name": "jimn"})
+    message = str(excinfo.value)
+    assert "Error in tool 'get_kpop_idol_info'" in message
+    assert "지민" in message
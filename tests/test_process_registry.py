@@ -0,0 +1,55 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from app.servers.mcp.std.base import StdServer
+from app.utils.cmd.process_registry import ProcessRegistry
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="samples /proc")
+
+
+async def start_sleep(registry, process_id="p1"):
+    process = await asyncio.create_subprocess_exec("sleep", "30")
+    return registry.register(process_id, process, "sleep", "30")
+
+
+async def test_sampling_reads_proc_off_the_event_loop():
+    registry = ProcessRegistry(sample_interval=0)
+    record = await start_sleep(registry)
+    threads = []
+    read_usage = registry._read_usage
+
+    def tracked(pids):
+        threads.append(threading.current_thread())
+        return read_usage(pids)
+
+    registry._read_usage = tracked
+    try:
+        await registry.asample()
+        assert threads and threads[0] is not threading.main_thread()
+        assert record.rss_bytes > 0
+        assert record.num_threads >= 1
+        assert record.sampled_at is not None
+    finally:
+        record.process.kill()
+        await record.process.wait()
+
+
+async def test_killed_process_stays_queryable_until_pruned():
+    server = StdServer()
+    server.registry.max_finished = 1
+    record = await start_sleep(server.registry, "first")
+
+    await server.kill_process("first")
+    await asyncio.sleep(0.05)
+    assert [info.process_id for info in await server.list_processes(status_filter="killed")] == ["first"]
+
+    second = await start_sleep(server.registry, "second")
+    second.process.kill()
+    await second.process.wait()
+    await asyncio.sleep(0.05)
+    # Only max_finished finished processes are kept
+    assert "first" not in server.registry
+    assert record.exit_code is not None
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from app.core.exceptions import ServerError
+from app.servers.mcp.std.bridge import JSONRPC_INTERNAL_ERROR, StdioMCPConnection
+from app.servers.mcp.sse.tool_metrics import ToolMetrics
+from app.utils.cmd.npx import NPXRunner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ECHO_SERVER = [sys.executable, "-m", "benchmarks.echo_stdio_server"]
+
+
+def call(request_id, tool, progress_token=None, **arguments):
+    params = {"name": tool, "arguments": arguments}
+    if progress_token is not None:
+        params["_meta"] = {"progressToken": progress_token}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+def text_of(response):
+    return response["result"]["content"][0]["text"]
+
+
+async def next_message(session, timeout=10.0):
+    return await asyncio.wait_for(session.queue.get(), timeout)
+
+
+@pytest.fixture
+async def connection():
+    connection = StdioMCPConnection(NPXRunner(), argv=ECHO_SERVER, env_vars={"PYTHONPATH": ROOT},
+                                    working_dir=ROOT, metrics=ToolMetrics())
+    await connection.start(timeout=30)
+    yield connection
+    await connection.close()
+
+
+async def test_sessions_using_the_same_request_id_get_their_own_responses(connection):
+    first, second = connection.open_session(), connection.open_session()
+
+    await connection.forward(first, call(1, "sleep", seconds=0.2))
+    await connection.forward(second, call(1, "echo", text="second"))
+
+    second_response = await next_message(second)
+    first_response = await next_message(first)
+    assert (second_response["id"], text_of(second_response)) == (1, "second")
+    assert (first_response["id"], text_of(first_response)) == (1, "slept 0.2")
+    assert connection.in_flight == 0
+    assert connection.metrics.calls == {"sleep": 1, "echo": 1}
+
+
+async def test_progress_notifications_reach_the_session_that_asked(connection):
+    first, second = connection.open_session(), connection.open_session()
+
+    await connection.forward(first, call("a", "count", progress_token="token", steps=3))
+    await connection.forward(second, call("a", "count", progress_token="token", steps=1))
+
+    first_messages = [await next_message(first) for _ in range(4)]
+    second_messages = [await next_message(second) for _ in range(2)]
+    for messages, steps in ((first_messages, 3), (second_messages, 1)):
+        progress = [m["params"] for m in messages if m.get("method") == "notifications/progress"]
+        assert [p["progress"] for p in progress] == list(range(1, steps + 1))
+        assert {p["progressToken"] for p in progress} == {"token"}
+        assert text_of(messages[-1]) == f"counted {steps}"
+        assert messages[-1]["id"] == "a"
+
+
+async def test_closing_a_session_cancels_its_requests(connection):
+    leaving, staying = connection.open_session(), connection.open_session()
+
+    await connection.forward(leaving, call(1, "sleep", progress_token=1, seconds=30))
+    assert connection.in_flight == 1
+    await connection.close_session(leaving)
+
+    assert connection.in_flight == 0
+    assert leaving.pending == {}
+    assert connection._progress == {}
+    assert connection.metrics.errors[("sleep", "CancelledError")] == 1
+
+    # The child is still serving the other sessions
+    await connection.forward(staying, call(1, "echo", text="still here"))
+    assert text_of(await next_message(staying)) == "still here"
+    assert leaving.queue.empty()
+
+
+async def test_child_exit_fails_the_requests_in_flight(connection):
+    first, second = connection.open_session(), connection.open_session()
+    await connection.forward(first, call(7, "sleep", seconds=30))
+    await connection.forward(second, call("x", "sleep", seconds=30))
+
+    connection.process.kill()
+    await asyncio.wait_for(connection.closed.wait(), 10)
+
+    for session, request_id in ((first, 7), (second, "x")):
+        response = await next_message(session)
+        assert response["id"] == request_id
+        assert response["error"]["code"] == JSONRPC_INTERNAL_ERROR
+    assert connection.in_flight == 0
+    assert connection.metrics.errors[("sleep", "ServerError")] == 2
+
+    with pytest.raises(ServerError):
+        await connection.request("tools/list")
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.data.weather.client import WeatherReport
+from app.servers.mcp.sse.social import SocialServer, format_weather
+
+JIMIN_TEXT = (
+    "이름: 박지민 (Park Jimin)\n"
+    "그룹: BTS\n"
+    "포지션: 주보컬, 리드댄서\n"
+    "생년월일: 1995-10-13\n"
+    "소속사: HYBE (Big Hit Music)\n"
+    "데뷔일: 2013-06-13\n"
+    "혈액형: A\n"
+    "인스타그램: @j.m"
+)
+
+
+@pytest.fixture
+async def server():
+    server = SocialServer()
+    yield server
+    await server.weather.aclose()
+
+
+def text_of(result):
+    assert len(result.content) == 1
+    return result.content[0].text
+
+
+async def test_idol_info_defaults_to_json(server):
+    result = await server.mcp.call_tool("get_kpop_idol_info", {"idol_name": "지민"})
+
+    assert not result.isError
+    assert result.structuredContent["matched_by"] == "exact"
+    assert [idol["name"] for idol in result.structuredContent["idols"]] == ["지민"]
+    assert json.loads(text_of(result)) == result.structuredContent
+
+
+async def test_idol_info_text_format(server):
+    result = await server.mcp.call_tool("get_kpop_idol_info", {"idol_name": "Jimin", "format": "text"})
+
+    assert text_of(result) == JIMIN_TEXT
+    assert result.structuredContent["matched_by"] == "romanized"
+    assert result.structuredContent["idols"][0]["group"] == "BTS"
+
+
+async def test_weather_defaults_to_json(server):
+    result = await server.mcp.call_tool("get_weather", {"city": "서울", "country": "한국"})
+
+    report = result.structuredContent
+    assert (report["city"], report["country"], report["condition"]) == ("서울", "한국", "맑음")
+    assert json.loads(text_of(result)) == report
+
+
+async def test_weather_text_format(server):
+    result = await server.mcp.call_tool("get_weather", {"city": "서울", "format": "text"})
+
+    text = text_of(result)
+    assert text == format_weather(WeatherReport(**result.structuredContent))
+    assert text.startswith("도시: 서울\n국가: 정보 없음\n온도: 22.0°C\n상태: 맑음\n")
+
+
+async def test_tools_publish_an_output_schema(server):
+    tools = {tool.name: tool for tool in await server.mcp.list_tools()}
+
+    weather_schema = tools["get_weather"].outputSchema
+    assert {"city", "temperature", "condition"} <= set(weather_schema["properties"])
+    idol_schema = tools["get_kpop_idol_info"].outputSchema
+    assert {"matched_by", "idols"} <= set(idol_schema["properties"])
+    for name in ("get_weather", "get_kpop_idol_info"):
+        assert "format" in tools[name].inputSchema["properties"]
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.helpers.token_cache import LRUTokenCache, SQLiteTokenCache
+
+
+def test_counters_are_exact_across_threads():
+    cache = LRUTokenCache()
+    cache.set("hit", "enc", 1)
+
+    def lookups(_):
+        for _ in range(2000):
+            cache.get("hit", "enc")
+            cache.get("miss", "enc")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lookups, range(8)))
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (16000, 16000)
+
+
+def test_lru_evicts_by_entry_count():
+    cache = LRUTokenCache(max_entries=2)
+    cache.set("a", "enc", 1)
+    cache.set("b", "enc", 2)
+    assert cache.get("a", "enc") == 1
+    cache.set("c", "enc", 3)
+
+    assert cache.get("b", "enc") is None
+    assert (cache.get("a", "enc"), cache.get("c", "enc")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_sqlite_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "tokens.sqlite")
+    cache = SQLiteTokenCache(path)
+    cache.set("system prompt", "enc", 42)
+    cache.close()
+
+    reopened = SQLiteTokenCache(path)
+    assert reopened.get("system prompt", "enc") == 42
+    assert reopened.get("system prompt", "other") is None
+    assert reopened.stats()["hits"] == 1
+    reopened.close()
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+from app.utils.helpers.token import TokenEstimator
+from app.utils.helpers.token_stream import TokenStreamCounter, find_safe_cut
+
+SAMPLES = [
+    "",
+    "Count the tokens of the thing, counting everything.",
+    "Xin chào, tiếng Việt có dấu: người, được, những.",
+    "지민 안녕하세요 방탄소년단 지민이 노래합니다",
+    "mixed 지민 and tiếng Việt\n\nwith  double  spaces\r\nand 12345 numbers",
+    "  leading and trailing whitespace \n\n",
+]
+
+
+@pytest.fixture
+def estimator(test_encoding):
+    return TokenEstimator(encoding_name=test_encoding.name)
+
+
+@pytest.mark.parametrize("mode", ["serial", "thread"])
+@pytest.mark.parametrize("cache_results", [True, False])
+def test_batch_counts_match_count_tokens(test_encoding, mode, cache_results):
+    estimator = TokenEstimator(encoding_name=test_encoding.name, cache_results=cache_results)
+    expected = [estimator.count_tokens(text) for text in SAMPLES]
+
+    assert estimator.estimate_tokens_batch(SAMPLES, mode=mode, chunk_size=2) == expected
+    # A generator, and a second pass served from the cache when it is on
+    assert list(estimator.iter_estimate_tokens((text for text in SAMPLES), mode=mode)) == expected
+
+
+def test_serial_is_the_default_mode(estimator):
+    assert estimator.estimate_tokens_batch(SAMPLES) == [estimator.count_tokens(text) for text in SAMPLES]
+
+
+def test_unknown_mode_is_rejected(estimator):
+    with pytest.raises(ValueError):
+        estimator.estimate_tokens_batch(SAMPLES, mode="gpu")
+
+
+def long_text() -> str:
+    return "\n".join(text for text in SAMPLES if text) * 50
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+def test_stream_counts_match_count_tokens(estimator, tmp_path, chunk_size):
+    text = long_text()
+    data = text.encode("utf-8")
+    path = tmp_path / "text.txt"
+    path.write_bytes(data)
+    expected = estimator.count_tokens(text)
+
+    # Small byte chunks split the multi-byte Hangul and Vietnamese characters
+    assert estimator.estimate_tokens_stream(str(path), chunk_size=chunk_size) == expected
+    assert estimator.estimate_tokens_stream(io.BytesIO(data), chunk_size=chunk_size) == expected
+    assert estimator.estimate_tokens_stream(io.StringIO(text), chunk_size=chunk_size) == expected
+
+
+async def test_async_stream_counts_match_count_tokens(estimator):
+    text = long_text()
+    data = text.encode("utf-8")
+
+    async def body():
+        for offset in range(0, len(data), 5):
+            yield data[offset:offset + 5]
+
+    assert await estimator.aestimate_tokens_stream(body()) == estimator.count_tokens(text)
+
+
+def test_safe_cuts_do_not_split_whitespace_runs():
+    assert find_safe_cut("a  b\n\nc\r\nd.") == 0
+    assert find_safe_cut("a  b\n\nc\r\nd e.") == len("a  b\n\nc\r\nd")
+    assert find_safe_cut("a  b\nc.") == len("a  b\n")
+
+
+def test_forced_cuts_are_counted_and_bounded(estimator):
+    # No whitespace at all: the buffer can only be cut by force
+    text = "지민tiếngViệt" * 400
+    counter = TokenStreamCounter(estimator.count_tokens, chunk_chars=100, max_buffer_chars=500)
+    data = text.encode("utf-8")
+    for offset in range(0, len(data), 37):
+        counter.feed(data[offset:offset + 37])
+    total = counter.finish()
+
+    assert counter.forced_cuts > 0
+    assert abs(total - estimator.count_tokens(text)) <= 2 * counter.forced_cuts
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.core import result_cache
+from app.core.exceptions import NotFoundError, ToolError
+from app.servers.mcp.sse.tool_cache import ToolResultCache
+
+
+async def test_concurrent_identical_calls_are_computed_once():
+    cache = ToolResultCache("t", ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    results = await asyncio.gather(*[cache.get_or_compute({"x": 1}, compute) for _ in range(5)])
+
+    assert results == [{"value": 42}] * 5
+    assert calls == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 0)
+
+    assert await cache.get_or_compute({"x": 1}, compute) == {"value": 42}
+    assert cache.hits == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    cache = ToolResultCache("t", ttl=60)
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(cache.get_or_compute({}, compute))
+    second = asyncio.ensure_future(cache.get_or_compute({}, compute))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+
+
+async def test_results_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ToolResultCache("t", ttl=10)
+    values = iter(["first", "second"])
+
+    async def compute():
+        return next(values)
+
+    assert await cache.get_or_compute({"x": 1}, compute) == "first"
+    now[0] += 9
+    assert await cache.get_or_compute({"x": 1}, compute) == "first"
+    now[0] += 2
+    assert await cache.get_or_compute({"x": 1}, compute) == "second"
+    assert cache.expirations == 1
+
+
+def test_keys_ignore_spacing_and_optionally_case():
+    insensitive = ToolResultCache("t", ttl=60, case_sensitive=False)
+    sensitive = ToolResultCache("t", ttl=60)
+    assert insensitive.make_key({"city": " Seoul "}) == insensitive.make_key({"city": "seoul"})
+    assert sensitive.make_key({"city": " Seoul "}) == sensitive.make_key({"city": "Seoul"})
+    assert sensitive.make_key({"city": "Seoul"}) != sensitive.make_key({"city": "seoul"})
+
+
+async def test_only_not_found_errors_are_cached():
+    cache = ToolResultCache("t", ttl=60, error_ttl=60)
+    calls = {"missing": 0, "broken": 0}
+
+    async def missing():
+        calls["missing"] += 1
+        raise NotFoundError("t", "nothing")
+
+    async def broken():
+        calls["broken"] += 1
+        raise ToolError("t", "unexpected")
+
+    raised = []
+    for _ in range(2):
+        with pytest.raises(NotFoundError) as info:
+            await cache.get_or_compute({"q": "missing"}, missing)
+        raised.append(info.value)
+        with pytest.raises(ToolError):
+            await cache.get_or_compute({"q": "broken"}, broken)
+
+    assert calls == {"missing": 1, "broken": 2}
+    # Every caller gets its own exception
+    assert raised[0] is not raised[1]
+    assert raised[1].message == "nothing"
+
+
+async def test_max_entries_evicts_the_least_recently_used():
+    cache = ToolResultCache("t", ttl=60, max_entries=2)
+
+    async def compute():
+        return "v"
+
+    for key in ("a", "b", "a", "c"):
+        await cache.get_or_compute({"k": key}, compute)
+
+    assert cache.evictions == 1
+    assert cache._lookup(cache.make_key({"k": "a"})) is not None
+    assert cache._lookup(cache.make_key({"k": "b"})) is None
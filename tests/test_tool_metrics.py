@@ -0,0 +1,70 @@
+import pytest
+
+from app.core.exceptions import ToolError
+from app.servers.mcp.sse import tool_metrics
+from app.servers.mcp.sse.tool_metrics import ToolMetrics
+
+
+def samples(text):
+    return {line.rpartition(" ")[0]: float(line.rpartition(" ")[2])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def scrape(calls):
+    metrics = ToolMetrics()
+    for _ in range(calls):
+        metrics.finish("echo", metrics.start("echo"))
+    metrics.finish("echo", metrics.start("echo"), ToolError("echo_api", "down"))
+    return tool_metrics.render(metrics.families(server="Test"))
+
+
+def test_combine_adds_up_identical_samples_and_keeps_headers_once():
+    combined = tool_metrics.combine([scrape(2), scrape(3)])
+
+    values = samples(combined)
+    assert values['mcp_tool_calls_total{server="Test",tool="echo"}'] == 7
+    assert values['mcp_tool_errors_total{server="Test",tool="echo",error="echo_api"}'] == 2
+    assert values['mcp_tool_duration_seconds_count{server="Test",tool="echo"}'] == 7
+    assert values['mcp_tool_duration_seconds_bucket{server="Test",tool="echo",le="+Inf"}'] == 7
+    assert combined.count("# TYPE mcp_tool_calls_total counter") == 1
+    assert combined.count("# HELP mcp_tool_duration_seconds") == 1
+
+
+def test_relabelled_scrapes_stay_apart():
+    combined = tool_metrics.combine([
+        tool_metrics.relabel(scrape(2), worker="w1"),
+        tool_metrics.relabel(scrape(3), worker="w2"),
+    ])
+
+    values = samples(combined)
+    assert values['mcp_tool_calls_total{worker="w1",server="Test",tool="echo"}'] == 3
+    assert values['mcp_tool_calls_total{worker="w2",server="Test",tool="echo"}'] == 4
+    assert combined.count("# TYPE mcp_tool_calls_total counter") == 1
+
+
+def test_relabel_adds_a_label_set_to_unlabelled_samples():
+    assert tool_metrics.relabel("# TYPE up gauge\nup 1\n", worker="w1") == '# TYPE up gauge\nup{worker="w1"} 1\n'
+
+
+async def test_wrap_records_calls_errors_and_in_flight():
+    metrics = ToolMetrics()
+
+    async def tool(fail: bool):
+        assert metrics.in_flight["tool"] == 1
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    wrapped = metrics.wrap("tool", tool)
+    assert await wrapped(False) == "ok"
+    with pytest.raises(ValueError):
+        await wrapped(True)
+
+    assert metrics.calls["tool"] == 2
+    assert metrics.in_flight["tool"] == 0
+    assert metrics.errors[("tool", "ValueError")] == 1
+    assert metrics.durations["tool"].count == 2
+
+
+def test_label_values_are_escaped():
+    assert tool_metrics.format_labels({"q": 'a"b\\c\nd'}) == '{q="a\\"b\\\\c\\nd"}'
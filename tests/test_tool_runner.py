@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.exceptions import ConfigurationError, ToolError
+from app.servers.mcp.sse.tool_runner import ToolRunner
+
+
+@pytest.fixture
+def pools():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield lambda kind: pool
+    pool.shutdown(wait=True)
+
+
+async def test_timed_out_call_keeps_its_slot_until_the_worker_is_done(pools):
+    release = threading.Event()
+
+    def slow(x: int) -> int:
+        release.wait(5)
+        return x
+
+    runner = ToolRunner("slow", slow, max_concurrency=1, timeout=0.05, pools=pools)
+
+    with pytest.raises(ToolError, match="Timed out"):
+        await runner(1)
+    assert runner.timeouts == 1
+    # The worker thread still runs the call, so it still holds the only slot
+    assert runner.in_flight == 1
+
+    waiting = asyncio.ensure_future(runner(2))
+    await asyncio.sleep(0.01)
+    assert runner.waiting == 1
+
+    # Once the worker is done, the slot goes to the waiting call
+    release.set()
+    assert await waiting == 2
+    assert runner.in_flight == 0
+    assert runner.waiting == 0
+    assert runner._semaphore._value == 1
+
+
+async def test_concurrency_cap_and_counters(pools):
+    running = 0
+    peak = 0
+
+    async def tool(x: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if x < 0:
+            raise ToolError("tool", "negative")
+        return x
+
+    runner = ToolRunner("tool", tool, max_concurrency=2)
+    results = await asyncio.gather(*[runner(x) for x in (1, 2, 3, -1)], return_exceptions=True)
+
+    assert results[:3] == [1, 2, 3]
+    assert isinstance(results[3], ToolError)
+    assert peak == 2
+    stats = runner.stats()
+    assert (stats["calls"], stats["errors"], stats["timeouts"], stats["in_flight"]) == (4, 1, 0, 0)
+    assert stats["executor"] == "inline"
+
+
+async def test_thread_errors_are_raised_in_the_caller(pools):
+    def fail(x: int) -> int:
+        raise ToolError("fail", f"bad {x}")
+
+    runner = ToolRunner("fail", fail, pools=pools)
+    with pytest.raises(ToolError, match="bad 3"):
+        await runner(3)
+    assert runner.errors == 1
+    assert runner.in_flight == 0
+
+
+def test_executor_must_match_the_function():
+    async def async_tool():
+        return 1
+
+    def sync_tool():
+        return 1
+
+    with pytest.raises(ConfigurationError):
+        ToolRunner("a", async_tool, executor="thread", pools=lambda kind: None)
+    with pytest.raises(ConfigurationError):
+        ToolRunner("s", sync_tool, executor="inline")
+    with pytest.raises(ConfigurationError):
+        ToolRunner("p", sync_tool, executor="process", pools=lambda kind: None)
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.exceptions import ClientError
+from app.data.weather.client import WeatherClient
+from app.data.weather.stub import create_stub_app
+
+
+def stub_client(latency=0.0, **kwargs):
+    app = create_stub_app(latency)
+    client = WeatherClient(transport=httpx.ASGITransport(app=app), **kwargs)
+    return client, app
+
+
+async def test_concurrent_requests_for_a_city_reach_the_provider_once():
+    client, app = stub_client(latency=0.05)
+    try:
+        reports = await asyncio.gather(*[client.get("seoul") for _ in range(50)])
+    finally:
+        await client.aclose()
+
+    assert {report.city for report in reports} == {"seoul"}
+    assert app.state.requests == 1
+    stats = client.stats()
+    assert stats["requests"] == 1
+    assert stats["cache"]["misses"] == 1
+    assert stats["cache"]["coalesced"] == 49
+
+
+async def test_cached_report_keeps_the_callers_spelling():
+    client, app = stub_client()
+    try:
+        first = await client.get("seoul")
+        second = await client.get("Seoul")
+    finally:
+        await client.aclose()
+
+    assert app.state.requests == 1
+    assert first.city == "seoul"
+    assert second.city == "Seoul"
+
+
+async def test_slow_provider_raises_client_error():
+    client, app = stub_client(latency=0.5, timeout=0.05)
+    try:
+        with pytest.raises(ClientError):
+            await client.get("seoul")
+    finally:
+        await client.aclose()
+
+    assert client.stats()["timeouts"] == 1
+    assert client.stats()["cache"]["entries"] == 0
+
+
+async def test_without_cache_every_call_reaches_the_provider():
+    client, app = stub_client(cache=False)
+    try:
+        await asyncio.gather(*[client.get("seoul") for _ in range(5)])
+    finally:
+        await client.aclose()
+
+    assert client.cache is None
+    assert app.state.requests == 5
+    assert client.stats()["requests"] == 5
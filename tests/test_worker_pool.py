@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from app.servers.mcp.std.pool import StdioWorkerPool
+from app.utils.cmd.npx import NPXRunner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ECHO_SERVER = [sys.executable, "-m", "benchmarks.echo_stdio_server"]
+
+
+def call(request_id, tool, **arguments):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments}}
+
+
+async def next_message(session, timeout=10.0):
+    return await asyncio.wait_for(session.queue.get(), timeout)
+
+
+async def make_pool(**options):
+    pool = StdioWorkerPool(NPXRunner(), argv=ECHO_SERVER, env_vars={"PYTHONPATH": ROOT}, working_dir=ROOT,
+                           start_timeout=30, **options)
+    await pool.start()
+    return pool
+
+
+@pytest.fixture
+async def pool():
+    pool = await make_pool(min_workers=2, check_interval=60)
+    yield pool
+    await pool.close()
+
+
+def worker_of(session):
+    (worker_id,) = session.attached
+    return worker_id
+
+
+async def test_requests_go_to_the_least_loaded_worker(pool):
+    busy, other = pool.open_session(), pool.open_session()
+
+    await pool.forward(busy, call(1, "sleep", seconds=0.5))
+    await pool.forward(other, call(1, "echo", text="hi"))
+
+    assert worker_of(busy) != worker_of(other)
+    assert (await next_message(other))["result"]["content"][0]["text"] == "hi"
+    await next_message(busy)
+    assert sorted(worker["requests"] for worker in pool.stats()["per_worker"]) == [1, 1]
+
+
+async def test_sticky_method_pins_the_session(pool):
+    session, other = pool.open_session(), pool.open_session()
+
+    await pool.forward(session, {"jsonrpc": "2.0", "id": 1, "method": "logging/setLevel",
+                                 "params": {"level": "info"}})
+    await next_message(session)
+    pinned = session.pinned
+    assert pinned is not None and pinned.pinned_sessions == 1
+
+    # Keep the pinned worker busy: the session's requests still go to it
+    await pool.forward(other, call(1, "sleep", seconds=0.5))
+    if worker_of(other) != pinned.worker_id:
+        await pool.forward(other, call(2, "sleep", seconds=0.5))
+    await pool.forward(session, call(2, "echo", text="pinned"))
+    await pool.forward(session, call(3, "echo", text="pinned"))
+    assert list(session.attached) == [pinned.worker_id]
+    assert [(await next_message(session))["id"] for _ in range(2)] == [2, 3]
+
+    await pool.close_session(session)
+    assert pinned.pinned_sessions == 0
+
+
+async def test_detaching_a_worker_tolerates_sessions_opening_meanwhile(pool):
+    sessions = [pool.open_session() for _ in range(3)]
+    for index, session in enumerate(sessions):
+        await pool.forward(session, call(index, "echo", text="x"))
+        await next_message(session)
+    worker = pool.workers[0]
+    close_session = worker.connection.close_session
+
+    async def close_and_let_others_run(attached):
+        pool.open_session()
+        await asyncio.sleep(0)
+        await close_session(attached)
+
+    worker.connection.close_session = close_and_let_others_run
+    await pool._detach_worker(worker)
+
+    assert worker.worker_id not in pool._workers
+    assert all(worker.worker_id not in session.attached for session in sessions)
+    await worker.connection.close()
+
+
+async def test_pool_grows_under_load_and_shrinks_when_idle():
+    pool = await make_pool(min_workers=1, max_workers=2, scale_up_depth=2, scale_down_idle=0.3,
+                           check_interval=0.05)
+    try:
+        session = pool.open_session()
+        for request_id in range(4):
+            await pool.forward(session, call(request_id, "sleep", seconds=1.5))
+
+        for _ in range(200):
+            if len(pool.workers) == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.scale_ups == 1
+        assert len(pool.workers) == 2
+
+        for _ in range(4):
+            await next_message(session)
+        for _ in range(200):
+            if len(pool.workers) == 1:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.scale_downs == 1
+        assert len(pool.workers) == 1
+    finally:
+        await pool.close()